@@ -0,0 +1,194 @@
+# audio_buffer.py
+
+import threading
+import time
+from collections import deque
+import numpy as np
+
+RING_SECONDS = 10 # Audio kept for the recognizer before the oldest is dropped
+PREROLL_MS = 300 # Audio from before speech started that is still sent to Vosk
+HANGOVER_MS = 400 # Audio after speech ended that is still sent to Vosk
+
+
+class AudioRingBuffer:
+    """
+    Fixed-size int16 ring between the mic callback (writer) and the keyword
+    listener (reader). When the reader falls behind, the oldest samples are
+    dropped. Segment ends can be marked so the reader knows when to flush.
+    """
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self._data = np.zeros(capacity, dtype=np.int16)
+        self._read = 0 # Absolute sample positions (never wrap)
+        self._write = 0
+        self._segment_ends = deque()
+        self._write_times = deque(maxlen=4096) # (end position, perf_counter()) per write
+        self._cond = threading.Condition()
+        self.last_capture_time = None # When the newest sample returned by read() was written
+
+        self.written = 0
+        self.dropped = 0
+
+    def __len__(self):
+        return self._write - self._read
+
+    def write(self, samples):
+        n = len(samples)
+        if n == 0:
+            return
+        with self._cond:
+            self.written += n
+            if n > self.capacity:
+                # Only the newest `capacity` samples fit; skipping past the rest
+                # leaves them to be counted as dropped with the overflow below
+                self._write += n - self.capacity
+                samples = samples[-self.capacity:]
+                n = self.capacity
+            start = self._write % self.capacity
+            first = min(n, self.capacity - start)
+            self._data[start:start + first] = samples[:first]
+            self._data[:n - first] = samples[first:]
+            self._write += n
+            self._write_times.append((self._write, time.perf_counter()))
+
+            overflow = self._write - self._read - self.capacity
+            if overflow > 0: # Drop oldest
+                self._read += overflow
+                self.dropped += overflow
+                while self._segment_ends and self._segment_ends[0] <= self._read:
+                    self._segment_ends.popleft()
+            self._cond.notify()
+
+    def end_segment(self):
+        """Marks the current write position as the end of a speech segment."""
+        with self._cond:
+            if not self._segment_ends or self._segment_ends[-1] != self._write:
+                self._segment_ends.append(self._write)
+            self._cond.notify()
+
+    def read(self, max_samples=4000, timeout=None):
+        """
+        Returns (bytes, segment_ended). Blocks up to `timeout` for data; returns
+        (b"", False) on timeout. Never reads past a segment end, so when
+        segment_ended is True everything up to the end has been returned.
+        """
+        with self._cond:
+            if self._write == self._read and not self._segment_ends:
+                self._cond.wait(timeout)
+            stop = self._write
+            if self._segment_ends:
+                stop = min(stop, self._segment_ends[0])
+            n = min(max_samples, stop - self._read)
+            start = self._read % self.capacity
+            first = min(n, self.capacity - start)
+            chunk = np.concatenate((self._data[start:start + first], self._data[:n - first]))
+            self._read += n
+            while self._write_times and self._write_times[0][0] < self._read:
+                self._write_times.popleft()
+            if n and self._write_times:
+                self.last_capture_time = self._write_times[0][1]
+
+            ended = False
+            if self._segment_ends and self._segment_ends[0] <= self._read:
+                self._segment_ends.popleft()
+                ended = True
+            return chunk.tobytes(), ended
+
+
+class SpeechGate:
+    """
+    Only forwards speech to the ring buffer. A short pre-roll of the audio
+    before speech started is sent along with it, a hangover keeps the tail of
+    the word, and the end of each segment is marked so the recognizer can flush.
+    push() runs in the audio callback and doesn't allocate.
+    """
+
+    def __init__(self, ring, samplerate=16000, preroll_ms=PREROLL_MS, hangover_ms=HANGOVER_MS):
+        self.ring = ring
+        self._preroll = np.zeros(max(1, samplerate * preroll_ms // 1000), dtype=np.int16)
+        self._preroll_pos = 0 # Absolute samples written into the pre-roll
+        self._hangover_samples = samplerate * hangover_ms // 1000
+        self._hangover_left = 0
+        self._in_speech = False
+        self._marks = deque(maxlen=1024) # (ring.written, total) after each block sent to the ring
+
+        self.total = 0
+        self.skipped = 0
+
+    def push(self, block, is_speech):
+        samples = block[:, 0] if block.ndim > 1 else block
+        n = len(samples)
+        self.total += n
+
+        if is_speech:
+            if not self._in_speech:
+                self._flush_preroll()
+                self._in_speech = True
+            self._hangover_left = self._hangover_samples
+            self.ring.write(samples)
+            self._marks.append((self.ring.written, self.total))
+        elif self._in_speech:
+            self.ring.write(samples)
+            self._marks.append((self.ring.written, self.total))
+            self._hangover_left -= n
+            if self._hangover_left <= 0:
+                self._in_speech = False
+                self._preroll_pos = 0
+                self.ring.end_segment()
+        else:
+            self.skipped += n
+            self._remember(samples)
+
+    def samples_since_read(self, consumed=None):
+        """
+        How many pushed samples ago (gated or not) the recognizer's newest read
+        sample arrived, i.e. how far the reader lags behind the input. Used to
+        timestamp detections in input time. `consumed` is the ring samples the
+        reader had taken (written - len(ring) at detection time, the default).
+        """
+        if consumed is None:
+            consumed = self.ring.written - len(self.ring)
+        # push() appends from the audio thread while this runs on the reader's, so
+        # walk a snapshot (taken before the total, which is never behind its marks)
+        marks = tuple(self._marks)
+        now = self.total
+        position = now
+        for written, total in reversed(marks):
+            if written < consumed:
+                break
+            position = total - (written - consumed)
+        return now - position
+
+    def stats(self):
+        return {
+            "queue_depth": len(self.ring),
+            "dropped": self.ring.dropped,
+            "skipped": self.skipped,
+            "skipped_share": self.skipped / self.total if self.total else 0.0,
+        }
+
+    def _remember(self, samples):
+        size = len(self._preroll)
+        if len(samples) >= size:
+            self._preroll[:] = samples[-size:]
+            self._preroll_pos = size
+            return
+        start = self._preroll_pos % size
+        first = min(len(samples), size - start)
+        self._preroll[start:start + first] = samples[:first]
+        self._preroll[:len(samples) - first] = samples[first:]
+        self._preroll_pos += len(samples)
+
+    def _flush_preroll(self):
+        size = len(self._preroll)
+        count = min(self._preroll_pos, size)
+        if count == 0:
+            return
+        start = (self._preroll_pos - count) % size
+        first = min(count, size - start)
+        self.ring.write(self._preroll[start:start + first])
+        self.ring.write(self._preroll[:count - first])
+        # Those samples were counted as skipped when they arrived
+        self.skipped -= count
+        self._preroll_pos = 0
@@ -0,0 +1,108 @@
+# audio_frontend.py
+
+import math
+import time
+from collections import deque, namedtuple
+from functools import lru_cache
+import numpy as np
+
+SAMPLE_RATE = 16000
+BLOCK_SIZE = 256 # Samples per callback (16 ms at 16 kHz)
+LATENCY = "low" # Passed straight to sounddevice ('low', 'high' or seconds)
+
+# Hysteresis thresholds on the smoothed int16 RMS level
+TALK_ON_THRESHOLD = 500
+TALK_OFF_THRESHOLD = 300
+ATTACK_MS = 10 # How fast the level rises
+RELEASE_MS = 150 # How fast the level falls (longer = less mouth flicker)
+
+# Immutable state published by the audio callback. `time` is perf_counter() at the callback.
+AudioSnapshot = namedtuple("AudioSnapshot", "talking level seq time input_latency")
+
+
+class AudioFrontEnd:
+    """
+    Turns microphone blocks into a smoothed level and a talking flag.
+    process() runs on the PortAudio callback thread and publishes a new
+    AudioSnapshot by plain attribute assignment, so the render loop can read
+    `snapshot` (or call observe()) without taking a lock.
+    """
+
+    def __init__(self, samplerate=SAMPLE_RATE, blocksize=BLOCK_SIZE,
+                 on_threshold=TALK_ON_THRESHOLD, off_threshold=TALK_OFF_THRESHOLD,
+                 attack_ms=ATTACK_MS, release_ms=RELEASE_MS, latency_window=240):
+        if off_threshold > on_threshold:
+            raise ValueError("off_threshold must not be above on_threshold")
+        self.samplerate = samplerate
+        self.blocksize = blocksize
+        self.on_threshold = on_threshold
+        self.off_threshold = off_threshold
+        self.attack_ms = attack_ms
+        self.release_ms = release_ms
+
+        self._work = np.zeros(max(blocksize, 1), dtype=np.float32) # Reused every callback
+        self._level = 0.0
+        self._talking = False
+        self._seq = 0
+        self.snapshot = AudioSnapshot(False, 0.0, 0, time.perf_counter(), 0.0)
+
+        self._last_seen_seq = 0
+        self._latencies = deque(maxlen=latency_window) # Callback-to-frame latency, seconds
+
+    def process(self, indata, time_info=None):
+        """Call from the sounddevice callback with an int16 (frames, channels) block."""
+        frames = len(indata)
+        if frames > len(self._work):
+            self._work = np.zeros(frames, dtype=np.float32)
+        work = self._work[:frames]
+
+        # Convert to float before squaring: int16 squares overflow
+        np.copyto(work, indata[:, 0] if indata.ndim > 1 else indata, casting="unsafe")
+        level = math.sqrt(float(np.dot(work, work)) / frames) if frames else 0.0
+
+        attack, release = smoothing_coefficients(frames, self.samplerate, self.attack_ms, self.release_ms)
+        coeff = attack if level > self._level else release
+        self._level += coeff * (level - self._level)
+
+        if self._talking:
+            self._talking = self._level >= self.off_threshold
+        else:
+            self._talking = self._level > self.on_threshold
+
+        input_latency = 0.0
+        if time_info is not None:
+            try:
+                input_latency = max(0.0, time_info.currentTime - time_info.inputBufferAdcTime)
+            except AttributeError:
+                pass
+
+        self._seq += 1
+        self.snapshot = AudioSnapshot(self._talking, self._level, self._seq, time.perf_counter(), input_latency)
+
+    def observe(self):
+        """Render-loop side: returns the latest snapshot and records how old it is."""
+        snap = self.snapshot
+        if snap.seq != self._last_seen_seq:
+            self._last_seen_seq = snap.seq
+            self._latencies.append(time.perf_counter() - snap.time + snap.input_latency)
+        return snap
+
+    def latency_stats(self):
+        """Callback-to-frame latency in milliseconds (including the driver's input latency)."""
+        if not self._latencies:
+            return {"samples": 0, "mean_ms": 0.0, "p50_ms": 0.0, "p99_ms": 0.0}
+        values = np.array(self._latencies) * 1000.0
+        return {
+            "samples": len(values),
+            "mean_ms": float(values.mean()),
+            "p50_ms": float(np.percentile(values, 50)),
+            "p99_ms": float(np.percentile(values, 99)),
+        }
+
+
+@lru_cache(maxsize=64)
+def smoothing_coefficients(frames, samplerate, attack_ms, release_ms):
+    """(attack, release) one-pole smoothing coefficients for a block of `frames` samples, computed once per block length."""
+    block_ms = 1000.0 * frames / samplerate
+    return (1.0 - math.exp(-block_ms / max(attack_ms, 1e-3)),
+            1.0 - math.exp(-block_ms / max(release_ms, 1e-3)))
@@ -0,0 +1,188 @@
+# audio_sources.py
+
+import os
+import time
+import wave
+import numpy as np
+
+SAMPLE_RATE = 16000
+BLOCK_SIZE = 256
+RAW_EXTENSIONS = (".raw", ".pcm") # Headerless 16-bit little-endian mono at SAMPLE_RATE
+TAIL_SILENCE = 1.0 # Seconds of silence after a file so speech gates close and the recognizer flushes
+MAX_BACKLOG = 0.5 # Seconds of audio queued for the recognizer before an as-fast-as-possible file waits
+
+
+class AudioSource:
+    """
+    Base class for audio sources. run(callback, keep_running) calls
+    callback(indata, frames, time_info, status) for every int16 (frames, 1)
+    block, like a sounddevice input stream, until keep_running() is False or
+    the source ends. position() is the audio time delivered so far.
+    """
+
+    name = "audio"
+
+    def __init__(self, samplerate=SAMPLE_RATE, blocksize=BLOCK_SIZE):
+        self.samplerate = samplerate
+        self.blocksize = blocksize
+        self.finished = False
+        self._samples = 0
+        self._padding = 0 # Samples delivered that aren't input audio (a file's trailing silence)
+        self._started = None
+        self._stopped = None
+
+    def run(self, callback, keep_running):
+        raise NotImplementedError
+
+    def position(self):
+        """Seconds of audio delivered to the callback so far."""
+        return self._samples / self.samplerate
+
+    def stats(self):
+        """Audio delivered, wall time taken and their ratio (1.0 = real time)."""
+        if self._started is None:
+            return {"source": self.name, "audio_seconds": 0.0, "wall_seconds": 0.0, "speed": 0.0}
+        wall = (self._stopped or time.perf_counter()) - self._started
+        audio = (self._samples - self._padding) / self.samplerate
+        return {"source": self.name, "audio_seconds": audio, "wall_seconds": wall,
+                "speed": audio / wall if wall > 0 else 0.0}
+
+    def _deliver(self, callback, block, frames, time_info=None):
+        if self._started is None:
+            self._started = time.perf_counter()
+        callback(block, frames, time_info, None)
+        self._samples += frames
+
+
+class MicSource(AudioSource):
+    """The default input device through sounddevice."""
+
+    name = "microphone"
+
+    def __init__(self, samplerate=SAMPLE_RATE, blocksize=BLOCK_SIZE, latency="low"):
+        super().__init__(samplerate, blocksize)
+        self.latency = latency
+
+    def run(self, callback, keep_running):
+        import sounddevice as sd
+
+        def on_block(indata, frames, time_info, status):
+            self._deliver(callback, indata, frames, time_info)
+
+        # Context manager ensures the stream is closed automatically
+        with sd.InputStream(samplerate=self.samplerate, blocksize=self.blocksize, latency=self.latency,
+                            dtype='int16', channels=1, callback=on_block) as stream:
+            print(f"Microphone stream started (block {self.blocksize}, latency {stream.latency * 1000:.1f} ms).")
+            while keep_running():
+                time.sleep(0.1)
+        self._stopped = time.perf_counter()
+        self.finished = True
+
+
+class FileSource(AudioSource):
+    """
+    Plays a WAV file (mono or the first channel, 16-bit, at `samplerate`) or
+    headerless 16-bit PCM through the same callback as the microphone.
+    speed=1.0 keeps real time, 2.0 plays twice as fast, 0 runs as fast as
+    the consumer keeps up: while backlog() (samples queued downstream, e.g.
+    for the recognizer) is above max_backlog seconds the source waits, so
+    nothing is dropped from the ring.
+    """
+
+    def __init__(self, path, samplerate=SAMPLE_RATE, blocksize=BLOCK_SIZE, speed=1.0, loop=False,
+                 backlog=None, max_backlog=MAX_BACKLOG, tail_silence=TAIL_SILENCE):
+        super().__init__(samplerate, blocksize)
+        self.path = path
+        self.speed = speed
+        self.loop = loop
+        self.backlog = backlog # Callable returning queued samples, or None
+        self.max_backlog = max_backlog
+        self.tail_silence = tail_silence
+        self.name = f"file:{os.path.basename(path)}"
+        self._block = np.zeros((blocksize, 1), dtype=np.int16) # Reused for every block
+
+    def run(self, callback, keep_running):
+        reader = self._open()
+        self._samples = self._padding = 0 # Each run plays the file from the start
+        self._started = self._stopped = None
+        self.finished = False
+        try:
+            print(f"Playing audio file '{self.path}' ({'as fast as possible' if self.speed <= 0 else f'{self.speed:g}x'}).")
+            while keep_running():
+                frames = reader()
+                if frames == 0:
+                    if not self.loop:
+                        break
+                    reader = self._open()
+                    continue
+                self._send(callback, frames)
+
+            self._stopped = time.perf_counter()
+            # Trailing silence ends the last speech segment (nothing else would flush it)
+            self._block[:] = 0
+            for _ in range(int(self.tail_silence * self.samplerate) // self.blocksize):
+                if not keep_running():
+                    break
+                self._send(callback, self.blocksize, tail=True)
+        finally:
+            self._stopped = self._stopped or time.perf_counter()
+            self.finished = True
+        stats = self.stats()
+        print(f"Audio file done: {stats['audio_seconds']:.1f} s of audio in {stats['wall_seconds']:.1f} s "
+              f"({stats['speed']:.1f}x real time).")
+
+    def _send(self, callback, frames, tail=False):
+        if self._started is None:
+            self._started = time.perf_counter()
+        if self.speed > 0:
+            # Deadline from the start, so sleep overshoot doesn't add up
+            due = self._started + self._samples / self.samplerate / self.speed
+            delay = due - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+        else:
+            while self.backlog is not None and self.backlog() > self.max_backlog * self.samplerate:
+                time.sleep(0.001)
+            time.sleep(0) # Let the render and recognizer threads have the GIL between blocks
+        if tail:
+            self._padding += frames # Still advances position() so timestamps stay in step with the gate
+        self._deliver(callback, self._block, frames)
+
+    def _open(self):
+        """Returns a function that reads the next block into self._block and returns its frame count."""
+        block = self._block[:, 0]
+        if os.path.splitext(self.path)[1].lower() in RAW_EXTENSIONS:
+            f = open(self.path, "rb")
+            def read_raw():
+                data = f.read(self.blocksize * 2)
+                frames = len(data) // 2
+                block[:frames] = np.frombuffer(data[:frames * 2], dtype="<i2")
+                block[frames:] = 0
+                if frames == 0:
+                    f.close()
+                return frames
+            return read_raw
+
+        wav = wave.open(self.path, "rb")
+        width, rate = wav.getsampwidth(), wav.getframerate()
+        if width != 2 or rate != self.samplerate:
+            wav.close()
+            raise ValueError(f"'{self.path}' is {width * 8}-bit {rate} Hz; "
+                             f"convert it with: ffmpeg -i in.wav -ac 1 -ar {self.samplerate} -sample_fmt s16 out.wav")
+        channels = wav.getnchannels()
+        def read_wav():
+            data = wav.readframes(self.blocksize)
+            frames = len(data) // (2 * channels)
+            block[:frames] = np.frombuffer(data, dtype="<i2")[:frames * channels:channels]
+            block[frames:] = 0
+            if frames == 0:
+                wav.close()
+            return frames
+        return read_wav
+
+
+def open_audio_source(target, samplerate=SAMPLE_RATE, blocksize=BLOCK_SIZE, latency="low", speed=1.0, loop=False):
+    """None gives the microphone, anything else is a WAV or raw PCM file path."""
+    if target is None:
+        return MicSource(samplerate, blocksize, latency)
+    return FileSource(target, samplerate, blocksize, speed=speed, loop=loop)
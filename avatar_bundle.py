@@ -0,0 +1,192 @@
+# avatar_bundle.py
+#
+# Precompiled model bundles: every pose of a model, already scaled and stored
+# as raw pixels in the display's byte order, in one file. Loading a bundle
+# memory-maps it and wraps the pixels as surfaces, with no PNG decoding,
+# convert_alpha() or scaling. ModelLibrary falls back to the PNGs when a
+# bundle is missing, from another version, built for a different scale, or
+# older than its PNGs.
+#
+# Build bundles for every model (re-run after changing images or IMAGE_SCALE):
+#   python avatar_bundle.py nyamii/models --scale 0.8
+
+import argparse
+import json
+import mmap
+import os
+import struct
+import sys
+import pygame
+from frame_output import pixel_format as surface_pixel_format # Named apart from compile_bundle()'s argument
+
+BUNDLE_EXT = ".nyb"
+BUNDLE_VERSION = 1
+_MAGIC = b"NYBUNDLE"
+_PREFIX = struct.Struct("<8sII") # magic, version, metadata length
+_ALIGN = 64
+_FORMATS = ("BGRA", "RGBA", "ARGB")
+
+
+class BundleError(Exception):
+    """A bundle file can't be used (wrong magic/version, truncated or mismatched)."""
+
+
+def bundle_path(models_dir, name):
+    return os.path.join(models_dir, name, name + BUNDLE_EXT)
+
+
+def pose_files(models_dir, name):
+    """{pose: png path} for a model folder: <name>.png is "idle", <name><Pose>.png is "<pose>"."""
+    folder = os.path.join(models_dir, name)
+    poses = {}
+    for entry in sorted(os.listdir(folder)):
+        stem, ext = os.path.splitext(entry)
+        if ext.lower() != ".png" or not stem.startswith(name):
+            continue
+        pose = stem[len(name):].lower() or "idle"
+        poses[pose] = os.path.join(folder, entry)
+    return poses
+
+
+def native_format():
+    """Byte order pygame's display uses for alpha surfaces (what convert_alpha() produces)."""
+    if pygame.display.get_surface() is None:
+        return "BGRA" if sys.byteorder == "little" else "ARGB"
+    fmt = surface_pixel_format(pygame.Surface((1, 1), pygame.SRCALPHA).convert_alpha()).upper()
+    return fmt if fmt in _FORMATS else "BGRA"
+
+
+def compile_bundle(models_dir, name, scale, pixel_format=None):
+    """Scales every pose of a model and writes <models_dir>/<name>/<name>.nyb. Returns the path."""
+    pixel_format = pixel_format or native_format()
+    sources = pose_files(models_dir, name)
+    if "idle" not in sources:
+        raise BundleError(f"No '{name}.png' in {os.path.join(models_dir, name)}")
+
+    poses = []
+    blobs = []
+    offset = 0
+    for pose, path in sources.items():
+        img = pygame.image.load(path)
+        if pygame.display.get_surface() is not None:
+            img = img.convert_alpha()
+        # Same scaling as the PNG path so both look identical; tobytes() handles any source format
+        img = pygame.transform.scale(img, (int(img.get_width() * scale), int(img.get_height() * scale)))
+        data = pygame.image.tobytes(img, pixel_format)
+        stat = os.stat(path)
+        poses.append({"pose": pose, "width": img.get_width(), "height": img.get_height(),
+                      "offset": offset, "size": len(data),
+                      "source": os.path.basename(path), "source_size": stat.st_size, "source_mtime": stat.st_mtime})
+        blobs.append(data)
+        offset += _aligned(len(data))
+
+    metadata = json.dumps({"name": name, "scale": scale, "format": pixel_format, "poses": poses}).encode("utf-8")
+    data_start = _aligned(_PREFIX.size + len(metadata))
+    path = bundle_path(models_dir, name)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(_PREFIX.pack(_MAGIC, BUNDLE_VERSION, len(metadata)))
+        f.write(metadata)
+        f.write(b"\0" * (data_start - f.tell()))
+        for data in blobs:
+            f.write(data)
+            f.write(b"\0" * (_aligned(len(data)) - len(data)))
+    os.replace(tmp_path, path) # A running app never sees half a bundle
+    return path
+
+
+def load_bundle(path, scale, check_sources=True):
+    """
+    Memory-maps a bundle and returns {pose: Surface} wrapping its pixels.
+    Raises FileNotFoundError if there's no bundle, BundleError if it can't be used.
+    """
+    with open(path, "rb") as f:
+        # Copy-on-write mapping: surfaces can't write through to the file
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+    try:
+        if len(mapped) < _PREFIX.size:
+            raise BundleError("truncated header")
+        magic, version, metadata_len = _PREFIX.unpack_from(mapped, 0)
+        if magic != _MAGIC:
+            raise BundleError("not a model bundle")
+        if version != BUNDLE_VERSION:
+            raise BundleError(f"bundle version {version}, expected {BUNDLE_VERSION}")
+        try:
+            metadata = json.loads(bytes(mapped[_PREFIX.size:_PREFIX.size + metadata_len]))
+        except ValueError as e:
+            raise BundleError(f"bad metadata: {e}")
+        if abs(metadata["scale"] - scale) > 1e-6:
+            raise BundleError(f"built for scale {metadata['scale']}, need {scale}")
+        if metadata["format"] not in _FORMATS:
+            raise BundleError(f"unknown pixel format {metadata['format']}")
+        if check_sources:
+            _check_sources(os.path.dirname(path), metadata["poses"])
+
+        data_start = _aligned(_PREFIX.size + metadata_len)
+        names = {pose["pose"] for pose in metadata["poses"]}
+        if "idle" not in names or "talking" not in names:
+            raise BundleError("bundle is missing the idle or talking pose")
+        for pose in metadata["poses"]:
+            end = data_start + pose["offset"] + pose["size"]
+            if pose["size"] != pose["width"] * pose["height"] * 4 or end > len(mapped):
+                raise BundleError(f"truncated pixel data for pose '{pose['pose']}'")
+    except (KeyError, TypeError) as e:
+        mapped.close()
+        raise BundleError(f"bad metadata: {e!r}")
+    except BaseException:
+        mapped.close()
+        raise
+
+    view = memoryview(mapped)
+    images = {}
+    for pose in metadata["poses"]:
+        start = data_start + pose["offset"]
+        # Wraps the mapped pixels without copying; the surfaces keep the mapping alive
+        images[pose["pose"]] = pygame.image.frombuffer(view[start:start + pose["size"]],
+                                                       (pose["width"], pose["height"]), metadata["format"])
+    return images
+
+
+def _check_sources(folder, poses):
+    """Raises BundleError if a pose's PNG changed since the bundle was built."""
+    for pose in poses:
+        source = os.path.join(folder, pose["source"])
+        try:
+            stat = os.stat(source)
+        except FileNotFoundError:
+            continue # Shipping only the bundle is fine
+        if stat.st_size != pose["source_size"] or stat.st_mtime > pose["source_mtime"] + 1e-3:
+            raise BundleError(f"'{pose['source']}' changed since the bundle was built")
+
+
+def _aligned(n):
+    return (n + _ALIGN - 1) // _ALIGN * _ALIGN
+
+
+def _main():
+    parser = argparse.ArgumentParser(description="Compile model folders into memory-mappable bundles")
+    parser.add_argument("models_dir", help="Folder containing one subfolder per model")
+    parser.add_argument("--scale", type=float, default=0.8, help="Must match IMAGE_SCALE in main.py")
+    parser.add_argument("--model", action="append", help="Only build these models (default: all)")
+    args = parser.parse_args()
+
+    pygame.init()
+    try:
+        pygame.display.set_mode((1, 1), pygame.HIDDEN) # To learn the display's pixel format
+    except pygame.error:
+        pass # Headless: fall back to the usual 32-bit layout
+
+    names = args.model or sorted(entry for entry in os.listdir(args.models_dir)
+                                 if os.path.isfile(os.path.join(args.models_dir, entry, f"{entry}.png")))
+    for name in names:
+        try:
+            path = compile_bundle(args.models_dir, name, args.scale)
+        except (BundleError, pygame.error, OSError) as e:
+            print(f"Skipped '{name}': {e}")
+            continue
+        print(f"Built {path} ({os.path.getsize(path) / 1024 / 1024:.1f} MB)")
+    pygame.quit()
+
+
+if __name__ == "__main__":
+    _main()
@@ -0,0 +1,119 @@
+# benchmarks/chat_load.py
+#
+# Offline chat load test: pushes synthetic or recorded chat through the real
+# yt_connect keyword matching and event bus, drains it like the render loop
+# does, and reports throughput, end-to-end event latency and memory use.
+#
+# Usage:
+#   python benchmarks/chat_load.py --profile raid --rate 50 --burst-rate 5000 --duration 10
+#   python benchmarks/chat_load.py --replay chat_log.jsonl --speed 10
+#   python benchmarks/chat_load.py --profile steady --rate 2000 --no-limits --out results.json
+
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import yt_connect
+from chat_sources import ChatIngestor, ReplaySource, SyntheticSource
+from event_bus import ChatEventBus
+
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Chat throughput / latency harness")
+    parser.add_argument("--profile", choices=["steady", "bursty", "raid"], default="raid")
+    parser.add_argument("--rate", type=float, default=50.0, help="Base messages per second")
+    parser.add_argument("--burst-rate", type=float, default=5000.0, help="Messages per second during bursts/raids")
+    parser.add_argument("--burst-period", type=float, default=2.0)
+    parser.add_argument("--raid-at", type=float, default=3.0)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--keyword-share", type=float, default=0.2)
+    parser.add_argument("--replay", help="JSONL chat log to replay instead of synthetic chat")
+    parser.add_argument("--speed", type=float, default=1.0, help="Replay speed (0 = as fast as possible)")
+    parser.add_argument("--poll-interval", type=float, default=0.05, help="Fastest source polling interval")
+    parser.add_argument("--fps", type=float, default=60.0, help="How often events are drained")
+    parser.add_argument("--no-limits", action="store_true", help="Disable coalescing and rate limits")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--out", help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    if args.no_limits:
+        yt_connect.event_bus = ChatEventBus(coalesce_window=0, keyword_rate=None, author_rate=None)
+    else:
+        yt_connect.event_bus = ChatEventBus()
+
+    # Count every message that makes it through keyword matching
+    processed = 0
+    process_lock = threading.Lock()
+    def handle(message):
+        nonlocal processed
+        yt_connect.handle_chat_message(message)
+        with process_lock:
+            processed += 1
+
+    if args.replay:
+        source = ReplaySource(args.replay, speed=args.speed)
+    else:
+        source = SyntheticSource(list(yt_connect.KEYWORDS), args.profile, args.rate, args.burst_rate,
+                                 args.burst_period, args.raid_at, args.duration, args.keyword_share,
+                                 seed=args.seed)
+
+    tracemalloc.start()
+    ingestor = ChatIngestor(handle, min_interval=args.poll_interval, max_interval=max(args.poll_interval, 0.5))
+    start = time.perf_counter()
+    ingestor.add_source(source)
+
+    latencies = []
+    events = 0
+    frame = 1.0 / args.fps
+    time.sleep(0.2) # Let the source start
+    while True:
+        now = time.monotonic()
+        for event in yt_connect.check_keywords():
+            events += 1
+            latencies.append(now - event.time)
+        if not source.is_alive() and ingestor.backlog() == 0:
+            break
+        time.sleep(frame)
+    for event in yt_connect.check_keywords():
+        events += 1
+        latencies.append(time.monotonic() - event.time)
+    wall = time.perf_counter() - start
+    _, peak_memory = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    ingestor.stop()
+
+    results = {
+        "benchmark": "chat_load",
+        "source": source.name,
+        "wall_seconds": wall,
+        "messages": processed,
+        "messages_per_s": processed / wall if wall else 0.0,
+        "events_delivered": events,
+        "event_latency_p50_ms": percentile(latencies, 0.5) * 1000.0,
+        "event_latency_p99_ms": percentile(latencies, 0.99) * 1000.0,
+        "event_latency_max_ms": max(latencies, default=0.0) * 1000.0,
+        "peak_traced_memory_kb": peak_memory / 1024.0,
+        "bus": yt_connect.event_bus.stats(),
+    }
+    output = json.dumps(results, indent=2)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(output)
+    print(output)
+
+
+if __name__ == "__main__":
+    main()
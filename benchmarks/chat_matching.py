@@ -0,0 +1,95 @@
+# benchmarks/chat_matching.py
+#
+# Compares the compiled KeywordMatcher with the old per-keyword substring loop.
+#
+# Usage:
+#   python benchmarks/chat_matching.py [--messages 20000] [--out results.json]
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from chat_matcher import KeywordMatcher
+
+WORDS = ["hello", "lol", "pog", "nice", "stream", "the", "is", "so", "cute", "omg", "gg", "cooler",
+         "humane", "chat", "hype", "love", "this", "wow", "kappa", "bald", "neko", "cheese"]
+
+
+def make_table(size, rng):
+    table = {"bald": "", "neko": "", "evil": "", "human": "", "eyes": "", "bonk": "", "cheese": "", "cool": ""}
+    while len(table) < size:
+        length = rng.randint(4, 10)
+        table["".join(rng.choice("abcdefghijklmnopqrstuvwxyz") for _ in range(length))] = ""
+    return table
+
+
+def make_messages(count, rng):
+    return [" ".join(rng.choice(WORDS) for _ in range(rng.randint(2, 14))) for _ in range(count)]
+
+
+def substring_loop(messages, table):
+    hits = 0
+    for message in messages:
+        message = message.lower()
+        for keyword in table:
+            if keyword in message:
+                hits += 1
+    return hits
+
+
+def compiled(messages, matcher):
+    hits = 0
+    for message in messages:
+        hits += len(matcher.find(message))
+    return hits
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    hits = func(*args)
+    return time.perf_counter() - start, hits
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Chat keyword matching benchmark")
+    parser.add_argument("--messages", type=int, default=20000)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--out", help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    messages = make_messages(args.messages, rng)
+    results = []
+    for size in (8, 100, 500):
+        table = make_table(size, rng)
+        build_start = time.perf_counter()
+        matcher = KeywordMatcher(table)
+        build = time.perf_counter() - build_start
+        loop_time, loop_hits = timed(substring_loop, messages, table)
+        matcher_time, matcher_hits = timed(compiled, messages, matcher)
+        results.append({
+            "keywords": size,
+            "messages": len(messages),
+            "substring_msgs_per_s": len(messages) / loop_time,
+            "matcher_msgs_per_s": len(messages) / matcher_time,
+            "speedup": loop_time / matcher_time,
+            "matcher_build_ms": build * 1000.0,
+            # The loop also counts in-word hits ("cool" in "cooler"), so these differ on purpose
+            "substring_hits": loop_hits,
+            "matcher_hits": matcher_hits,
+        })
+
+    output = json.dumps({"benchmark": "chat_matching", "results": results}, indent=2)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(output)
+    print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+# benchmarks/keyword_spotting.py
+#
+# Compares the grammar-restricted keyword recognizer against the open-vocabulary one.
+#
+# Usage:
+#   python benchmarks/keyword_spotting.py <vosk-model-dir> <clips-dir> [--out results.json]
+#
+# <clips-dir> holds 16 kHz mono 16-bit WAV files plus a labels.json mapping each
+# file name to the keywords actually spoken in it, e.g. {"clip1.wav": ["cute"], "clip2.wav": []}.
+
+import argparse
+import json
+import os
+import sys
+import time
+import wave
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from vosk import Model, SetLogLevel
+from keyword_spotter import load_voice_keywords, make_recognizer, match_keywords
+
+CHUNK_SAMPLES = 4000
+
+
+def run_clip(vosk_model, keywords, path, use_grammar):
+    with wave.open(path, "rb") as wav:
+        if wav.getnchannels() != 1 or wav.getsampwidth() != 2:
+            raise ValueError(f"{path}: expected mono 16-bit audio")
+        samplerate = wav.getframerate()
+        frames = wav.readframes(wav.getnframes())
+    recognizer = make_recognizer(vosk_model, samplerate, keywords, use_grammar)
+
+    found = set()
+    start = time.process_time()
+    step = CHUNK_SAMPLES * 2
+    for offset in range(0, len(frames), step):
+        if recognizer.AcceptWaveform(frames[offset:offset + step]):
+            found.update(match_keywords(json.loads(recognizer.Result()).get("text", ""), keywords))
+    found.update(match_keywords(json.loads(recognizer.FinalResult()).get("text", ""), keywords))
+    cpu = time.process_time() - start
+    return found, cpu, len(frames) / 2 / samplerate
+
+
+def run_mode(vosk_model, keywords, clips_dir, labels, use_grammar):
+    cpu_total = audio_total = 0.0
+    true_pos = false_pos = false_neg = 0
+    for name, expected in sorted(labels.items()):
+        found, cpu, seconds = run_clip(vosk_model, keywords, os.path.join(clips_dir, name), use_grammar)
+        expected = set(keyword.lower() for keyword in expected)
+        cpu_total += cpu
+        audio_total += seconds
+        true_pos += len(found & expected)
+        false_pos += len(found - expected)
+        false_neg += len(expected - found)
+    return {
+        "mode": "grammar" if use_grammar else "open_vocabulary",
+        "clips": len(labels),
+        "audio_seconds": audio_total,
+        "cpu_seconds": cpu_total,
+        "cpu_per_audio_second": cpu_total / audio_total if audio_total else 0.0,
+        "precision": true_pos / (true_pos + false_pos) if true_pos + false_pos else 1.0,
+        "recall": true_pos / (true_pos + false_neg) if true_pos + false_neg else 1.0,
+        "false_positives": false_pos,
+        "missed": false_neg,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Grammar vs open-vocabulary keyword spotting benchmark")
+    parser.add_argument("model_dir")
+    parser.add_argument("clips_dir")
+    parser.add_argument("--keywords", default=os.path.join(os.path.dirname(__file__), "..", "keywords.json"))
+    parser.add_argument("--out", help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    SetLogLevel(-1)
+    with open(os.path.join(args.clips_dir, "labels.json"), encoding="utf-8") as f:
+        labels = json.load(f)
+    keywords = load_voice_keywords(args.keywords)
+    vosk_model = Model(args.model_dir)
+
+    results = [run_mode(vosk_model, keywords, args.clips_dir, labels, use_grammar)
+               for use_grammar in (False, True)]
+    output = json.dumps({"benchmark": "keyword_spotting", "keywords": keywords, "results": results}, indent=2)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(output)
+    print(output)
+
+
+if __name__ == "__main__":
+    main()
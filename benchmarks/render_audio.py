@@ -0,0 +1,354 @@
+# benchmarks/render_audio.py
+#
+# Headless benchmarks for the render and audio paths, using SDL's dummy video
+# driver, synthetic images and synthetic audio. Frames, model swaps, keyword
+# effects and the mic callback run main.py's own functions (imported without
+# starting the game loop). Prints JSON; pass --compare with an earlier result
+# file to flag regressions.
+#
+# Usage:
+#   python benchmarks/render_audio.py --out bench.json
+#   python benchmarks/render_audio.py --compare bench.json --tolerance 0.15
+
+import os
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1") # Keep stdout pure JSON
+
+import argparse
+import contextlib
+import json
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import numpy as np
+import pygame
+
+from avatar_bundle import compile_bundle
+from audio_frontend import AudioFrontEnd
+from glow import GlowRenderer
+from model_library import ModelLibrary
+from particles import ParticleSystem, make_burst
+from scene import SceneCompositor, Scene, Prop, DEFAULT_SCENE
+
+WINDOW_SIZE = (800, 800)
+GREEN_SCREEN = (0, 255, 0)
+PINK = (255, 182, 193)
+CHARACTER_SIZE = (480, 600) # Roughly a model after IMAGE_SCALE
+
+
+def synthetic_image(size, color, seed=0):
+    """An SRCALPHA image with a filled ellipse and some noise, so scaling isn't trivially cheap."""
+    rng = np.random.default_rng(seed)
+    surface = pygame.Surface(size, pygame.SRCALPHA)
+    surface.fill((0, 0, 0, 0))
+    pygame.draw.ellipse(surface, color, surface.get_rect())
+    pixels = pygame.surfarray.pixels3d(surface)
+    pixels[:] = np.clip(pixels.astype(np.int16) + rng.integers(-20, 20, pixels.shape), 0, 255).astype(np.uint8)
+    del pixels
+    return surface.convert_alpha()
+
+
+def time_loop(func, min_time=1.0, min_iterations=20):
+    """Runs func repeatedly for at least min_time seconds; returns seconds per call."""
+    func() # Warm up
+    iterations = 0
+    start = time.perf_counter()
+    while True:
+        func()
+        iterations += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time and iterations >= min_iterations:
+            return elapsed / iterations
+
+
+def load_app():
+    """
+    Imports main.py for its real draw functions: its __main__ guard keeps the
+    game loop from starting, while the window, caches and renderers are set
+    up as in the app. Needs the app's dependencies (vosk) installed.
+    """
+    with contextlib.redirect_stdout(sys.stderr): # Startup log; stdout is the JSON result
+        import main as app
+        app.load_particle_assets()
+    return app
+
+
+def bench_frames(app, character, particle_count, min_time):
+    """
+    Frames/s of the app's own GAME frame: draw_game_screen() (clear, glow,
+    character, particles, scene overlay) and present_frame(), with the
+    app's settings, a steady particle count and the glow kept on.
+    """
+    app.game_state = app.GAME
+    app.current_model_images = {"idle": character, "talking": character}
+    app.glow_renderer.prepare([character.get_size()])
+    app.scene_compositor.set_scene(DEFAULT_SCENE)
+    app.dirty_renderer.set_static(app.scene_compositor.static_layer())
+    app.dirty_renderer.invalidate()
+    app.particles = ParticleSystem(capacity=max(particle_count, 1), bottom=app.WINDOW_HEIGHT)
+
+    rng = np.random.default_rng(1)
+    def refill():
+        missing = particle_count - len(app.particles)
+        if missing > 0:
+            app.particles.emit(make_burst(rng, missing, (400, 400), 150, int(rng.integers(0, 2)),
+                                          speed_x=(-1.0, 1.0), speed_y=(0.5, 2.5), timer=(100, 180), scale=(0.5, 1.3)))
+    refill()
+
+    frame = [0]
+    def draw_frame():
+        frame[0] += 1
+        app.profiler.begin_frame()
+        refill()
+        app.glow_timer = app.GLOW_DURATION // 2
+        app.simulate(1)
+        app.draw_game_screen(frame[0] / 60.0)
+        app.present_frame()
+
+    per_frame = time_loop(draw_frame, min_time)
+    return {"particles": particle_count, "ms_per_frame": per_frame * 1000.0, "fps": 1.0 / per_frame}
+
+
+def bench_glow(window, character, min_time):
+    """Cached glow vs building an SRCALPHA ellipse surface every frame (the old way)."""
+    glow = GlowRenderer(PINK)
+    glow.prepare([character.get_size()])
+    cached = time_loop(lambda: glow.draw(window, (400, 400), character.get_size(), 0.5), min_time)
+
+    def per_frame_surface():
+        size = (character.get_width() + 80, character.get_height() + 80)
+        surface = pygame.Surface(size, pygame.SRCALPHA)
+        pygame.draw.ellipse(surface, (*PINK, 75), surface.get_rect())
+        window.blit(surface, (400 - size[0] // 2, 400 - size[1] // 2))
+    uncached = time_loop(per_frame_surface, min_time)
+    return {"cached_ms": cached * 1000.0, "per_frame_alloc_ms": uncached * 1000.0}
+
+
+def bench_scene(window, character, min_time, prop_count=12):
+    """
+    One frame of a scene with a background and prop_count props: blitting
+    every layer each frame vs the compositor's cached static layer, pose
+    composite and front overlay (redrawn only in the repainted rect).
+    """
+    folder = tempfile.mkdtemp(prefix="nyamii_bench_")
+    try:
+        background = os.path.join(folder, "background.png")
+        pygame.image.save(synthetic_image(WINDOW_SIZE, (90, 60, 120, 255), 5), background)
+        props = []
+        for i in range(prop_count):
+            path = os.path.join(folder, f"prop{i}.png")
+            pygame.image.save(synthetic_image((160, 160), (255, 120 + i * 10, 160, 255), 10 + i), path)
+            attached = i % 2 == 0
+            layer = "back" if i % 3 == 0 else "front"
+            position = ((i % 3 - 1) * 150, (i // 3 - 1) * 150) if attached else (80 + i * 55, 100 + (i % 3) * 300)
+            props.append(Prop(path, position, layer, attached, 1.0))
+        scene = Scene("bench", background, None, tuple(props))
+
+        compositor = SceneCompositor(window, GREEN_SCREEN)
+        compositor.set_scene(scene)
+        images = {prop.image: compositor._image(prop.image, prop.scale) for prop in props}
+        backdrop = compositor._image(background, 1.0)
+        center = (WINDOW_SIZE[0] // 2, WINDOW_SIZE[1] // 2)
+        char_rect = character.get_rect(center=center)
+
+        def naive():
+            window.blit(backdrop, (0, 0))
+            for layer in ("back", "front"):
+                for prop in props:
+                    if prop.layer == layer and prop.attached:
+                        window.blit(images[prop.image], images[prop.image].get_rect(
+                            center=(center[0] + prop.position[0], center[1] + prop.position[1])))
+                    elif prop.layer == layer:
+                        window.blit(images[prop.image], images[prop.image].get_rect(center=prop.position))
+                if layer == "back":
+                    window.blit(character, char_rect)
+
+        def composited():
+            surface, offset = compositor.character(character)
+            rect = surface.get_rect(topleft=(char_rect.x + offset[0], char_rect.y + offset[1]))
+            window.blit(compositor.static_layer(), rect, rect)
+            window.blit(surface, rect)
+            compositor.draw_overlay(window, [rect])
+
+        naive_time = time_loop(naive, min_time)
+        composited_time = time_loop(composited, min_time)
+        return {"props": prop_count, "per_layer_blits_ms": naive_time * 1000.0,
+                "composited_ms": composited_time * 1000.0, "composites_built": compositor.builds}
+    finally:
+        shutil.rmtree(folder, ignore_errors=True)
+
+
+def bench_model_swap(app, min_time):
+    """
+    Model swaps through the app: load_model() cold from PNGs and cold from a
+    bundle, and request_model_swap() + poll_model_swap() between two cached
+    models (the hotkey path, including the glow and prop preparation).
+    """
+    saved = (app.model_library, app.current_model_images, getattr(app, "current_model_name", None), app.crossfade)
+    folder = tempfile.mkdtemp(prefix="nyamii_bench_")
+    try:
+        for name in ("alpha", "beta"):
+            os.makedirs(os.path.join(folder, name))
+            for suffix, seed in (("", 1), ("Talking", 2)):
+                image = synthetic_image((600, 750), (200, 120, 220, 255), seed)
+                pygame.image.save(image, os.path.join(folder, name, f"{name}{suffix}.png"))
+
+        def load_fresh(use_bundles):
+            app.model_library = ModelLibrary(folder, app.IMAGE_SCALE, use_bundles=use_bundles)
+            app.load_model("alpha")
+
+        with contextlib.redirect_stdout(sys.stderr): # "Loaded model" log lines
+            cold_time = time_loop(lambda: load_fresh(False), min_time, min_iterations=5)
+            compile_bundle(folder, "alpha", app.IMAGE_SCALE)
+            bundle_time = time_loop(lambda: load_fresh(True), min_time)
+
+            app.model_library = ModelLibrary(folder, app.IMAGE_SCALE)
+            app.model_library.scan()
+            app.load_model("alpha")
+            app.model_library.get("beta")
+            names = ["alpha", "beta"]
+            swap = [0]
+            def cached():
+                swap[0] += 1
+                app.request_model_swap(names[swap[0] % 2])
+                while app.pending_model is not None:
+                    app.poll_model_swap()
+            cached_time = time_loop(cached, min_time)
+    finally:
+        app.model_library, app.current_model_images, app.current_model_name, app.crossfade = saved
+        shutil.rmtree(folder, ignore_errors=True)
+    return {"cold_load_ms": cold_time * 1000.0, "bundle_load_ms": bundle_time * 1000.0, "cached_swap_ms": cached_time * 1000.0}
+
+
+def bench_trigger_magic(app, min_time):
+    """
+    A keyword hit: trigger_magic() on its own (what the keyword thread pays),
+    and with the render thread's merge of the queued bursts in simulate().
+    """
+    def trigger():
+        app.trigger_magic()
+        app.particles.clear() # Drop the queued bursts so they don't pile up
+    trigger_time = time_loop(trigger, min_time)
+
+    def trigger_and_merge():
+        app.trigger_magic()
+        app.simulate(1)
+        app.particles.clear() # Start each hit from an empty system
+    merge_time = time_loop(trigger_and_merge, min_time)
+    return {"trigger_us": trigger_time * 1e6, "trigger_and_merge_us": merge_time * 1e6}
+
+
+def bench_audio(app, blocksize, min_time):
+    """
+    The app's mic callback per block (audio_callback(): level/talk detection,
+    mouth shape and speech gating into the ring), with speech recognition on.
+    """
+    rng = np.random.default_rng(2)
+    t = np.arange(blocksize * 64) / 16000.0
+    speech = (np.sin(2 * np.pi * 220 * t) * 8000 + rng.normal(0, 500, t.shape)).astype(np.int16)
+    blocks = speech.reshape(-1, blocksize, 1)
+
+    saved = (app.audio_frontend, app.speech_enabled)
+    app.audio_frontend = AudioFrontEnd(16000, blocksize, app.TALK_ON_THRESHOLD, app.TALK_OFF_THRESHOLD)
+    app.speech_enabled = True
+    index = [0]
+    def callback():
+        index[0] += 1
+        app.audio_callback(blocks[index[0] % len(blocks)], blocksize, None, None)
+        if len(app.audio_ring) > 16000 * 5:
+            app.audio_ring.read(16000 * 5, timeout=0) # Keep the ring from saturating
+    try:
+        per_block = time_loop(callback, min_time)
+    finally:
+        app.audio_frontend, app.speech_enabled = saved
+        app.audio_ring.read(len(app.audio_ring), timeout=0)
+    budget = blocksize / 16000.0
+    return {"blocksize": blocksize, "us_per_block": per_block * 1e6, "budget_share": per_block / budget}
+
+
+def environment():
+    info = {
+        "python": platform.python_version(),
+        "pygame": pygame.version.ver,
+        "numpy": np.__version__,
+        "machine": platform.machine(),
+        "system": platform.system(),
+    }
+    try:
+        info["git_revision"] = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except OSError:
+        pass
+    return info
+
+
+def compare(results, baseline_path, tolerance):
+    """Lists metrics that got worse than the baseline by more than `tolerance` (0.15 = 15%)."""
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = json.load(f)
+    regressions = []
+    def walk(new, old, path):
+        if isinstance(new, dict) and isinstance(old, dict):
+            for key in new:
+                if key in old:
+                    walk(new[key], old[key], f"{path}.{key}" if path else key)
+        elif isinstance(new, list) and isinstance(old, list):
+            for i, (a, b) in enumerate(zip(new, old)):
+                walk(a, b, f"{path}[{i}]")
+        elif isinstance(new, (int, float)) and isinstance(old, (int, float)) and old > 0:
+            # Lower is better for times/shares, higher is better for fps
+            lower_is_better = not path.endswith("fps")
+            change = (new - old) / old if lower_is_better else (old - new) / old
+            if change > tolerance and not path.split(".")[-1] in ("particles", "blocksize", "props"):
+                regressions.append({"metric": path, "baseline": old, "current": new, "worse_by": change})
+    walk(results["results"], baseline.get("results", {}), "")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless render/audio benchmarks")
+    parser.add_argument("--min-time", type=float, default=1.0, help="Seconds per measurement")
+    parser.add_argument("--out", help="Write results as JSON to this file")
+    parser.add_argument("--compare", help="Earlier results file to check for regressions")
+    parser.add_argument("--tolerance", type=float, default=0.15)
+    args = parser.parse_args()
+
+    pygame.init()
+    app = load_app()
+    window = app.window
+    character = synthetic_image(CHARACTER_SIZE, (230, 160, 200, 255))
+
+    results = {
+        "benchmark": "render_audio",
+        "environment": environment(),
+        "results": {
+            "frames": [bench_frames(app, character, count, args.min_time) for count in (0, 1000, 10000)],
+            "glow": bench_glow(window, character, args.min_time),
+            "scene": bench_scene(window, character, args.min_time),
+            "model_swap": bench_model_swap(app, args.min_time),
+            "trigger_magic": bench_trigger_magic(app, args.min_time),
+            "audio_callback": [bench_audio(app, blocksize, args.min_time) for blocksize in (128, 256, 1024)],
+        },
+    }
+    if args.compare:
+        results["regressions"] = compare(results, args.compare, args.tolerance)
+    pygame.quit()
+
+    output = json.dumps(results, indent=2)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(output)
+    print(output)
+    if results.get("regressions"):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+# benchmarks/visemes.py
+#
+# Per-block cost of the mouth-shape analyzer (viseme.py) against the mic
+# callback's time budget (block length in seconds), on synthetic vowel-like
+# audio. Also reports memory: retained_bytes should stay near zero (no buffers
+# allocated per block); peak_alloc_bytes is NumPy's FFT scratch, freed each call.
+# Prints JSON and exits non-zero if the p99 cost goes over --max-share of the
+# budget at any block size.
+#
+# Usage:
+#   python benchmarks/visemes.py
+#   python benchmarks/visemes.py --blocksizes 64 128 256 --max-share 0.05 --out visemes.json
+
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import numpy as np
+
+from viseme import VisemeAnalyzer
+
+SAMPLE_RATE = 16000
+
+
+def synthetic_speech(seconds, seed=0):
+    """Alternating vowel-ish (two formants), hiss and silence segments, as int16."""
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(SAMPLE_RATE * seconds)) / SAMPLE_RATE
+    out = np.zeros_like(t)
+    segment = SAMPLE_RATE // 4
+    formants = ((700, 1200), (300, 2300), (350, 800), (None, None), (0, 0))
+    for i, start in enumerate(range(0, len(t), segment)):
+        part = slice(start, start + segment)
+        f1, f2 = formants[i % len(formants)]
+        if f1 is None:
+            out[part] = rng.normal(0, 2000, len(t[part])) # Hiss
+        elif f1:
+            out[part] = (np.sin(2 * np.pi * 140 * t[part]) * 2000 + np.sin(2 * np.pi * f1 * t[part]) * 4000 +
+                         np.sin(2 * np.pi * f2 * t[part]) * 2500)
+    return np.clip(out, -32768, 32767).astype(np.int16).reshape(-1, 1)
+
+
+def bench_blocksize(blocksize, audio, min_time):
+    analyzer = VisemeAnalyzer(SAMPLE_RATE)
+    blocks = audio[:len(audio) // blocksize * blocksize].reshape(-1, blocksize, 1)
+    for block in blocks[:32]:
+        analyzer.process(block) # Warm up (and fill the smoothing coefficient cache)
+
+    times = []
+    shapes = {}
+    start = time.perf_counter()
+    i = 0
+    while time.perf_counter() - start < min_time or i < len(blocks):
+        block = blocks[i % len(blocks)]
+        t0 = time.perf_counter()
+        analyzer.process(block)
+        times.append(time.perf_counter() - t0)
+        shapes[analyzer.snapshot.viseme] = shapes.get(analyzer.snapshot.viseme, 0) + 1
+        i += 1
+
+    # Bytes still held after a run of blocks: should be ~0 (only small Python objects come and go)
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    for block in blocks:
+        analyzer.process(block)
+    retained = tracemalloc.get_traced_memory()[0] - before
+    peak = tracemalloc.get_traced_memory()[1] - before
+    tracemalloc.stop()
+
+    times = np.array(times)
+    budget = blocksize / SAMPLE_RATE
+    return {
+        "blocksize": blocksize,
+        "budget_us": budget * 1e6,
+        "mean_us": float(times.mean() * 1e6),
+        "p99_us": float(np.percentile(times, 99) * 1e6),
+        "max_us": float(times.max() * 1e6),
+        "p99_budget_share": float(np.percentile(times, 99) / budget),
+        "peak_alloc_bytes": peak,
+        "retained_bytes": retained,
+        "shapes": shapes,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mouth-shape analyzer cost per audio block")
+    parser.add_argument("--blocksizes", type=int, nargs="+", default=[64, 128, 256, 512])
+    parser.add_argument("--min-time", type=float, default=1.0, help="Seconds per block size")
+    parser.add_argument("--max-share", type=float, default=0.1, help="Allowed p99 cost as a share of the block length")
+    parser.add_argument("--out", help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    audio = synthetic_speech(5.0)
+    results = {
+        "benchmark": "visemes",
+        "numpy": np.__version__,
+        "results": [bench_blocksize(blocksize, audio, args.min_time) for blocksize in args.blocksizes],
+    }
+    over = [r["blocksize"] for r in results["results"] if r["p99_budget_share"] > args.max_share]
+    results["over_budget"] = over
+
+    output = json.dumps(results, indent=2)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(output)
+    print(output)
+    if over:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
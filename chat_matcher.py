@@ -0,0 +1,81 @@
+# chat_matcher.py
+
+import re
+
+_WORD = re.compile(r"\w+")
+_PLAIN_TERM = re.compile(r"\w+(?: \w+)*")
+
+
+class KeywordMatcher:
+    """
+    Finds every keyword in a chat message in one pass. The message is split
+    into words once and each word (and the phrases starting at it) is looked up
+    in a hash table, so the cost doesn't grow with the size of the keyword
+    table. Keywords only match as whole words/phrases ("cool" doesn't fire on
+    "cooler"). Terms with symbols in them (emotes like ":heart:") go through a
+    single compiled alternation instead. Aliases map extra spellings or emotes
+    to a keyword.
+    """
+
+    def __init__(self, keywords, aliases=None):
+        self.set_table(keywords, aliases)
+
+    def set_table(self, keywords, aliases=None):
+        """Rebuilds the matcher for a new keyword list and {alias: keyword} mapping."""
+        canonical = {keyword.lower(): keyword for keyword in keywords}
+        for alias, keyword in (aliases or {}).items():
+            if keyword in keywords: # Aliases for unknown keywords are ignored
+                canonical[alias.lower()] = keyword
+
+        words = {} # word -> keyword
+        phrases = {} # first word -> [(words tuple, keyword)], longest first
+        symbols = {} # term with punctuation -> keyword
+        for term, keyword in canonical.items():
+            term = " ".join(term.split())
+            if not _PLAIN_TERM.fullmatch(term):
+                symbols[term] = keyword
+            elif " " in term:
+                parts = tuple(term.split(" "))
+                phrases.setdefault(parts[0], []).append((parts, keyword))
+            else:
+                words[term] = keyword
+        for candidates in phrases.values():
+            candidates.sort(key=lambda candidate: len(candidate[0]), reverse=True)
+
+        symbol_pattern = None
+        if symbols:
+            alternation = "|".join(re.escape(term) for term in sorted(symbols, key=len, reverse=True))
+            # Lookarounds instead of \b so terms that start/end with symbols still work
+            symbol_pattern = re.compile(rf"(?<!\w)(?:{alternation})(?!\w)")
+
+        # Swapped in one assignment so a concurrent find() never sees half a table
+        self._tables = (words, phrases, symbols, symbol_pattern)
+
+    def find(self, message):
+        """Returns the keywords found in a message, each once (word keywords in order, then symbol terms)."""
+        words, phrases, symbols, symbol_pattern = self._tables
+        message = message.lower()
+        found = []
+
+        tokens = _WORD.findall(message)
+        skip_until = 0
+        for i, token in enumerate(tokens):
+            if i < skip_until:
+                continue
+            for parts, keyword in phrases.get(token, ()):
+                if tuple(tokens[i:i + len(parts)]) == parts:
+                    if keyword not in found:
+                        found.append(keyword)
+                    skip_until = i + len(parts)
+                    break
+            else:
+                keyword = words.get(token)
+                if keyword is not None and keyword not in found:
+                    found.append(keyword)
+
+        if symbol_pattern is not None:
+            for match in symbol_pattern.finditer(message):
+                keyword = symbols[match.group(0)]
+                if keyword not in found:
+                    found.append(keyword)
+        return found
@@ -0,0 +1,292 @@
+# chat_sources.py
+
+import asyncio
+import json
+import random
+import threading
+import time
+from collections import namedtuple
+
+# One chat message from any source. `time` is time.monotonic() when it was received.
+ChatMessage = namedtuple("ChatMessage", "source author text time")
+
+MIN_POLL_INTERVAL = 0.5 # Seconds between polls while chat is busy
+MAX_POLL_INTERVAL = 5.0 # Seconds between polls while chat is quiet
+BACKOFF_START = 1.0 # First retry delay after an error
+BACKOFF_MAX = 60.0
+
+
+class ChatSource:
+    """
+    Base class for chat sources. poll() returns the messages that arrived since
+    the last call; is_alive() turns False when the source is finished.
+    """
+
+    name = "chat"
+
+    async def poll(self):
+        raise NotImplementedError
+
+    def is_alive(self):
+        return True
+
+    async def close(self):
+        pass
+
+
+class PytchatSource(ChatSource):
+    """YouTube live chat through pytchat. Its blocking HTTP calls run in a worker thread."""
+
+    def __init__(self, video_id):
+        self.video_id = video_id
+        self.name = f"youtube:{video_id}"
+        self._chat = None
+
+    async def poll(self):
+        if self._chat is None:
+            import pytchat
+            # interruptable=False: pytchat would otherwise install a SIGINT handler, which only works on the main thread
+            self._chat = await asyncio.to_thread(pytchat.create, video_id=self.video_id, interruptable=False)
+            print(f"Watching live chat for video ID: {self.video_id}")
+        # .items rather than sync_items(), which sleeps between items to pace them out
+        # on this loop; the ingestor already spaces out the polls
+        chatdata = await asyncio.to_thread(self._chat.get)
+        return [ChatMessage(self.name, c.author.name, c.message, time.monotonic()) for c in chatdata.items]
+
+    def is_alive(self):
+        return self._chat is None or self._chat.is_alive()
+
+    async def close(self):
+        if self._chat is not None:
+            self._chat.terminate()
+
+
+class ReplaySource(ChatSource):
+    """
+    Replays a JSONL chat log, one {"author": ..., "message": ..., "t": seconds} per line.
+    speed=1.0 keeps the original timing, 2.0 plays twice as fast, 0 dumps everything at once.
+    """
+
+    def __init__(self, path, speed=1.0, loop=False):
+        self.path = path
+        self.speed = speed
+        self.loop = loop
+        self.name = f"replay:{path}"
+        self._messages = []
+        self._index = 0
+        self._started = None
+        self._done = False
+
+    def _load(self):
+        messages = []
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                entry = json.loads(line)
+                messages.append((float(entry.get("t", 0.0)), entry.get("author", "replay"), entry.get("message", "")))
+        messages.sort(key=lambda entry: entry[0])
+        return messages
+
+    async def poll(self):
+        if self._started is None:
+            self._messages = await asyncio.to_thread(self._load)
+            self._started = time.monotonic()
+        elapsed = (time.monotonic() - self._started) * self.speed if self.speed > 0 else float("inf")
+
+        out = []
+        while self._index < len(self._messages) and self._messages[self._index][0] <= elapsed:
+            _, author, text = self._messages[self._index]
+            out.append(ChatMessage(self.name, author, text, time.monotonic()))
+            self._index += 1
+
+        if self._index >= len(self._messages):
+            if self.loop and self._messages:
+                self._index = 0
+                self._started = time.monotonic()
+            else:
+                self._done = True
+        return out
+
+    def is_alive(self):
+        return not self._done
+
+
+class SyntheticSource(ChatSource):
+    """
+    Generates fake chat at a configurable rate, for load testing without a stream.
+    profile is "steady" (rate msgs/s), "bursty" (alternates rate and burst_rate
+    every burst_period seconds) or "raid" (rate, then burst_rate for
+    burst_period seconds starting at raid_at). keyword_share is the fraction of
+    messages that contain one of `keywords`. Runs for `duration` seconds.
+    """
+
+    FILLER = ["hello", "lol", "pog", "stream", "so", "good", "omg", "gg", "chat", "hype", "this", "is", "kappa"]
+
+    def __init__(self, keywords, profile="steady", rate=50.0, burst_rate=2000.0, burst_period=2.0,
+                 raid_at=5.0, duration=10.0, keyword_share=0.2, authors=1000, seed=None):
+        if profile not in ("steady", "bursty", "raid"):
+            raise ValueError(f"Unknown chat profile: {profile}")
+        self.keywords = list(keywords)
+        self.profile = profile
+        self.rate = rate
+        self.burst_rate = burst_rate
+        self.burst_period = burst_period
+        self.raid_at = raid_at
+        self.duration = duration
+        self.keyword_share = keyword_share
+        self.authors = authors
+        self.name = f"synthetic:{profile}"
+        self.generated = 0
+        self._rng = random.Random(seed)
+        self._started = None
+        self._last = None
+        self._carry = 0.0 # Fractional messages owed from the previous poll
+
+    def rate_at(self, t):
+        if self.profile == "bursty":
+            return self.burst_rate if int(t / self.burst_period) % 2 else self.rate
+        if self.profile == "raid" and self.raid_at <= t < self.raid_at + self.burst_period:
+            return self.burst_rate
+        return self.rate
+
+    async def poll(self):
+        now = time.monotonic()
+        if self._started is None:
+            self._started = self._last = now
+            return []
+        end = min(now, self._started + self.duration)
+        elapsed = max(0.0, end - self._last)
+        start_t = self._last - self._started
+        self._carry += self.rate_at(start_t) * elapsed
+        count = int(self._carry)
+        self._carry -= count
+
+        out = []
+        for i in range(count):
+            # Spread arrival times over the polled interval so latency includes the polling delay
+            arrived = self._last + elapsed * (i + 1) / count
+            out.append(ChatMessage(self.name, f"viewer{self._rng.randrange(self.authors)}", self._text(), arrived))
+        self._last = end
+        self.generated += count
+        return out
+
+    def is_alive(self):
+        return self._started is None or time.monotonic() < self._started + self.duration
+
+    def _text(self):
+        words = [self._rng.choice(self.FILLER) for _ in range(self._rng.randint(1, 8))]
+        if self.keywords and self._rng.random() < self.keyword_share:
+            words.insert(self._rng.randrange(len(words) + 1), self._rng.choice(self.keywords))
+        return " ".join(words)
+
+
+class ChatIngestor:
+    """
+    Polls any number of chat sources from one asyncio loop on one background
+    thread. Each source adapts its polling interval to how busy it is and backs
+    off exponentially on errors. All messages are merged into one stream and
+    handed to on_message(ChatMessage) in arrival order.
+    """
+
+    def __init__(self, on_message, min_interval=MIN_POLL_INTERVAL, max_interval=MAX_POLL_INTERVAL):
+        self.on_message = on_message
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self._loop = None
+        self._thread = None
+        self._queue = None
+        self._tasks = {}
+        self._dispatch_task = None
+        self._ready = threading.Event()
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._ready.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        self._ready.wait()
+
+    def add_source(self, source):
+        """Starts polling a source. Safe to call from any thread."""
+        self.start()
+        self._loop.call_soon_threadsafe(self._add_source, source)
+
+    def backlog(self):
+        """Messages received but not yet handed to on_message."""
+        return self._queue.qsize() if self._queue is not None else 0
+
+    def stop(self, timeout=5):
+        if self._loop is None:
+            return
+        future = asyncio.run_coroutine_threadsafe(self._shutdown(), self._loop)
+        try:
+            future.result(timeout)
+        except Exception as e:
+            print(f"Chat ingestor shutdown error: {e}")
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout)
+        self._loop = None
+
+    def _run(self):
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        self._queue = asyncio.Queue()
+        self._dispatch_task = self._loop.create_task(self._dispatch())
+        self._loop.call_soon(self._ready.set)
+        self._loop.run_forever()
+        self._loop.close()
+
+    def _add_source(self, source):
+        if source.name in self._tasks:
+            print(f"Chat source '{source.name}' is already running.")
+            return
+        self._tasks[source.name] = self._loop.create_task(self._poll_source(source))
+
+    async def _poll_source(self, source):
+        interval = self.min_interval
+        backoff = BACKOFF_START
+        try:
+            while source.is_alive():
+                try:
+                    messages = await source.poll()
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    delay = backoff * random.uniform(0.8, 1.2) # Jitter so streams don't retry in lockstep
+                    print(f"Chat watcher error ({source.name}): {e}. Retrying in {delay:.1f}s")
+                    await asyncio.sleep(delay)
+                    backoff = min(backoff * 2, BACKOFF_MAX)
+                    continue
+                backoff = BACKOFF_START
+
+                for message in messages:
+                    self._queue.put_nowait(message)
+                # Busy chat: poll sooner. Quiet chat: slowly back off.
+                if messages:
+                    interval = max(self.min_interval, interval / 2)
+                else:
+                    interval = min(self.max_interval, interval * 1.5)
+                await asyncio.sleep(interval)
+        finally:
+            self._tasks.pop(source.name, None)
+            await source.close()
+            print(f"Chat source '{source.name}' finished.")
+
+    async def _dispatch(self):
+        while True:
+            message = await self._queue.get()
+            try:
+                self.on_message(message)
+            except Exception as e:
+                print(f"Chat message handler error: {e}")
+
+    async def _shutdown(self):
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._dispatch_task.cancel()
+        await asyncio.gather(self._dispatch_task, return_exceptions=True)
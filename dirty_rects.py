@@ -0,0 +1,89 @@
+# dirty_rects.py
+
+import pygame
+
+
+class DirtyRectRenderer:
+    """
+    Clears and presents only the parts of the window that changed.
+    Each frame, drawn elements are marked by name (character, glow, particles);
+    the previous frame's rects are cleared to the background before drawing,
+    and present() updates the union of each element's old and new rect.
+    The background is a fill color, optionally under a cached static layer
+    (the scene's background and props, see scene.py) that is copied back instead.
+    """
+
+    def __init__(self, surface, background):
+        self.surface = surface
+        self.background = background
+        self.static = None # Window-sized Surface drawn over the background color, or None
+        self._previous = {} # name -> Rect drawn last frame
+        self._current = {}
+        self._needs_full = True
+        self._full = True
+
+    def invalidate(self):
+        """Forces the next frame to repaint and present the whole window."""
+        self._needs_full = True
+
+    def set_static(self, surface):
+        """Uses a new static layer from the next frame on (repainting the whole window once)."""
+        self.static = surface
+        self.invalidate()
+
+    def clear(self, rect=None):
+        """Restores the background (and static layer) in a rect, or the whole window."""
+        if self.static is None or self.static.get_flags() & pygame.SRCALPHA:
+            self.surface.fill(self.background, rect)
+        if self.static is not None:
+            if rect is None:
+                self.surface.blit(self.static, (0, 0))
+            else:
+                self.surface.blit(self.static, rect, rect)
+
+    def begin_frame(self, overlay=False):
+        """
+        Clears the old element rects (or the whole window) to the background.
+        Pass overlay=True while something covers the scene (the options popup);
+        that frame and the one after it fall back to full updates.
+        """
+        self._full = self._needs_full or overlay
+        self._needs_full = overlay
+        if self._full:
+            self.clear()
+        else:
+            for rect in self._previous.values():
+                self.clear(rect)
+        self._current = {}
+
+    def mark(self, name, rect):
+        """Records the area an element was drawn to this frame."""
+        if rect is None:
+            return
+        rect = pygame.Rect(rect).clip(self.surface.get_rect())
+        if rect.width == 0 or rect.height == 0:
+            return
+        old = self._current.get(name)
+        self._current[name] = old.union(rect) if old else rect
+
+    def pending_rects(self):
+        """Rects this frame repaints: every element's old and new area (or the whole window)."""
+        if self._full:
+            return [self.surface.get_rect()]
+        rects = []
+        for name in self._previous.keys() | self._current.keys():
+            old, new = self._previous.get(name), self._current.get(name)
+            rects.append(old.union(new) if old and new else old or new)
+        return rects
+
+    def present(self, update_display=True):
+        """
+        Pushes this frame to the display and returns the rects that were updated.
+        With update_display=False (offscreen canvas) only the bookkeeping is done.
+        """
+        rects = self.pending_rects()
+        if update_display:
+            pygame.display.update(rects)
+        self._previous = self._current
+        self._current = {}
+        return rects
@@ -0,0 +1,109 @@
+# event_bus.py
+
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+# A chat keyword event. `count` is how many messages were merged into it,
+# `time` is when the first of them arrived (time.monotonic()).
+ChatEvent = namedtuple("ChatEvent", "author keyword action count time")
+
+MAX_PENDING = 64 # Distinct keyword events waiting for the render loop
+COALESCE_WINDOW = 3.0 # Seconds during which repeats of a keyword merge into one event
+KEYWORD_RATE = (4, 30.0) # At most 4 events per keyword every 30 s
+AUTHOR_RATE = (3, 10.0) # At most 3 keywords per author every 10 s
+MAX_TRACKED_AUTHORS = 5000
+
+
+class _RateLimiter:
+    """Token buckets per key: `limit` events per `period` seconds, least recently used keys forgotten."""
+
+    def __init__(self, limit, period, max_keys=None):
+        self.limit = limit
+        self.period = period
+        self.max_keys = max_keys
+        self._buckets = OrderedDict() # key -> (tokens, last refill time)
+
+    def allow(self, key, now):
+        tokens, last = self._buckets.pop(key, (self.limit, now))
+        tokens = min(self.limit, tokens + max(0.0, now - last) * self.limit / self.period)
+        now = max(now, last) # Timestamps from different sources can arrive slightly out of order
+        allowed = tokens >= 1
+        if allowed:
+            tokens -= 1
+        self._buckets[key] = (tokens, now)
+        if self.max_keys is not None and len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+        return allowed
+
+
+class ChatEventBus:
+    """
+    Thread-safe, bounded hand-off of chat keyword events to the render loop.
+    Repeats of a keyword inside the coalescing window merge into one event,
+    per-keyword and per-author rate limits stop raids from flooding reactions,
+    and drain() swaps out the pending batch under the lock in constant time.
+    """
+
+    def __init__(self, capacity=MAX_PENDING, coalesce_window=COALESCE_WINDOW,
+                 keyword_rate=KEYWORD_RATE, author_rate=AUTHOR_RATE):
+        self.capacity = capacity
+        self.coalesce_window = coalesce_window
+        self._keyword_limits = _RateLimiter(*keyword_rate) if keyword_rate else None
+        self._author_limits = _RateLimiter(*author_rate, max_keys=MAX_TRACKED_AUTHORS) if author_rate else None
+
+        self._lock = threading.Lock()
+        self._pending = OrderedDict() # keyword -> [author, keyword, action, count, time]
+        self._last_accepted = {} # keyword -> time of the last event let through
+
+        self.received = 0
+        self.coalesced = 0
+        self.rate_limited = 0
+        self.dropped = 0
+
+    def publish(self, author, keyword, action, now=None):
+        """Adds a chat event. Returns True if it became (or merged into) a pending event."""
+        if now is None:
+            now = time.monotonic()
+        with self._lock:
+            self.received += 1
+
+            pending = self._pending.get(keyword)
+            if pending is not None:
+                pending[3] += 1
+                self.coalesced += 1
+                return True
+            if now - self._last_accepted.get(keyword, float("-inf")) < self.coalesce_window:
+                # Same keyword was just delivered; count it as part of that event
+                self.coalesced += 1
+                return True
+
+            if self._author_limits and not self._author_limits.allow(author, now):
+                self.rate_limited += 1
+                return False
+            if self._keyword_limits and not self._keyword_limits.allow(keyword, now):
+                self.rate_limited += 1
+                return False
+
+            if len(self._pending) >= self.capacity:
+                self._pending.popitem(last=False) # Drop oldest
+                self.dropped += 1
+            self._pending[keyword] = [author, keyword, action, 1, now]
+            self._last_accepted[keyword] = now
+            return True
+
+    def drain(self):
+        """Returns and clears all pending events, oldest first."""
+        with self._lock:
+            pending, self._pending = self._pending, OrderedDict()
+        return [ChatEvent(*event) for event in pending.values()]
+
+    def stats(self):
+        with self._lock:
+            return {
+                "received": self.received,
+                "coalesced": self.coalesced,
+                "rate_limited": self.rate_limited,
+                "dropped": self.dropped,
+                "pending": len(self._pending),
+            }
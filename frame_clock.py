@@ -0,0 +1,102 @@
+# frame_clock.py
+
+import threading
+import time
+
+SIM_HZ = 60 # Simulation ticks per second (particle speeds and timers are per tick)
+MAX_SIM_STEPS = 10 # Ticks caught up in one frame at most, so a long stall doesn't fast-forward everything
+TARGET_FPS = 60
+IDLE_FPS = 12 # Frame rate while only the breathing animation is running
+IDLE_AFTER = 0.5 # Seconds without activity before dropping to IDLE_FPS
+
+
+class FixedTimestep:
+    """
+    Accumulates real time and hands it out as whole simulation ticks, so
+    animation speed doesn't depend on the frame rate.
+    """
+
+    def __init__(self, hz=SIM_HZ, max_steps=MAX_SIM_STEPS):
+        self.step = 1.0 / hz
+        self.max_steps = max_steps
+        self._accumulator = 0.0
+        self._last = None
+        self.skipped = 0 # Ticks thrown away by the max_steps clamp
+
+    def reset(self):
+        """Starts counting from now (e.g. when the game screen opens)."""
+        self._accumulator = 0.0
+        self._last = None
+
+    def advance(self, now=None):
+        """Returns how many ticks to simulate for the time since the last call."""
+        if now is None:
+            now = time.perf_counter()
+        if self._last is None:
+            self._last = now
+            return 0
+        self._accumulator += now - self._last
+        self._last = now
+        steps = int(self._accumulator / self.step)
+        self._accumulator -= steps * self.step
+        if steps > self.max_steps:
+            self.skipped += steps - self.max_steps
+            steps = self.max_steps
+        return steps
+
+
+class FramePacer:
+    """
+    Frame rate limiter that falls back to a low idle rate when nothing is
+    animating. The render loop reports each frame whether it was busy; after
+    `idle_after` seconds of quiet frames it sleeps longer between frames.
+    wake() (safe from any thread, e.g. the mic callback or a keyword trigger)
+    ends an idle sleep at once, so speech and effects never wait for it.
+    """
+
+    def __init__(self, fps=TARGET_FPS, idle_fps=IDLE_FPS, idle_after=IDLE_AFTER, adaptive=True):
+        self.fps = fps
+        self.idle_fps = idle_fps
+        self.idle_after = idle_after
+        self.adaptive = adaptive
+        self.idle = False
+        self._wake = threading.Event()
+        self._last_busy = time.perf_counter()
+        self._next_frame = None
+        self.idle_frames = 0
+        self.frames = 0
+
+    def wake(self):
+        self._wake.set()
+
+    def wait(self, busy):
+        """Sleeps until the next frame is due. Call once per frame, after presenting it."""
+        now = time.perf_counter()
+        woken = self._wake.is_set()
+        self._wake.clear()
+        if busy or woken:
+            self._last_busy = now
+        self.idle = self.adaptive and now - self._last_busy >= self.idle_after
+        self.frames += 1
+
+        if not self.idle:
+            period = 1.0 / self.fps
+            # Schedule from the previous deadline so the rate doesn't drift, unless we're already late
+            self._next_frame = now if self._next_frame is None else max(self._next_frame + period, now)
+            delay = self._next_frame - now
+            if delay > 0:
+                time.sleep(delay)
+            return
+
+        self.idle_frames += 1
+        self._next_frame = now + 1.0 / self.idle_fps
+        if self._wake.wait(self._next_frame - now):
+            # Woken early: render right away (the next call sees the wake and leaves idle)
+            self._next_frame = time.perf_counter()
+
+    def stats(self):
+        return {
+            "frames": self.frames,
+            "idle_frames": self.idle_frames,
+            "idle_share": self.idle_frames / self.frames if self.frames else 0.0,
+        }
@@ -0,0 +1,311 @@
+# frame_output.py
+#
+# Publishes rendered frames with a real alpha channel for OBS/ffmpeg, instead
+# of a green-screen window that has to be captured and chroma-keyed. Frames go
+# into a shared-memory ring (SharedFrameSink) or down a pipe/FIFO
+# (PipeFrameSink) as raw 8-bit BGRA/RGBA, in whatever byte order the canvas
+# already uses so no per-pixel conversion is needed.
+#
+# Reading the shared-memory ring from another program:
+#   python frame_output.py --name nyamii_frames | ffmpeg -f rawvideo -pix_fmt bgra -s 800x800 -r 60 -i - out.mov
+
+import argparse
+import os
+import queue
+import sys
+import threading
+import time
+from multiprocessing import shared_memory
+import numpy as np
+import pygame
+from shm_utils import attach_shared_memory
+
+SHM_NAME = "nyamii_frames"
+SHM_SLOTS = 3 # Frames kept in the ring; the reader always takes the newest
+PIPE_SLOTS = 2 # Frames buffered for a slow pipe reader before new ones are dropped
+
+FORMAT_VERSION = 1
+_MAGIC = 0x4E594D46 # "NYMF"
+# Header slots (int64) at the start of the shared block
+_H_MAGIC, _H_VERSION, _H_WIDTH, _H_HEIGHT, _H_STRIDE, _H_SLOTS, _H_FORMAT, _H_FRAMES, _H_LAST_READ = range(9)
+_HEADER_SLOTS = 16
+_FORMATS = ("bgra", "rgba", "argb", "abgr")
+
+
+def make_canvas(size):
+    """
+    Offscreen SRCALPHA canvas in the display's native pixel format, so blitting
+    convert_alpha() images onto it stays on the fast path. Needs a display
+    mode to be set first (a hidden 1x1 one is enough).
+    """
+    return pygame.Surface(size, pygame.SRCALPHA).convert_alpha()
+
+
+def pixel_format(surface):
+    """Byte order of a 32-bit surface's pixels in memory, e.g. "bgra" (ffmpeg -pix_fmt name)."""
+    names = "rgba"
+    order = {}
+    for name, mask in zip(names, surface.get_masks()):
+        if mask:
+            byte = (mask.bit_length() - 1) // 8
+            order[byte if sys.byteorder == "little" else 3 - byte] = name
+    return "".join(order.get(i, "x") for i in range(4))
+
+
+def _frame_bytes(surface):
+    """The surface's pixels as a memoryview, no copy. Use it in a with-block so the surface is unlocked afterwards."""
+    return memoryview(surface.get_view("1"))
+
+
+class SharedFrameSink:
+    """
+    Publishes frames into a shared-memory ring for another process to read.
+    A header describes the frame size, stride, pixel format and how many
+    frames were published; each slot carries the number of the frame in it
+    (-1 while it's being written). Publishing never blocks: the reader picks
+    the newest frame, and frames it never got to are counted as dropped.
+    """
+
+    def __init__(self, size, pix_fmt, name=SHM_NAME, slots=SHM_SLOTS):
+        self.width, self.height = size
+        self.stride = self.width * 4
+        self.frame_bytes = self.stride * self.height
+        self.slots = slots
+        self.pix_fmt = pix_fmt
+        self.name = name
+        header_bytes = (_HEADER_SLOTS + slots) * 8
+        size_bytes = header_bytes + slots * self.frame_bytes
+        try:
+            self._shm = shared_memory.SharedMemory(name=name, create=True, size=size_bytes)
+        except FileExistsError:
+            # Left behind by a crashed run
+            stale = shared_memory.SharedMemory(name=name)
+            stale.close()
+            stale.unlink()
+            self._shm = shared_memory.SharedMemory(name=name, create=True, size=size_bytes)
+
+        buf = self._shm.buf
+        self._header = np.ndarray((_HEADER_SLOTS,), dtype=np.int64, buffer=buf, offset=0)
+        self._slot_frames = np.ndarray((slots,), dtype=np.int64, buffer=buf, offset=_HEADER_SLOTS * 8)
+        self._data = np.ndarray((slots, self.frame_bytes), dtype=np.uint8, buffer=buf, offset=header_bytes)
+        self._header[:] = 0
+        self._header[_H_WIDTH] = self.width
+        self._header[_H_HEIGHT] = self.height
+        self._header[_H_STRIDE] = self.stride
+        self._header[_H_SLOTS] = slots
+        self._header[_H_FORMAT] = _FORMATS.index(pix_fmt) if pix_fmt in _FORMATS else -1
+        self._header[_H_LAST_READ] = -1 # No reader yet
+        self._slot_frames[:] = -1
+        self._header[_H_VERSION] = FORMAT_VERSION
+        self._header[_H_MAGIC] = _MAGIC # Written last: readers wait for it
+
+        self.published = 0
+        self.dropped = 0
+        self._publish_time = 0.0
+        print(f"Frame output: shared memory '{name}', {self.width}x{self.height} {pix_fmt}, {slots} slots.")
+
+    def publish(self, surface):
+        start = time.perf_counter()
+        frame = self.published
+        slot = frame % self.slots
+        last_read = int(self._header[_H_LAST_READ])
+        if last_read >= 0 and frame > 0 and last_read < frame - 1:
+            self.dropped += 1 # A reader is attached but never took the previous frame
+
+        self._slot_frames[slot] = -1
+        with _frame_bytes(surface) as pixels:
+            self._data[slot] = np.frombuffer(pixels, dtype=np.uint8, count=self.frame_bytes)
+        self._slot_frames[slot] = frame
+        self._header[_H_FRAMES] = frame + 1
+        self.published += 1
+        self._publish_time += time.perf_counter() - start
+
+    def stats(self):
+        last_read = int(self._header[_H_LAST_READ])
+        return {
+            "published": self.published,
+            "dropped": self.dropped,
+            "drop_rate": self.dropped / self.published if self.published else 0.0,
+            "reader_attached": last_read >= 0,
+            "mean_publish_ms": self._publish_time / self.published * 1000.0 if self.published else 0.0,
+        }
+
+    def close(self):
+        self._header[_H_MAGIC] = 0
+        del self._header, self._slot_frames, self._data
+        self._shm.close()
+        try:
+            self._shm.unlink()
+        except FileNotFoundError:
+            pass
+
+
+class SharedFrameReader:
+    """Reader side of SharedFrameSink, for consumers written in Python."""
+
+    def __init__(self, name=SHM_NAME):
+        self._shm = attach_shared_memory(name) # The app owns the block
+        buf = self._shm.buf
+        self._header = np.ndarray((_HEADER_SLOTS,), dtype=np.int64, buffer=buf, offset=0)
+        if self._header[_H_MAGIC] != _MAGIC or self._header[_H_VERSION] != FORMAT_VERSION:
+            self._shm.close()
+            raise ValueError(f"'{name}' is not a version {FORMAT_VERSION} frame ring")
+        self.width = int(self._header[_H_WIDTH])
+        self.height = int(self._header[_H_HEIGHT])
+        self.stride = int(self._header[_H_STRIDE])
+        self.slots = int(self._header[_H_SLOTS])
+        fmt = int(self._header[_H_FORMAT])
+        self.pix_fmt = _FORMATS[fmt] if 0 <= fmt < len(_FORMATS) else None
+        self.frame_bytes = self.stride * self.height
+        self._slot_frames = np.ndarray((self.slots,), dtype=np.int64, buffer=buf, offset=_HEADER_SLOTS * 8)
+        self._data = np.ndarray((self.slots, self.frame_bytes), dtype=np.uint8, buffer=buf,
+                                offset=(_HEADER_SLOTS + self.slots) * 8)
+        self._out = np.empty(self.frame_bytes, dtype=np.uint8)
+        self.last_frame = -1
+
+    def read(self):
+        """Returns (frame_number, pixels) for a frame newer than the last one read, or None."""
+        if self._header[_H_MAGIC] != _MAGIC:
+            raise EOFError("Frame ring was closed by the writer")
+        frame = int(self._header[_H_FRAMES]) - 1
+        if frame <= self.last_frame:
+            return None
+        slot = frame % self.slots
+        if self._slot_frames[slot] != frame:
+            return None # Being overwritten right now; try again
+        self._out[:] = self._data[slot]
+        if self._slot_frames[slot] != frame:
+            return None # Writer lapped us while copying
+        self.last_frame = frame
+        self._header[_H_LAST_READ] = frame
+        return frame, self._out
+
+    def close(self):
+        del self._header, self._slot_frames, self._data
+        self._shm.close()
+
+
+class PipeFrameSink:
+    """
+    Writes frames to a pipe, named FIFO or file (e.g. for ffmpeg -f rawvideo).
+    Frames are copied into a small pool of buffers and written by a background
+    thread, so a slow or blocked reader never stalls the render loop; when all
+    buffers are still waiting to be written, the new frame is dropped.
+    Opening a FIFO waits for its reader; frames before that aren't counted.
+    """
+
+    def __init__(self, path, size, pix_fmt, slots=PIPE_SLOTS):
+        self.path = path
+        self.width, self.height = size
+        self.frame_bytes = self.width * self.height * 4
+        self.pix_fmt = pix_fmt
+        self._free = queue.Queue()
+        self._ready = queue.Queue()
+        for _ in range(slots):
+            self._free.put(np.empty(self.frame_bytes, dtype=np.uint8))
+        self._connected = threading.Event()
+        self._closed = False
+
+        self.published = 0
+        self.written = 0
+        self.dropped = 0
+        self.waiting = 0
+        self._publish_time = 0.0
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        print(f"Frame output: {path}, {self.width}x{self.height} {pix_fmt} "
+              f"(ffmpeg: -f rawvideo -pix_fmt {pix_fmt} -s {self.width}x{self.height} -i {path}).")
+
+    def publish(self, surface):
+        if self._closed:
+            return
+        if not self._connected.is_set():
+            self.waiting += 1
+            return
+        start = time.perf_counter()
+        self.published += 1
+        try:
+            buffer = self._free.get_nowait()
+        except queue.Empty:
+            self.dropped += 1 # Reader is behind
+            return
+        with _frame_bytes(surface) as pixels:
+            buffer[:] = np.frombuffer(pixels, dtype=np.uint8, count=self.frame_bytes)
+        self._ready.put(buffer)
+        self._publish_time += time.perf_counter() - start
+
+    def _run(self):
+        try:
+            with open(self.path, "wb", buffering=0) as f: # Blocks until a FIFO has a reader
+                self._connected.set()
+                while True:
+                    buffer = self._ready.get()
+                    if buffer is None:
+                        break
+                    f.write(memoryview(buffer))
+                    self.written += 1
+                    self._free.put(buffer)
+        except (BrokenPipeError, OSError) as e:
+            print(f"Frame output pipe closed: {e}")
+        finally:
+            self._closed = True
+
+    def stats(self):
+        return {
+            "published": self.published,
+            "written": self.written,
+            "dropped": self.dropped,
+            "drop_rate": self.dropped / self.published if self.published else 0.0,
+            "before_reader": self.waiting,
+            "mean_publish_ms": self._publish_time / max(1, self.published - self.dropped) * 1000.0,
+        }
+
+    def close(self, timeout=2):
+        self._ready.put(None)
+        self._thread.join(timeout)
+
+
+def open_frame_sink(target, size, pix_fmt):
+    """"shm" gives a SharedFrameSink, anything else is a pipe/FIFO/file path."""
+    if target == "shm":
+        return SharedFrameSink(size, pix_fmt)
+    if sys.platform != "win32" and not os.path.exists(target) and hasattr(os, "mkfifo"):
+        os.mkfifo(target)
+    return PipeFrameSink(target, size, pix_fmt)
+
+
+def _main():
+    parser = argparse.ArgumentParser(description="Copy frames from the shared-memory ring to stdout")
+    parser.add_argument("--name", default=SHM_NAME)
+    parser.add_argument("--fps", type=float, default=60.0, help="Polling rate; repeats the last frame if none is new")
+    args = parser.parse_args()
+
+    reader = None
+    while reader is None:
+        try:
+            reader = SharedFrameReader(args.name)
+        except (FileNotFoundError, ValueError):
+            time.sleep(0.5)
+    print(f"{reader.width}x{reader.height} {reader.pix_fmt}", file=sys.stderr)
+
+    out = sys.stdout.buffer
+    period = 1.0 / args.fps
+    next_time = time.perf_counter()
+    latest = None
+    try:
+        while True:
+            result = reader.read()
+            if result is not None:
+                latest = result[1]
+            if latest is not None:
+                out.write(memoryview(latest)) # Constant-rate output for ffmpeg
+            next_time += period
+            time.sleep(max(0.0, next_time - time.perf_counter()))
+    except (EOFError, BrokenPipeError, KeyboardInterrupt):
+        pass
+    finally:
+        reader.close()
+
+
+if __name__ == "__main__":
+    _main()
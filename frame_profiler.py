@@ -0,0 +1,137 @@
+# frame_profiler.py
+
+import csv
+import time
+from collections import deque
+import numpy as np
+
+PROFILE_WINDOW = 600 # Frames kept for the rolling percentiles (10 s at 60 FPS)
+TRACE_FRAMES = 36000 # Frames kept for the CSV trace (10 min at 60 FPS)
+HUD_REFRESH = 0.25 # Seconds between HUD text updates
+
+
+class FrameProfiler:
+    """
+    Per-stage frame timing. Call begin_frame(), then lap("stage") after each
+    stage to record the time since the previous lap, then end_frame(). Stage
+    durations go into a rolling window for percentiles and into a bounded trace
+    that can be written out as CSV.
+    """
+
+    def __init__(self, window=PROFILE_WINDOW, trace_frames=TRACE_FRAMES, idle_stages=("wait",)):
+        self.window = window
+        self.idle_stages = set(idle_stages) # Not counted as work (e.g. clock.tick sleeping)
+        self._stages = {} # name -> deque of seconds
+        self._work = deque(maxlen=window)
+        self._frame = deque(maxlen=window)
+        self._trace = deque(maxlen=trace_frames)
+        self._stage_order = []
+
+        self._current = {}
+        self._frame_start = None
+        self._last = None
+        self._start_time = time.perf_counter()
+        self.frames = 0
+
+    def begin_frame(self):
+        now = time.perf_counter()
+        self._frame_start = self._last = now
+        self._current = {}
+
+    def lap(self, name):
+        """Records the time since the last lap (or begin_frame) under `name`."""
+        now = time.perf_counter()
+        if self._last is None:
+            self._last = now
+            return
+        self._current[name] = self._current.get(name, 0.0) + (now - self._last)
+        self._last = now
+
+    def end_frame(self):
+        if self._frame_start is None:
+            return
+        total = time.perf_counter() - self._frame_start
+        work = sum(duration for name, duration in self._current.items() if name not in self.idle_stages)
+        for name, duration in self._current.items():
+            samples = self._stages.get(name)
+            if samples is None:
+                samples = self._stages[name] = deque(maxlen=self.window)
+                self._stage_order.append(name)
+            samples.append(duration)
+        self._work.append(work)
+        self._frame.append(total)
+        self._trace.append((self.frames, self._frame_start - self._start_time, total, work, self._current))
+        self.frames += 1
+        self._frame_start = None
+
+    def fps(self):
+        if not self._frame:
+            return 0.0
+        return len(self._frame) / sum(self._frame)
+
+    def percentiles(self, name=None, points=(50, 99)):
+        """Milliseconds at the given percentiles for a stage, or for frame work time if name is None."""
+        samples = self._work if name is None else self._stages.get(name, ())
+        if not samples:
+            return [0.0 for _ in points]
+        return [float(value) * 1000.0 for value in np.percentile(np.fromiter(samples, dtype=np.float64), points)]
+
+    def summary(self):
+        """{stage: (p50_ms, p99_ms)} for every stage seen so far, in first-seen order."""
+        return {name: tuple(self.percentiles(name)) for name in self._stage_order}
+
+    def write_csv(self, path):
+        """Writes the trace: one row per frame with total, work and every stage in milliseconds."""
+        with open(path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(["frame", "time_s", "total_ms", "work_ms"] + [f"{name}_ms" for name in self._stage_order])
+            for frame, start, total, work, stages in self._trace:
+                writer.writerow([frame, f"{start:.4f}", f"{total * 1000:.3f}", f"{work * 1000:.3f}"] +
+                                [f"{stages.get(name, 0.0) * 1000:.3f}" for name in self._stage_order])
+        return len(self._trace)
+
+
+class ProfilerHUD:
+    """On-screen profiler readout. Text is only re-rendered a few times per second."""
+
+    def __init__(self, font, color=(255, 255, 255), background=(0, 0, 0, 170), refresh=HUD_REFRESH):
+        self.font = font
+        self.color = color
+        self.background = background
+        self.refresh = refresh
+        self.visible = False
+        self._surface = None
+        self._next_update = 0.0
+
+    def toggle(self):
+        self.visible = not self.visible
+        self._next_update = 0.0
+
+    def draw(self, target, profiler, extra_lines=(), pos=(10, 10)):
+        """Draws the HUD and returns the rect it covered (None when hidden)."""
+        if not self.visible:
+            return None
+        now = time.perf_counter()
+        if self._surface is None or now >= self._next_update:
+            self._surface = self._render(profiler, extra_lines)
+            self._next_update = now + self.refresh
+        return target.blit(self._surface, pos)
+
+    def _render(self, profiler, extra_lines):
+        import pygame
+        p50, p99 = profiler.percentiles()
+        lines = [f"FPS {profiler.fps():5.1f}   frame p50 {p50:5.2f} ms  p99 {p99:5.2f} ms"]
+        for name, (stage_p50, stage_p99) in profiler.summary().items():
+            lines.append(f"  {name:<10} p50 {stage_p50:5.2f}  p99 {stage_p99:5.2f}")
+        lines.extend(extra_lines)
+
+        rendered = [self.font.render(line, True, self.color) for line in lines]
+        width = max(surface.get_width() for surface in rendered) + 12
+        height = sum(surface.get_height() for surface in rendered) + 12
+        panel = pygame.Surface((width, height), pygame.SRCALPHA)
+        panel.fill(self.background)
+        y = 6
+        for surface in rendered:
+            panel.blit(surface, (6, y))
+            y += surface.get_height()
+        return panel
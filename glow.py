@@ -0,0 +1,78 @@
+# glow.py
+
+import numpy as np
+import pygame
+
+GLOW_PADDING = 40 # Extra radius around the character, in pixels
+GLOW_MAX_ALPHA = 150
+GLOW_FADE_LEVELS = 12 # Pre-rendered fade steps per character size (memory: one glow surface each)
+
+
+class GlowRenderer:
+    """
+    Pink glow behind the character, pre-rendered once per character size at
+    a few fade levels with the alpha baked into the pixels. Drawing a frame
+    blits the level nearest the fade fraction: no allocations, and no
+    surface-alpha modulation (which makes SDL take its slow blend path on
+    per-pixel-alpha surfaces).
+    """
+
+    def __init__(self, color, padding=GLOW_PADDING, max_alpha=GLOW_MAX_ALPHA, soft=True, levels=GLOW_FADE_LEVELS):
+        self.color = color[:3]
+        self.padding = padding
+        self.max_alpha = max_alpha
+        self.soft = soft # Fade out across the padding instead of a hard ellipse edge
+        self.levels = max(1, levels)
+        self._surfaces = {} # character size -> [glow surface per fade level, faintest first]
+
+    def prepare(self, sizes):
+        """Builds glows for the given character sizes, keeping ones that already exist."""
+        sizes = set(sizes)
+        self._surfaces = {size: self._surfaces.get(size) or self._build(size) for size in sizes}
+
+    def draw(self, target, center, char_size, fraction):
+        """Blits the glow centered on `center`, faded to `fraction` (0..1) of full strength."""
+        surfaces = self._surfaces.get(char_size)
+        if surfaces is None:
+            surfaces = self._surfaces[char_size] = self._build(char_size)
+        level = int(round(max(0.0, min(fraction, 1.0)) * self.levels))
+        if level == 0:
+            return None
+        surface = surfaces[level - 1]
+        rect = surface.get_rect(center=center)
+        target.blit(surface, rect)
+        return rect
+
+    def _build(self, char_size):
+        radius_x = char_size[0] // 2 + self.padding
+        radius_y = char_size[1] // 2 + self.padding
+        shape = self._shape(char_size, radius_x, radius_y)
+
+        surfaces = []
+        for level in range(1, self.levels + 1):
+            surface = pygame.Surface((radius_x * 2, radius_y * 2), pygame.SRCALPHA)
+            surface.fill((*self.color, 0))
+            alpha = pygame.surfarray.pixels_alpha(surface)
+            alpha[:] = (shape * (self.max_alpha * level / self.levels)).round().astype(np.uint8)
+            del alpha # Unlock the surface
+            # Run-length encoded on first blit, so the transparent corners are skipped
+            # (alpha 255 keeps the per-pixel alpha as is)
+            surface.set_alpha(255, pygame.RLEACCEL)
+            surfaces.append(surface)
+        return surfaces
+
+    def _shape(self, char_size, radius_x, radius_y):
+        """Glow strength (0..1) per pixel: full over the character's ellipse, fading across the padding if soft."""
+        xs = np.arange(radius_x * 2) + 0.5 - radius_x
+        ys = np.arange(radius_y * 2) + 0.5 - radius_y
+        # Normalized elliptical distances: 1 on the outer (padded) edge / on the character's edge
+        outer = np.sqrt((xs[:, None] / radius_x) ** 2 + (ys[None, :] / radius_y) ** 2)
+        if not self.soft:
+            return (outer <= 1.0).astype(np.float32)
+        inner = np.sqrt((xs[:, None] / max(1, char_size[0] / 2)) ** 2 + (ys[None, :] / max(1, char_size[1] / 2)) ** 2)
+        # Along each ray from the center both distances grow linearly, so this is
+        # how far a pixel is across the padding band: 0 at the character's edge, 1 at the outer edge
+        with np.errstate(divide="ignore", invalid="ignore"):
+            band = (inner - 1.0) / (inner / outer - 1.0)
+        t = np.clip(np.where(inner <= 1.0, 0.0, np.nan_to_num(band, nan=1.0, posinf=1.0)), 0.0, 1.0)
+        return 1.0 - t * t * (3.0 - 2.0 * t) # Smoothstep
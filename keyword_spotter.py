@@ -0,0 +1,138 @@
+# keyword_spotter.py
+
+import json
+import os
+import time
+from collections import deque
+from vosk import KaldiRecognizer
+
+# Used when keywords.json is missing or has no "voice" list
+DEFAULT_VOICE_KEYWORDS = ["love", "heart", "cute", "hug", "adorable", "thank you", "thanks",
+                          "awesome", "amazing", "wow", "cool", "nice", "boss girl"]
+
+UNKNOWN_WORD = "[unk]" # Vosk filler that soaks up everything that isn't a keyword
+
+
+def load_voice_keywords(path):
+    """Reads the "voice" keyword list from a JSON config file, falling back to the defaults."""
+    if not path or not os.path.exists(path):
+        return list(DEFAULT_VOICE_KEYWORDS)
+    try:
+        with open(path, encoding="utf-8") as f:
+            keywords = json.load(f).get("voice")
+    except (OSError, ValueError, AttributeError) as e:
+        print(f"Error reading keyword config '{path}': {e}. Using default keywords.")
+        return list(DEFAULT_VOICE_KEYWORDS)
+    if not keywords:
+        return list(DEFAULT_VOICE_KEYWORDS)
+    return [str(keyword).lower().strip() for keyword in keywords if str(keyword).strip()]
+
+
+def make_recognizer(vosk_model, samplerate, keywords, use_grammar=True):
+    """
+    Builds a KaldiRecognizer. With use_grammar the decoder only considers the
+    keyword phrases plus an [unk] filler, which is much cheaper than the full
+    open-vocabulary search; without it this is the plain recognizer.
+    """
+    if not use_grammar:
+        return KaldiRecognizer(vosk_model, samplerate)
+    grammar = sorted(set(keywords)) + [UNKNOWN_WORD]
+    return KaldiRecognizer(vosk_model, samplerate, json.dumps(grammar))
+
+
+def match_keywords(text, keywords):
+    """Returns the keywords found in a recognized transcript, in keyword-list order."""
+    text = text.lower().replace(UNKNOWN_WORD, " ")
+    return [keyword for keyword in keywords if keyword in text]
+
+
+class KeywordTrigger:
+    """
+    Fires keywords from Vosk partial results as soon as they show up.
+    Each keyword fires at most once per occurrence within an utterance, so the
+    final result doesn't fire it again, and a per-keyword cooldown stops
+    repeated words from spamming effects. Keyword-to-effect latency is recorded
+    from the capture time of the audio that produced the detection.
+    """
+
+    def __init__(self, keywords, cooldown=1.5, latency_window=100):
+        self.keywords = keywords
+        self.cooldown = cooldown # Seconds between two triggers of the same keyword
+        self._fired = {} # keyword -> occurrences already handled in this utterance
+        self._last_trigger = {} # keyword -> perf_counter() of its last trigger
+        self.latencies = deque(maxlen=latency_window) # Seconds, capture -> trigger
+        self.suppressed = 0 # Detections skipped because of the cooldown
+
+    def on_partial(self, text, capture_time=None):
+        """Returns keywords newly detected in a partial transcript."""
+        return self._detect(text, capture_time)
+
+    def on_final(self, text, capture_time=None):
+        """Returns keywords the partials missed, then starts a new utterance."""
+        found = self._detect(text, capture_time)
+        self._fired.clear()
+        return found
+
+    def latency_stats(self):
+        if not self.latencies:
+            return {"samples": 0, "p50_ms": 0.0, "max_ms": 0.0, "suppressed": self.suppressed}
+        values = sorted(self.latencies)
+        return {
+            "samples": len(values),
+            "p50_ms": values[len(values) // 2] * 1000.0,
+            "max_ms": values[-1] * 1000.0,
+            "suppressed": self.suppressed,
+        }
+
+    def _detect(self, text, capture_time):
+        text = text.lower().replace(UNKNOWN_WORD, " ")
+        now = time.perf_counter()
+        found = []
+        for keyword in self.keywords:
+            count = text.count(keyword)
+            if count <= self._fired.get(keyword, 0):
+                continue
+            self._fired[keyword] = count
+            if now - self._last_trigger.get(keyword, float("-inf")) < self.cooldown:
+                self.suppressed += 1
+                continue
+            self._last_trigger[keyword] = now
+            if capture_time is not None:
+                self.latencies.append(now - capture_time)
+            found.append(keyword)
+        return found
+
+
+def run_keyword_loop(recognizer, ring, trigger, on_found, keep_running, log=print):
+    """
+    Feeds audio from a ring buffer (AudioRingBuffer or SharedAudioRing) into
+    the recognizer until keep_running() returns False. on_found(keywords) is
+    called with every batch of newly detected keywords.
+    """
+    def fire(found):
+        if found:
+            on_found(found)
+
+    while keep_running():
+        try:
+            data, segment_ended = ring.read(timeout=1)
+            capture_time = ring.last_capture_time
+            if data:
+                if recognizer.AcceptWaveform(data):
+                    text = json.loads(recognizer.Result()).get("text", "")
+                    if text:
+                        log(f"Heard: {text}")
+                    fire(trigger.on_final(text, capture_time))
+                else:
+                    # Fire mid-utterance instead of waiting for the streamer to stop talking
+                    partial = json.loads(recognizer.PartialResult()).get("partial", "")
+                    fire(trigger.on_partial(partial, capture_time))
+            if segment_ended:
+                # Gated audio has no trailing silence, so flush the utterance explicitly
+                text = json.loads(recognizer.FinalResult()).get("text", "")
+                if text:
+                    log(f"Heard: {text}")
+                fire(trigger.on_final(text, capture_time))
+        except Exception as e:
+            log(f"Error in keyword listener: {e}")
+            time.sleep(1) # Prevent spamming logs on repeated errors
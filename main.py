@@ -1,14 +1,28 @@
 import pygame
-import sounddevice as sd
 import numpy as np
 import math
 import threading
 import time
-import random
-import queue
 from yt_connect import start_chat_listener, check_keywords 
-import json
-from vosk import Model, KaldiRecognizer
+from particles import ParticleSystem, make_burst, DROP_OLDEST
+from sprite_cache import SpriteCache
+from glow import GlowRenderer
+from dirty_rects import DirtyRectRenderer
+from model_library import ModelLibrary
+from audio_frontend import AudioFrontEnd
+from audio_buffer import AudioRingBuffer, SpeechGate
+from audio_sources import open_audio_source
+from vosk import Model
+from keyword_spotter import load_voice_keywords, make_recognizer, KeywordTrigger, run_keyword_loop
+from speech_process import SpeechProcess
+from frame_profiler import FrameProfiler, ProfilerHUD
+from frame_output import make_canvas, pixel_format, open_frame_sink
+from frame_clock import FixedTimestep, FramePacer
+from startup import StartupLoader, StartupError
+from ui import Label, Button, Backdrop, Screen
+from model_switcher import ModelSwitcher, blit_faded
+from viseme import VisemeAnalyzer, VISEME_POSES, pose_for
+from scene import SceneCompositor, DEFAULT_SCENE, load_scenes, image_files
 import sys
 import os 
 
@@ -46,6 +60,25 @@ def make_cool():
 def make_human():
     change_model("human")
     print("Making model human!")
+
+# Chat keyword (see yt_connect.KEYWORDS) -> reaction
+CHAT_KEYWORD_ACTIONS = {
+    "bald": make_bald,
+    "neko": make_neko,
+    "evil": make_evil,
+    "eyes": make_googly,
+    "human": make_human,
+    "bonk": make_bonk,
+    "cheese": throw_cheese,
+    "cool": make_cool,
+}
+
+def on_chat_keyword(event):
+    """Runs the reaction for a ChatEvent drained from the chat event bus."""
+    print(f"Keyword '{event.keyword}' detected from {event.author} (x{event.count}): {event.action}")
+    action = CHAT_KEYWORD_ACTIONS.get(event.keyword)
+    if action:
+        action()
 # start_chat_listener("YOUR_VIDEO_ID") 
 # check_keywords()
 # if check_keywords().event_queue != []:
@@ -71,13 +104,43 @@ def make_human():
 # --- CONSTANTS ---
 WINDOW_HEIGHT = 800
 WINDOW_WIDTH = 800
-THRESHOLD = 12 # Mic volume threshold for talking state
+TALK_ON_THRESHOLD = 500 # Smoothed mic level (int16 RMS) that starts the talking state
+TALK_OFF_THRESHOLD = 300 # Level it has to drop below to stop talking (hysteresis)
+AUDIO_BLOCKSIZE = 256 # Samples per mic callback (256 @ 16 kHz = 16 ms)
+AUDIO_LATENCY = "low" # sounddevice input latency ('low', 'high' or seconds)
+AUDIO_INPUT = None # None = default microphone; a .wav or raw 16 kHz 16-bit .pcm/.raw path = play that file instead
+AUDIO_FILE_SPEED = 1.0 # 1.0 = real time, 2.0 = twice as fast, 0 = as fast as the keyword recognizer keeps up
+AUDIO_FILE_LOOP = False # Start the file over when it ends
+AUDIO_RING_SECONDS = 10 # Audio buffered for Vosk before the oldest is dropped
+SPEECH_PREROLL_MS = 300 # Audio before speech onset that is still sent to Vosk
+SPEECH_HANGOVER_MS = 400 # Audio after speech ends that is still sent to Vosk
+USE_KEYWORD_GRAMMAR = True # Restrict Vosk to the keyword list (False = full open-vocabulary recognizer)
+KEYWORD_COOLDOWN = 1.5 # Seconds before the same voice keyword can trigger again
+USE_SPEECH_PROCESS = True # Run Vosk in a child process (falls back to a thread if it can't start)
+PROFILER_HUD_KEY = pygame.K_F3 # Toggles the frame timing HUD
+WRITE_FRAME_TRACE = True # Dump per-frame stage timings to frame_trace.csv on exit
+TARGET_FPS = 60
+SIM_HZ = 60 # Simulation ticks per second; particle speeds and GLOW_DURATION are in ticks
+ADAPTIVE_FRAME_RATE = True # Drop to IDLE_FPS while only the breathing animation is running
+IDLE_FPS = 12
 BOUNCE_SPEED = 5
 BOUNCE_HEIGHT = 10
 BREATH_SPEED = 1
 BREATH_HEIGHT = 5
 IMAGE_SCALE = 0.8
-SPLASH_DURATION = 2000 # Milliseconds (2 seconds)
+SPLASH_DURATION = 500 # Minimum splash time in milliseconds; the menu also waits for loading to finish
+FIRST_MODEL = "nyamii" # Model shown when the game starts
+MAX_PARTICLES = 4000 # Hard cap on live particles
+PARTICLE_OVERFLOW = DROP_OLDEST # What to do when a burst doesn't fit (DROP_OLDEST / DROP_NEWEST)
+SPRITE_SCALE_BUCKETS = 16 # Pre-scaled variants per particle image (more = smoother sizes, more memory)
+SPRITE_CACHE_BYTES = 8 * 1024 * 1024 # Memory budget for pre-scaled particle images
+SOFT_GLOW = True # Glow fades out across its padding (False = hard-edged ellipse like before)
+USE_DIRTY_RECTS = True # Only clear/update the changed parts of the window in GAME (False = full redraw every frame)
+MODEL_LIBRARY_BYTES = 256 * 1024 * 1024 # Memory budget for preloaded models
+CROSSFADE_MS = 300 # Fade between models after a switch
+USE_VISEMES = True # Show mouth-shape poses (<name>Open.png, <name>Round.png, ...) picked from the mic spectrum when a model has them
+USE_AVATAR_BUNDLES = True # Memory-map precompiled <name>.nyb model bundles when present (build with avatar_bundle.py)
+FRAME_OUTPUT = None # None = green-screen window; "shm" = RGBA frames in shared memory; a path = raw frames to that pipe/FIFO/file
 
 
 
@@ -90,6 +153,7 @@ GAME = 2
 WHITE = (255, 255, 255)
 BLACK = (0, 0, 0)
 GREEN_SCREEN = (0, 255, 0) # Default background for game
+TRANSPARENT = (0, 0, 0, 0) # Game background when frames are published with alpha
 GREY = (50, 50, 50)
 LIGHT_GREY = (100, 100, 100)
 PINK = (255, 182, 193)
@@ -106,72 +170,112 @@ POPUP_Y = (WINDOW_HEIGHT - POPUP_HEIGHT) // 2
 POPUP_BORDER_WIDTH = 2
 
 # --- PYGAME INIT ---
-pygame.init()
-window = pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT))
-pygame.display.set_caption("Nyamii OBS GreenScreen")
-clock = pygame.time.Clock()
+startup = StartupLoader() # Times startup; slow loading runs on background threads behind the splash screen
+with startup.phase("pygame init + window"):
+    pygame.init()
+    if FRAME_OUTPUT:
+        # No visible window: the scene is drawn offscreen with real alpha and published.
+        # A hidden display is still needed for convert_alpha() and the event queue.
+        pygame.display.set_mode((1, 1), pygame.HIDDEN)
+        window = make_canvas((WINDOW_WIDTH, WINDOW_HEIGHT))
+        game_background = TRANSPARENT
+        frame_sink = open_frame_sink(FRAME_OUTPUT, (WINDOW_WIDTH, WINDOW_HEIGHT), pixel_format(window))
+    else:
+        window = pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT))
+        pygame.display.set_caption("Nyamii OBS GreenScreen")
+        game_background = GREEN_SCREEN
+        frame_sink = None
+sim_clock = FixedTimestep(SIM_HZ) # Animation speed independent of the frame rate
+# Raw pipe output is read as constant-rate video, so it keeps the full frame rate
+frame_pacer = FramePacer(TARGET_FPS, IDLE_FPS, adaptive=ADAPTIVE_FRAME_RATE and FRAME_OUTPUT in (None, "shm"))
+dirty_renderer = DirtyRectRenderer(window, game_background)
+scene_compositor = SceneCompositor(window, game_background) # Cached background/prop layers, see scene.py
+profiler = FrameProfiler() # Per-stage frame timings (HUD + CSV trace)
 app_start_time = pygame.time.get_ticks() # For splash screen timing
 game_start_time = 0 # Reset when game actually starts
 
 # --- FONT LOADING ---
-try:
-    font_default_L = pygame.font.SysFont(None, 72)
-    font_default_M = pygame.font.SysFont(None, 50)
-    font_default_S = pygame.font.SysFont(None, 40) 
-    font_default_XS = pygame.font.SysFont(None, 30) 
-except Exception as e:
-    print(f"Error loading system font: {e}. Using Pygame default.")
-    font_default_L = pygame.font.Font(None, 72)
-    font_default_M = pygame.font.Font(None, 50)
-    font_default_S = pygame.font.Font(None, 40)
-    font_default_XS = pygame.font.Font(None, 30)
+# Pygame's built-in font is available instantly for the splash screen;
+# the system font lookup (slow on first run) happens in load_fonts() on a startup thread.
+font_default_L = pygame.font.Font(None, 72)
+font_default_M = pygame.font.Font(None, 50)
+font_default_S = pygame.font.Font(None, 40)
+font_default_XS = pygame.font.Font(None, 30)
+font_hud = pygame.font.Font(None, 20)
+profiler_hud = ProfilerHUD(font_hud)
+
+def load_fonts():
+    """Swaps in the system fonts, keeping Pygame's default if they can't be loaded."""
+    global font_default_L, font_default_M, font_default_S, font_default_XS, font_hud
+    try:
+        fonts = [pygame.font.SysFont(None, size) for size in (72, 50, 40, 30, 20)]
+    except Exception as e:
+        print(f"Error loading system font: {e}. Using Pygame default.")
+        return
+    font_default_L, font_default_M, font_default_S, font_default_XS, font_hud = fonts
+    profiler_hud.font = font_hud
 
 # --- Model loading function ---
 
-def load_model(model_name):
-    global current_model_images, current_model_name, heart_img, sparkle_img, cheese_img
+# Pre-scaled particle images, filled by load_particle_assets()
+sprite_cache = SpriteCache(SPRITE_SCALE_BUCKETS, min_scale=0.5, max_scale=1.3, max_bytes=SPRITE_CACHE_BYTES)
+# Pre-rendered glow, rebuilt by load_model() only when the character size changes
+glow_renderer = GlowRenderer(PINK, soft=SOFT_GLOW)
+# Decoded + scaled models, prefetched in the background at startup
+model_library = ModelLibrary(pathToModelDir, IMAGE_SCALE, max_bytes=MODEL_LIBRARY_BYTES, use_bundles=USE_AVATAR_BUNDLES)
 
-    # Define paths for model and assets
-    model_folder = os.path.join(pathToModelDir, model_name)
+def load_particle_assets():
+    """Loads the heart/sparkle images once; they are shared by every model."""
+    global heart_img, sparkle_img, cheese_img
     assets_folder = os.path.join(base_path, "assets")
 
     try:
-        # Load the model images (idle and talking)
-        idle_path = os.path.join(model_folder, f"{model_name}.png")
-        talking_path = os.path.join(model_folder, f"{model_name}Talking.png")
-
-        current_idle_img = pygame.image.load(idle_path).convert_alpha()
-        current_talking_img = pygame.image.load(talking_path).convert_alpha()
-
-        # Apply scaling to the model images
-        current_idle_img = pygame.transform.scale(
-            current_idle_img, 
-            (int(current_idle_img.get_width() * IMAGE_SCALE), int(current_idle_img.get_height() * IMAGE_SCALE))
-        )
-        current_talking_img = pygame.transform.scale(
-            current_talking_img, 
-            (int(current_talking_img.get_width() * IMAGE_SCALE), int(current_talking_img.get_height() * IMAGE_SCALE))
-        )
-
-        # Update the global dictionary with the loaded and scaled images
-        current_model_images = {'idle': current_idle_img, 'talking': current_talking_img}
-
-        # Set the current model name
-        current_model_name = model_name
-        print(f"Loaded model: {model_name}")
-
-        # Load and scale the other assets
         heart_img = pygame.image.load(os.path.join(assets_folder, "heart.png")).convert_alpha()
         heart_img = pygame.transform.scale(heart_img, (int(heart_img.get_width() * 0.2), int(heart_img.get_height() * 0.2)))
 
         sparkle_img = pygame.image.load(os.path.join(assets_folder, "sparkle.png")).convert_alpha()
         sparkle_img = pygame.transform.scale(sparkle_img, (32, 32))
 
+        # Render every particle size once here instead of every frame
+        sprite_cache.set_asset("heart", heart_img)
+        sprite_cache.set_asset("sparkle", sparkle_img)
+
         #cheese_img = pygame.image.load(os.path.join(assets_folder, "cheese.png")).convert_alpha()
 
+    except (pygame.error, OSError) as e:
+        # Runs on a startup thread; the splash screen quits once it sees the failure
+        raise StartupError(f"Error loading particle images: {e}\n"
+                           f"Please ensure image files exist in '{assets_folder}/'.")
+
+def model_poses(images, extra_poses=VISEME_POSES):
+    """Idle and talking images plus whichever of `extra_poses` the model has."""
+    poses = {'idle': images['idle'], 'talking': images['talking']}
+    for pose in extra_poses or ():
+        if pose in images:
+            poses[pose] = images[pose]
+    return poses
+
+def load_model(model_name, extra_poses=VISEME_POSES):
+    """Loads a model; `extra_poses` are optional poses (e.g. mouth shapes) to use if the model has them."""
+    global current_model_images, current_model_name
+
+    model_folder = os.path.join(pathToModelDir, model_name)
+
+    try:
+        # All poses, already scaled by IMAGE_SCALE (cached after the first load)
+        images = model_library.get(model_name)
+
+        # Update the global dictionary with the loaded and scaled images
+        current_model_images = model_poses(images, extra_poses)
+        glow_renderer.prepare([img.get_size() for img in current_model_images.values()])
+
+        # Set the current model name
+        current_model_name = model_name
+        print(f"Loaded model: {model_name}")
+
     except pygame.error as e:
         print(f"Error loading model images: {e}")
-        print(f"Please ensure image files exist in '{model_folder}/' and '{assets_folder}/'.")
+        print(f"Please ensure image files exist in '{model_folder}/'.")
         pygame.quit()
         sys.exit()
 
@@ -181,7 +285,11 @@ def load_model(model_name):
 # Define base path (useful if assets are in subdirs)
 base_path = os.path.dirname(__file__) # Directory where the script is running
 nyamii_path = os.path.join(base_path, "nyamii")
+keywords_config_path = os.path.join(base_path, "keywords.json") # Voice keyword list
 assets_path = os.path.join(base_path, "assets")
+scenes_config_path = os.path.join(base_path, "scenes.json") # Scene list (backgrounds and props)
+backgrounds_path = os.path.join(assets_path, "backgrounds") # Images cycled by "Add Background"
+props_path = os.path.join(assets_path, "props") # Images added by "Add Prop"
 
 # try:
 #     idle_img = pygame.image.load(os.path.join(nyamii_path, "idle.png")).convert_alpha()
@@ -195,7 +303,15 @@ assets_path = os.path.join(base_path, "assets")
 #     pygame.quit()
 #     sys.exit()
 
-load_model("nyamii")
+def preload_first_model():
+    """Startup task: decodes the first model so initialize_model() is only a cache lookup."""
+    model_library.scan()
+    try:
+        images = model_library.get(FIRST_MODEL)
+    except (pygame.error, OSError) as e:
+        raise StartupError(f"Error loading model images: {e}\n"
+                           f"Please ensure image files exist in '{os.path.join(pathToModelDir, FIRST_MODEL)}/'.")
+    glow_renderer.prepare([img.get_size() for img in model_poses(images).values()])
 # # --- SCALE ASSETS ---
 # idle_img = pygame.transform.scale(idle_img, (int(idle_img.get_width() * IMAGE_SCALE), int(idle_img.get_height() * IMAGE_SCALE)))
 # talking_img = pygame.transform.scale(talking_img, (int(talking_img.get_width() * IMAGE_SCALE), int(talking_img.get_height() * IMAGE_SCALE)))
@@ -215,8 +331,14 @@ def update_current_model_images():
 # --- GAME VARIABLES ---
 current_model_images = {'idle': None, 'talking': None}  # Set initial values to None
 current_img = None  # Set initial value to None
-is_talking = False
-particles = []
+# Talk state is published by the mic callback and read lock-free by the render loop
+audio_frontend = AudioFrontEnd(16000, AUDIO_BLOCKSIZE, TALK_ON_THRESHOLD, TALK_OFF_THRESHOLD)
+viseme_analyzer = VisemeAnalyzer(16000) if USE_VISEMES else None # Mouth shape, published the same way
+particles = ParticleSystem(MAX_PARTICLES, PARTICLE_OVERFLOW, bottom=WINDOW_HEIGHT)
+particle_rng = np.random.default_rng()
+HEART_SPRITE = 0
+SPARKLE_SPRITE = 1
+PARTICLE_ASSETS = {HEART_SPRITE: "heart", SPARKLE_SPRITE: "sparkle"}
 glow_timer = 0
 GLOW_DURATION = 180
 global is_options_popup_open # Flag for the options popup
@@ -227,46 +349,61 @@ def initialize_model(model_name):
     global current_img
     current_img = current_model_images['idle']  # Set the initial image to the idle state
 
-initialize_model('nyamii')
 
+# Fixed-size audio ring shared between mic input and keyword listener; only speech goes in
+audio_ring = AudioRingBuffer(16000 * AUDIO_RING_SECONDS)
+speech_gate = SpeechGate(audio_ring, 16000, SPEECH_PREROLL_MS, SPEECH_HANGOVER_MS)
+# Held by the audio callback while it pushes; swapping gates takes it too, so a
+# ring that is about to be closed never has a push in flight
+speech_gate_lock = threading.Lock()
+keyword_listener_lock = threading.Lock() # start_keyword_listener() runs from startup and from start_game()
 
-# Global audio queue shared between mic input and keyword listener
-q = queue.Queue()
+model_path = os.path.join(base_path, "vosk-model-small-en-us-0.15") # Assuming model is in script dir
 
-vosk_model = None
-try:
-    # Attempt to pre-load model to avoid delay when starting game
-    model_path = os.path.join(base_path, "vosk-model-small-en-us-0.15") # Assuming model is in script dir
-    if os.path.exists(model_path):
-        vosk_model = Model(model_path)
-        print("Vosk model loaded.")
-    else:
+def load_vosk_model():
+    """Loads the Vosk model for the in-process keyword listener, or returns None."""
+    try:
+        if os.path.exists(model_path):
+            model = Model(model_path)
+            print("Vosk model loaded.")
+            return model
         print(f"Vosk model not found at '{model_path}'. Keyword listener disabled.")
-except Exception as e:
-    print(f"Error loading Vosk model: {e}")
-    vosk_model = None # Ensure it's None if loading fails
+    except Exception as e:
+        print(f"Error loading Vosk model: {e}")
+    return None # Ensure it's None if loading fails
+
+def preload_vosk_model():
+    """Startup task: loads the in-process Vosk model while the splash/menu is showing."""
+    global vosk_model
+    vosk_model = load_vosk_model()
+
+vosk_model = None
+speech_process = None # Child process hosting Vosk when USE_SPEECH_PROCESS is on
+speech_enabled = False # True while a keyword listener (thread or process) wants mic audio
 
 
 # --- AUDIO & KEYWORD FUNCTIONS ---
 def audio_callback(indata, frames, time_info, status):
     """Called by sounddevice for each audio chunk; updates talking state and queues data for Vosk."""
-    global is_talking
-    volume_norm = np.sqrt(np.mean(indata**2)) # RMS volume calculation
-    is_talking = volume_norm > THRESHOLD
-    if vosk_model:
-        q.put(bytes(indata))
+    audio_frontend.process(indata, time_info) # Smoothed level + hysteresis talk state
+    if viseme_analyzer is not None:
+        viseme_analyzer.process(indata) # Mouth shape from the spectrum (preallocated, no allocations)
+    if speech_enabled:
+        with speech_gate_lock:
+            speech_gate.push(indata, audio_frontend.snapshot.talking) # Silence never reaches Vosk
+    if frame_pacer.idle and audio_frontend.snapshot.talking:
+        frame_pacer.wake() # Leave the idle frame rate right away
 
 def start_mic_detection():
-    """Starts the sounddevice input stream in a separate thread."""
+    """Runs the audio source (mic or file, see AUDIO_INPUT) in a separate thread, feeding audio_callback()."""
     try:
-        # Context manager ensures the stream is closed automatically
-        with sd.InputStream(samplerate=16000, dtype='int16', channels=1, callback=audio_callback):
-            print("Microphone stream started.")
-            # Keep thread alive while main program runs (or until an error)
-            while threading.current_thread().is_alive():
-                time.sleep(0.1)
+        # Keep running while the main program runs (a file source also stops at its end)
+        audio_source.run(audio_callback, keep_running=lambda: threading.current_thread().is_alive())
     except Exception as e:
-        print(f"Error starting audio stream: {e}. Check mic settings/permissions.")
+        if AUDIO_INPUT is None:
+            print(f"Error starting audio stream: {e}. Check mic settings/permissions.")
+        else:
+            print(f"Error playing audio file '{AUDIO_INPUT}': {e}")
 
 def trigger_magic():
     """Creates particle effects (hearts, sparkles) and activates glow."""
@@ -276,96 +413,160 @@ def trigger_magic():
     center_y = WINDOW_HEIGHT // 2
     spawn_radius = 150 # Spawn closer to character
 
-    # Create hearts near center
-    for _ in range(60): # Reduced amount for potentially better performance
-        angle = random.uniform(0, 2 * math.pi)
-        offset_x = random.uniform(0, spawn_radius)
-        offset_y = random.uniform(-spawn_radius, spawn_radius) # Spawn slightly above too
-        particles.append({
-            "type": "heart", "img": heart_img,
-            "x": center_x + offset_x * math.cos(angle), "y": center_y + offset_y,
-            "speed_x": random.uniform(-1.0, 1.0), "speed_y": random.uniform(0.5, 2.5),
-            "timer": random.randint(100, 180), "scale": random.uniform(0.7, 1.1)
-        })
-    # Create sparkles near center
-    for _ in range(30): # Reduced amount
-        angle = random.uniform(0, 2 * math.pi)
-        offset_x = random.uniform(0, spawn_radius)
-        offset_y = random.uniform(-spawn_radius, spawn_radius)
-        particles.append({
-            "type": "sparkle", "img": sparkle_img,
-             "x": center_x + offset_x * math.cos(angle), "y": center_y + offset_y,
-            "speed_x": random.uniform(-0.8, 0.8), "speed_y": random.uniform(0.3, 1.8),
-            "timer": random.randint(80, 160), "scale": random.uniform(0.5, 1.3)
-        })
+    # Bursts are queued and merged on the render thread, so this is safe to call from the keyword threads
+    particles.emit(make_burst(particle_rng, 60, (center_x, center_y), spawn_radius, HEART_SPRITE,
+                              speed_x=(-1.0, 1.0), speed_y=(0.5, 2.5), timer=(100, 180), scale=(0.7, 1.1)))
+    particles.emit(make_burst(particle_rng, 30, (center_x, center_y), spawn_radius, SPARKLE_SPRITE,
+                              speed_x=(-0.8, 0.8), speed_y=(0.3, 1.8), timer=(80, 160), scale=(0.5, 1.3)))
+    frame_pacer.wake()
+
+def simulate(steps):
+    """Advances particles and the glow by a number of fixed simulation ticks."""
+    global glow_timer
+    particles.update(steps) # Vectorized move/cull
+    glow_timer = max(0, glow_timer - steps)
+
+def get_particle_sprite(sprite_id, scale):
+    """Returns the pre-scaled particle image for a sprite id at the given scale."""
+    return sprite_cache.get(PARTICLE_ASSETS[sprite_id], scale)
 
 def listen_for_keywords():
     """Runs in a thread, processes audio queue with Vosk, triggers effects on keywords."""
+    global vosk_model, keyword_trigger
+    if not vosk_model:
+        startup.wait("vosk model") # Still loading in the background
+    if not vosk_model:
+        vosk_model = load_vosk_model() # Fallback from the speech process loads it late
     if not vosk_model: return # Exit if model didn't load
 
-    recognizer = KaldiRecognizer(vosk_model, 16000)
-    keywords = ["love", "heart", "cute", "hug", "adorable", "thank you", "thanks",
-                "awesome", "amazing", "wow", "cool", "nice", "boss girl"]
-    print(f"Keyword listener started. Keywords: {keywords}")
-
-    while threading.current_thread().is_alive():
-        try:
-            data = q.get(timeout=1)
-            if recognizer.AcceptWaveform(data):
-                result = json.loads(recognizer.Result())
-                text = result.get("text", "").lower()
-                if text:
-                    print("Heard:", text)
-                    # Use a generator expression for slightly cleaner check
-                    if any(word in text for word in keywords):
-                        print("Keyword detected! Triggering magic...")
-                        trigger_magic()
-        except queue.Empty:
-            continue # Loop normally if no audio data after timeout
-        except Exception as e:
-            print(f"Error in keyword listener: {e}")
-            time.sleep(1) # Prevent spamming logs on repeated errors
+    keywords = load_voice_keywords(keywords_config_path)
+    recognizer = make_recognizer(vosk_model, 16000, keywords, use_grammar=USE_KEYWORD_GRAMMAR)
+    print(f"Keyword listener started ({'grammar' if USE_KEYWORD_GRAMMAR else 'open vocabulary'}). Keywords: {keywords}")
+
+    keyword_trigger = KeywordTrigger(keywords, cooldown=keyword_cooldown())
+    run_keyword_loop(recognizer, audio_ring, keyword_trigger, on_voice_keywords,
+                     keep_running=lambda: threading.current_thread().is_alive())
 
     print("Keyword listener stopped.")
 
+def keyword_cooldown():
+    """KEYWORD_COOLDOWN in wall-clock seconds: shorter for files played faster, off when as fast as possible."""
+    if AUDIO_INPUT is None:
+        return KEYWORD_COOLDOWN
+    return KEYWORD_COOLDOWN / AUDIO_FILE_SPEED if AUDIO_FILE_SPEED > 0 else 0.0
+
+def on_voice_keywords(found):
+    """Called from the keyword thread or the speech process reader with new keywords."""
+    # Audio time of the newest sample the recognizer had taken (the source may already be further along)
+    read_position = speech_process.read_position if speech_process is not None else None
+    audio_time = max(0.0, audio_source.position() - speech_gate.samples_since_read(read_position) / 16000)
+    keyword_hits.append((audio_time, found))
+    print(f"Keyword detected at {audio_time:.2f} s: {', '.join(found)}! Triggering magic...")
+    trigger_magic()
+
+def set_speech_gate(ring):
+    """Points the audio callback at a new ring; once this returns, the old ring is no longer written."""
+    global speech_gate
+    gate = SpeechGate(ring, 16000, SPEECH_PREROLL_MS, SPEECH_HANGOVER_MS)
+    with speech_gate_lock:
+        speech_gate = gate
+
+def start_keyword_listener():
+    """Starts Vosk in a child process if enabled, otherwise (or on failure) in a thread."""
+    global speech_process, speech_enabled, keyword_thread
+    with keyword_listener_lock:
+        if speech_process is not None or (keyword_thread is not None and keyword_thread.is_alive()):
+            return # Already running (the speech process is started during startup)
+        if not vosk_model and not os.path.exists(model_path):
+            print("Keyword listener disabled - Vosk model not loaded.")
+            return
+        if USE_SPEECH_PROCESS and os.path.exists(model_path):
+            keywords = load_voice_keywords(keywords_config_path)
+            proc = SpeechProcess(model_path, keywords, 16000, AUDIO_RING_SECONDS,
+                                 use_grammar=USE_KEYWORD_GRAMMAR, cooldown=keyword_cooldown())
+            if proc.start(on_voice_keywords, on_failure=fall_back_to_keyword_thread):
+                speech_process = proc
+                set_speech_gate(proc.ring)
+                speech_enabled = True
+                print("Speech process starting...")
+                return
+        set_speech_gate(audio_ring)
+        keyword_thread = threading.Thread(target=listen_for_keywords, daemon=True)
+        keyword_thread.start()
+        speech_enabled = True
+
+def fall_back_to_keyword_thread():
+    """Speech process died or never got ready: move the mic audio back in-process (before its ring is closed)."""
+    global speech_process, keyword_thread
+    print("Falling back to the in-process keyword listener.")
+    with keyword_listener_lock: # Lets a start_keyword_listener() in progress finish first
+        set_speech_gate(audio_ring)
+        speech_process = None
+        keyword_thread = threading.Thread(target=listen_for_keywords, daemon=True)
+        keyword_thread.start()
+
+def stop_keyword_listener():
+    """Stops the speech process (the keyword thread is a daemon and ends with the app)."""
+    global speech_process, speech_enabled
+    speech_enabled = False
+    if speech_process is not None:
+        proc, speech_process = speech_process, None
+        set_speech_gate(audio_ring) # Detach the callback before the shared ring is closed
+        proc.stop()
+        if proc.stats:
+            print("Speech process stats:", proc.stats)
+
+keyword_trigger = None # Set by listen_for_keywords(); holds the keyword latency stats
+
 # --- THREADS (Define placeholders; start when game begins) ---
 mic_thread = None
 keyword_thread = None
+keyword_hits = [] # (audio seconds, keywords) for every voice keyword trigger, printed on exit
+audio_source = open_audio_source(AUDIO_INPUT, 16000, AUDIO_BLOCKSIZE, AUDIO_LATENCY, AUDIO_FILE_SPEED, AUDIO_FILE_LOOP)
+if AUDIO_INPUT is not None:
+    # As fast as possible still waits for the recognizer, so a slow one doesn't make the ring drop audio
+    audio_source.backlog = lambda: len(speech_gate.ring) if speech_enabled else 0
 
 # --- DRAW FUNCTIONS ---
 
 def draw_splash_screen():
-    """Draws the initial loading splash screen."""
+    """Draws the initial loading splash screen with a progress bar for the startup tasks."""
     window.fill(GREY)
     splash_text = font_default_L.render("Nyamii Loading...", True, WHITE)
     text_rect = splash_text.get_rect(center=(WINDOW_WIDTH // 2, WINDOW_HEIGHT // 2))
     window.blit(splash_text, text_rect)
 
-def draw_main_menu(buttons, mouse_pos):
-    """Draws the main menu screen with title and buttons."""
-    window.fill(GREY)
-    title_text = font_default_L.render("Nyamii VTuber", True, WHITE) # Simplified title
-    title_rect = title_text.get_rect(center=(WINDOW_WIDTH // 2, WINDOW_HEIGHT // 3))
-    window.blit(title_text, title_rect)
+    fraction, running = startup.progress()
+    bar_rect = pygame.Rect(WINDOW_WIDTH // 2 - 200, text_rect.bottom + 30, 400, 16)
+    pygame.draw.rect(window, LIGHT_GREY, bar_rect, border_radius=8)
+    if fraction > 0:
+        pygame.draw.rect(window, PINK, (bar_rect.x, bar_rect.y, int(bar_rect.width * fraction), bar_rect.height), border_radius=8)
+    if running:
+        status_text = font_default_XS.render(f"Loading {', '.join(running)}...", True, WHITE)
+        window.blit(status_text, status_text.get_rect(center=(WINDOW_WIDTH // 2, bar_rect.bottom + 30)))
 
-    for name, rect in buttons.items():
-        color = HIGHLIGHT_COLOR if rect.collidepoint(mouse_pos) else WHITE
-        button_text = font_default_M.render(name, True, color)
-        text_rect = button_text.get_rect(center=rect.center)
-        window.blit(button_text, text_rect)
+def draw_main_menu(mouse_pos):
+    """Draws the main menu screen with title and buttons (cached text, see build_ui())."""
+    main_menu_ui.draw(window, mouse_pos)
 
 def draw_game_screen(elapsed_time):
     """Draws the main game elements: background, character, particles, glow."""
-    global current_img, glow_timer # Declare modification intent
+    global current_img, crossfade # Declare modification intent
 
-    window.fill(GREEN_SCREEN) # Default green screen
+    if USE_DIRTY_RECTS:
+        # Clears only what was drawn last frame (whole window while the popup is open)
+        dirty_renderer.begin_frame(overlay=is_options_popup_open)
+    else:
+        dirty_renderer.clear() # Scene background (green screen / transparent without one)
+    profiler.lap("clear")
 
     # Character bounce based on talking state
-    if is_talking:
-        current_img = current_model_images['talking']  # Use loaded 'talking' image
+    talking = audio_frontend.observe().talking
+    viseme = viseme_analyzer.snapshot.viseme if viseme_analyzer is not None else None
+    current_img = pose_for(current_model_images, viseme, talking) # Mouth-shape pose, 'talking' or 'idle'
+    if talking:
         bounce_offset = math.sin(elapsed_time * BOUNCE_SPEED) * BOUNCE_HEIGHT
     else:
-        current_img = current_model_images['idle']  # Use loaded 'idle' image
         bounce_offset = math.sin(elapsed_time * BREATH_SPEED) * BREATH_HEIGHT
 
     char_x = WINDOW_WIDTH // 2 - current_img.get_width() // 2
@@ -373,64 +574,41 @@ def draw_game_screen(elapsed_time):
 
     # Draw pink glow effect if active
     if glow_timer > 0:
-        glow_radius_x = current_img.get_width() // 2 + 40
-        glow_radius_y = current_img.get_height() // 2 + 40
         glow_center = (char_x + current_img.get_width() // 2, char_y + current_img.get_height() // 2)
+        dirty_renderer.mark("glow", glow_renderer.draw(window, glow_center, current_img.get_size(), glow_timer / GLOW_DURATION))
+    profiler.lap("glow")
+
+    # Draw the character image, crossfading from the previous model after a switch
+    fade = 1.0
+    if crossfade is not None:
+        fade = (time.perf_counter() - crossfade[1]) * 1000.0 / CROSSFADE_MS
+        if fade >= 1.0:
+            crossfade = None
+    if crossfade is not None:
+        old_img = pose_for(crossfade[0], viseme, talking)
+        old_pos = (WINDOW_WIDTH // 2 - old_img.get_width() // 2,
+                   WINDOW_HEIGHT // 2 - old_img.get_height() // 2 + int(bounce_offset))
+        rect = draw_character(old_img, old_pos, int(255 * (1.0 - fade)))
+        rect = rect.union(draw_character(current_img, (char_x, char_y), int(255 * fade)))
+        dirty_renderer.mark("character", rect)
+    else:
+        dirty_renderer.mark("character", draw_character(current_img, (char_x, char_y), 255))
+    profiler.lap("character")
 
-        glow_surface_size = (glow_radius_x * 2, glow_radius_y * 2)
-        glow_surface = pygame.Surface(glow_surface_size, pygame.SRCALPHA)
-
-        # Calculate alpha for fade-out effect
-        max_alpha = 150
-        current_alpha = int(max_alpha * (glow_timer / GLOW_DURATION))
-        glow_color = (PINK[0], PINK[1], PINK[2], max(0, min(current_alpha, 255)))  # Clamp alpha
-
-        pygame.draw.ellipse(glow_surface, glow_color, glow_surface.get_rect())
-
-        glow_blit_pos = (glow_center[0] - glow_radius_x, glow_center[1] - glow_radius_y)
-        window.blit(glow_surface, glow_blit_pos)
-        glow_timer -= 1
-
-    # Draw the character image
-    window.blit(current_img, (char_x, char_y))
-
-    # Update and draw particles (iterate over a copy for safe removal)
-    for particle in particles[:]:
-        particle["x"] += particle["speed_x"]
-        particle["y"] += particle["speed_y"]
-        particle["timer"] -= 1
-
-        # Simple scaling and drawing
-        scaled_img = pygame.transform.scale(particle["img"], (int(particle["img"].get_width() * particle["scale"]), int(particle["img"].get_height() * particle["scale"])))
-        window.blit(scaled_img, (int(particle["x"]), int(particle["y"])))  # Ensure int coords
-
-        # Remove particle if timer runs out or it goes off-screen (bottom)
-        if particle["timer"] <= 0 or particle["y"] > WINDOW_HEIGHT:
-            particles.remove(particle)
-
-def draw_options_popup(buttons, mouse_pos):
-    """Draws the semi-transparent overlay and the options popup menu."""
-    # Draw semi-transparent overlay
-    overlay = pygame.Surface((WINDOW_WIDTH, WINDOW_HEIGHT), pygame.SRCALPHA)
-    overlay.fill(OVERLAY_COLOR)
-    window.blit(overlay, (0, 0))
-
-    # Draw popup background and border
-    popup_rect = pygame.Rect(POPUP_X, POPUP_Y, POPUP_WIDTH, POPUP_HEIGHT)
-    pygame.draw.rect(window, POPUP_BG_COLOR, popup_rect, border_radius=10)
-    pygame.draw.rect(window, POPUP_BORDER_COLOR, popup_rect, POPUP_BORDER_WIDTH, border_radius=10)
+    # Draw particles (one batched blit); they were moved by simulate()
+    particles.draw(window, get_particle_sprite)
+    largest_w = int(max(heart_img.get_width(), sparkle_img.get_width()) * sprite_cache.max_scale) + 1
+    largest_h = int(max(heart_img.get_height(), sparkle_img.get_height()) * sprite_cache.max_scale) + 1
+    dirty_renderer.mark("particles", particles.bounds(largest_w, largest_h))
+    profiler.lap("particles")
 
-    # Draw popup title
-    title_text = font_default_XS.render("Options (Press ESC to Close)", True, WHITE)
-    title_rect = title_text.get_rect(center=(popup_rect.centerx, popup_rect.top + 30))
-    window.blit(title_text, title_rect)
+    # Front props that stay put go over everything else, but only where this frame repainted
+    scene_compositor.draw_overlay(window, dirty_renderer.pending_rects() if USE_DIRTY_RECTS else [window.get_rect()])
+    profiler.lap("scene")
 
-    # Draw buttons
-    for name, rect in buttons.items():
-        color = HIGHLIGHT_COLOR if rect.collidepoint(mouse_pos) else WHITE
-        button_text = font_default_S.render(name, True, color)
-        text_rect = button_text.get_rect(center=rect.center)
-        window.blit(button_text, text_rect)
+def draw_options_popup(mouse_pos):
+    """Draws the semi-transparent overlay and the options popup menu (composited once, see build_ui())."""
+    options_popup_ui.draw(window, mouse_pos)
 
 
 # --- Button Definitions ---
@@ -455,172 +633,316 @@ popup_buttons = {
     "Close Menu": pygame.Rect(popup_button_x, POPUP_Y + POPUP_HEIGHT - popup_button_height - 30, popup_button_width, popup_button_height) # Position Close at bottom
 }
 
+def build_ui():
+    """Creates the menu and popup widgets; called once the system fonts are loaded."""
+    global main_menu_ui, options_popup_ui, model_switcher
+    title = Label(font_default_L, "Nyamii VTuber", WHITE, center=(WINDOW_WIDTH // 2, WINDOW_HEIGHT // 3)) # Simplified title
+    main_menu_ui = Screen([Button(name, rect, font_default_M, WHITE, HIGHLIGHT_COLOR) for name, rect in menu_buttons.items()],
+                          background=GREY, labels=[title])
+
+    popup_rect = pygame.Rect(POPUP_X, POPUP_Y, POPUP_WIDTH, POPUP_HEIGHT)
+    popup_title = Label(font_default_XS, "Options (Press ESC to Close)", WHITE, center=(popup_rect.centerx, popup_rect.top + 30))
+    backdrop = Backdrop((WINDOW_WIDTH, WINDOW_HEIGHT), OVERLAY_COLOR, popup_rect, POPUP_BG_COLOR, POPUP_BORDER_COLOR,
+                        POPUP_BORDER_WIDTH, border_radius=10, title=popup_title)
+    options_popup_ui = Screen([Button(name, rect, font_default_S, WHITE, HIGHLIGHT_COLOR) for name, rect in popup_buttons.items()],
+                              background=backdrop)
+    model_switcher = ModelSwitcher(font_default_XS, lambda: model_library.names, (WINDOW_WIDTH // 2, WINDOW_HEIGHT // 3))
+
+main_menu_ui = None
+options_popup_ui = None
+
 import pygame
 import sys
 
-def change_model():
-    global current_img, current_model_images, current_model_name, is_options_popup_open
-
-    font = pygame.font.Font(None, 36)  # Use a basic font
-    input_box = pygame.Rect(WINDOW_WIDTH // 2 - 150, WINDOW_HEIGHT // 2 - 20, 300, 40)  # Define the input box
-    color_inactive = pygame.Color('lightskyblue3')  # Inactive color
-    color_active = pygame.Color('dodgerblue2')  # Active color
-    color = color_inactive
-    active = False
-    text = ''  # Initial text in the input box
-    clock = pygame.time.Clock()
-    running_input = True
-
-    while running_input:
-        window.fill(GREEN_SCREEN)  # Clear the window
-        
-        # Event handling for input box
-        for event in pygame.event.get():
+def change_model(model_name=None):
+    """Swaps to a model by name, or opens the model switcher overlay when no name is given."""
+    global is_options_popup_open
+    if model_name is None:
+        model_switcher.open()
+        is_options_popup_open = False
+        return
+    request_model_swap(model_name)
+
+def request_model_swap(model_name):
+    """Starts loading a model on the library's worker; poll_model_swap() crossfades to it when ready."""
+    global pending_model
+    if model_name not in model_library.names:
+        print(f"Unknown model '{model_name}'. Available: {', '.join(model_library.names)}")
+        return
+    if model_name == current_model_name and pending_model is None:
+        return
+    pending_model = (model_name, model_library.get_async(model_name))
+
+def poll_model_swap():
+    """Switches to a requested model once its images are loaded (never waits for them)."""
+    global pending_model, crossfade, current_model_images, current_model_name
+    if pending_model is None or not pending_model[1].done():
+        return
+    (model_name, future), pending_model = pending_model, None
+    try:
+        images = future.result()
+    except (pygame.error, OSError) as e:
+        print(f"Error loading model '{model_name}': {e}")
+        return
+    poses = model_poses(images)
+    # Here on the render thread rather than on the loader, which would race the frame drawing
+    # from these caches; keeps the current model's glow for the crossfade
+    glow_renderer.prepare([img.get_size() for img in (*current_model_images.values(), *poses.values())])
+    scene_compositor.prepare(poses.values()) # Poses with the scene's attached props
+    crossfade = (current_model_images, time.perf_counter()) # Fade out from what's on screen now
+    current_model_images = poses
+    current_model_name = model_name
+    print(f"Loaded model: {model_name}")
+
+def draw_character(img, pos, alpha):
+    """Blits a model image (with the scene's attached props) at the given opacity (0-255) and returns its rect."""
+    img, (dx, dy) = scene_compositor.character(img) # One cached surface however many props there are
+    return blit_faded(window, img, (pos[0] + dx, pos[1] + dy), alpha)
+
+def load_scene_list():
+    """Startup task: reads scenes.json and loads the first scene's images."""
+    global scenes
+    scenes = load_scenes(scenes_config_path)
+    scene_compositor.set_scene(scenes[scene_index])
+
+def apply_scene(scene):
+    """Shows a scene (or an edited one): its static layer is composited once and reused every frame."""
+    scenes[scene_index] = scene # Keep edits when cycling back to it
+    scene_compositor.set_scene(scene)
+    dirty_renderer.set_static(scene_compositor.static_layer())
+    print(f"Scene: {scene.name} ({len(scene.props)} prop(s))")
+
+def change_scene():
+    """Cycles through the scenes in scenes.json."""
+    global scene_index
+    scene_index = (scene_index + 1) % len(scenes)
+    apply_scene(scenes[scene_index])
+
+def add_background():
+    """Cycles the current scene's background through the images in assets/backgrounds/, then none."""
+    choices = image_files(backgrounds_path)
+    if not choices:
+        print(f"No background images found. Put some in '{backgrounds_path}/'.")
+        return
+    options = choices + [None]
+    current = scene_compositor.scene.background
+    background = options[(options.index(current) + 1) % len(options)] if current in options else choices[0]
+    apply_scene(scene_compositor.scene._replace(background=background))
+
+def add_prop():
+    """Attaches the next image from assets/props/ to the character."""
+    choices = image_files(props_path)
+    if not choices:
+        print(f"No prop images found. Put some in '{props_path}/'.")
+        return
+    apply_scene(scene_compositor.add_prop(choices[len(scene_compositor.scene.props) % len(choices)]))
+
+scenes = [DEFAULT_SCENE] # Replaced by load_scene_list()
+scene_index = 0
+pending_model = None # (name, Future) while a model loads in the background
+crossfade = None # (previous model images, start time) while fading to a new model
+model_switcher = None # Created in build_ui()
+def start_game():
+    """Switches to GAME and starts the mic and keyword listeners."""
+    global game_state, game_start_time, is_options_popup_open, mic_thread
+    print("Starting game...")
+    game_state = GAME
+    dirty_renderer.invalidate() # Menu was drawn over the whole window
+    game_start_time = time.time() # Reset game timer for animations
+    sim_clock.reset() # Don't fast-forward through the time spent in the menu
+    is_options_popup_open = False # Ensure popup is closed on game start
+
+    # --- START BACKGROUND THREADS ---
+    if mic_thread is None or not mic_thread.is_alive():
+         mic_thread = threading.Thread(target=start_mic_detection, daemon=True)
+         mic_thread.start()
+    start_keyword_listener() # Speech process or keyword thread
+
+def present_frame():
+    """Shows the finished frame, or publishes it when there's no window."""
+    if frame_sink:
+        frame_sink.publish(window) # Offscreen frame to shared memory / pipe
+        dirty_renderer.present(update_display=False) # Still rotates the rects for the next clear
+    elif game_state == GAME and USE_DIRTY_RECTS:
+        dirty_renderer.present() # Only the changed rects (full window under the popup)
+    else:
+        pygame.display.update()
+
+def finish_startup():
+    """Main-thread part of startup once the background tasks are done."""
+    with startup.phase("activate first model"):
+        initialize_model(FIRST_MODEL) # Cache hit: decoded by preload_first_model()
+    with startup.phase("compose scene"):
+        apply_scene(scenes[scene_index]) # Images were loaded by load_scene_list()
+        scene_compositor.prepare(current_model_images.values())
+    build_ui() # After load_fonts() so the widgets render with the system fonts
+    model_library.prefetch() # Decode the other models in the background
+
+# Importing this module (e.g. benchmarks/render_audio.py) sets up the window and state without running the app
+if __name__ == "__main__":
+    # --- STARTUP TASKS (run on background threads while the splash screen is up) ---
+    startup.add("fonts", load_fonts)
+    startup.add("particle images", load_particle_assets)
+    startup.add("first model", preload_first_model, weight=3)
+    startup.add("scenes", load_scene_list)
+    if USE_SPEECH_PROCESS:
+        startup.add("speech process", start_keyword_listener, required=False) # Vosk loads in the child meanwhile
+    else:
+        startup.add("vosk model", preload_vosk_model, required=False) # Not needed for the menu
+    startup.start()
+
+    # --- MAIN LOOP ---
+    running = True
+    game_state = SPLASH
+
+    while running:
+        profiler.begin_frame()
+        mouse_pos = pygame.mouse.get_pos()
+        events = pygame.event.get() # Get events once per frame
+
+        # --- Global Event Handling (Applies to all states) ---
+        for event in events:
             if event.type == pygame.QUIT:
-                pygame.quit()
-                sys.exit()
-            if event.type == pygame.MOUSEBUTTONDOWN:
-                # Toggle active status of the input box when clicked
-                if input_box.collidepoint(event.pos):
-                    active = True
+                running = False
+            elif event.type == pygame.KEYDOWN and event.key == PROFILER_HUD_KEY:
+                profiler_hud.toggle()
+
+        # --- State-Specific Logic & Event Handling ---
+        if game_state == SPLASH:
+            draw_splash_screen()
+            profiler.lap("splash")
+            if startup.ready() and pygame.time.get_ticks() - app_start_time > SPLASH_DURATION:
+                if startup.failure(): # Already logged by the startup task
+                    pygame.quit()
+                    sys.exit()
+                finish_startup()
+                if frame_sink:
+                    start_game() # Nobody can click through the menu without a window
                 else:
-                    active = False
-                color = color_active if active else color_inactive
-            if event.type == pygame.KEYDOWN:
-                if active:
-                    if event.key == pygame.K_RETURN:
-                        # When Enter is pressed, attempt to load the model
-                        if text:  # Check if there's text in the box
-                            load_model(text)  # Load the model based on the text input
-                            print(f"Model changed to: {text}")
-                            is_options_popup_open = False  # Close options popup
-                            running_input = False  # Exit the input loop
-                            return  # Return to main game loop
-                    elif event.key == pygame.K_BACKSPACE:
-                        text = text[:-1]  # Handle backspace to delete characters
-                    elif event.key == pygame.K_ESCAPE:
-                        # Allow ESC to cancel input and return to game
-                        running_input = False
-                        return
-                    else:
-                        text += event.unicode  # Add typed character to text
-
-        # Render prompt text
-        prompt_text = font.render("Enter model name:", True, WHITE)
-        window.blit(prompt_text, (WINDOW_WIDTH // 2 - 150, WINDOW_HEIGHT // 2 - 60))
-
-        # Render the text and input box
-        txt_surface = font.render(text, True, color)
-        width = max(300, txt_surface.get_width() + 10)
-        input_box.w = width
-        window.blit(txt_surface, (input_box.x + 5, input_box.y + 5))
-        pygame.draw.rect(window, color, input_box, 2)  # Draw the input box border
-        
-        # Update the display
-        pygame.display.flip()
-        clock.tick(30)  # Set frame rate to 30 fps
-# --- MAIN LOOP ---
-running = True
-game_state = SPLASH
-
-while running:
-    mouse_pos = pygame.mouse.get_pos()
-    events = pygame.event.get() # Get events once per frame
-
-    # --- Global Event Handling (Applies to all states) ---
-    for event in events:
-        if event.type == pygame.QUIT:
-            running = False
-
-    # --- State-Specific Logic & Event Handling ---
-    if game_state == SPLASH:
-        draw_splash_screen()
-        if pygame.time.get_ticks() - app_start_time > SPLASH_DURATION:
-            game_state = MENU
-
-    elif game_state == MENU:
-        for event in events: # Process events specific to MENU
-            if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
-                if menu_buttons["Start"].collidepoint(mouse_pos):
-                    print("Starting game...")
-                    game_state = GAME
-                    game_start_time = time.time() # Reset game timer for animations
-                    is_options_popup_open = False # Ensure popup is closed on game start
-
-                    # --- START BACKGROUND THREADS ---
-                    if mic_thread is None or not mic_thread.is_alive():
-                         mic_thread = threading.Thread(target=start_mic_detection, daemon=True)
-                         mic_thread.start()
-                    if vosk_model and (keyword_thread is None or not keyword_thread.is_alive()):
-                         keyword_thread = threading.Thread(target=listen_for_keywords, daemon=True)
-                         keyword_thread.start()
-                    elif not vosk_model:
-                        print("Keyword listener disabled - Vosk model not loaded.")
-
-                elif menu_buttons["Quit"].collidepoint(mouse_pos):
-                    running = False
-        # Drawing for MENU state
-        draw_main_menu(menu_buttons, mouse_pos)
-
-
-    elif game_state == GAME:
-        # --- GAME Event Handling ---
-        for event in events:
-            if event.type == pygame.KEYDOWN:
-                if event.key == pygame.K_ESCAPE:
-                    is_options_popup_open = not is_options_popup_open # Toggle popup
-                    print(f"Options Popup: {'Open' if is_options_popup_open else 'Closed'}")
-
+                    game_state = MENU
+
+        elif game_state == MENU:
+            for event in events: # Process events specific to MENU
+                if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
+                    if menu_buttons["Start"].collidepoint(mouse_pos):
+                        start_game()
+
+                    elif menu_buttons["Quit"].collidepoint(mouse_pos):
+                        running = False
+            # Drawing for MENU state
+            draw_main_menu(mouse_pos)
+            profiler.lap("menu_ui")
+
+
+        elif game_state == GAME:
+            # --- GAME Event Handling ---
+            for event in events:
+                if model_switcher.is_open:
+                    # The switcher gets the keyboard while it's open (Esc closes it, not the popup)
+                    chosen_model = model_switcher.handle_event(event)
+                    if chosen_model:
+                        change_model(chosen_model)
+                    continue
+
+                if event.type == pygame.KEYDOWN:
+                    if event.key == pygame.K_ESCAPE:
+                        is_options_popup_open = not is_options_popup_open # Toggle popup
+                        print(f"Options Popup: {'Open' if is_options_popup_open else 'Closed'}")
+
+                if is_options_popup_open:
+                     if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
+                        clicked_on_button = False
+                        # Check clicks on popup buttons
+                        for name, rect in popup_buttons.items():
+                            if rect.collidepoint(mouse_pos):
+                                print(f"Popup Option Clicked: {name}")
+                                # --- Placeholder Actions ---
+                                if name == "Close Menu":
+                                    is_options_popup_open = False
+                                elif name == "Switch Model":
+                                    change_model() # Opens the switcher overlay; the scene keeps running
+                                    is_options_popup_open = False # Close after action (optional)
+                                elif name == "Add Prop":
+                                    add_prop()
+                                    is_options_popup_open = False
+                                elif name == "Add Background":
+                                    add_background()
+                                    is_options_popup_open = False
+                                elif name == "Change Scene":
+                                    change_scene()
+                                    is_options_popup_open = False
+                                clicked_on_button = True
+                                break # Exit loop once a button is clicked
+
+                        # If click was not on a button, check if it was outside the popup rect
+                        if not clicked_on_button:
+                             popup_rect = pygame.Rect(POPUP_X, POPUP_Y, POPUP_WIDTH, POPUP_HEIGHT)
+                             if not popup_rect.collidepoint(mouse_pos):
+                                 is_options_popup_open = False # Close if clicked outside
+                                 print("Clicked outside popup, closing.")
+
+
+
+
+            # Chat keywords (if a chat listener is running) can swap models too
+            for chat_event in check_keywords():
+                on_chat_keyword(chat_event)
+            poll_model_swap() # Switch once a requested model has finished loading
+            profiler.lap("events")
+
+            simulate(sim_clock.advance()) # Fixed ticks for the real time since the last frame
+            profiler.lap("simulate")
+
+            # --- GAME Drawing Logic ---
+            elapsed_time = time.time() - game_start_time
+            draw_game_screen(elapsed_time)
+
+            # Draw popup on top if it's open
             if is_options_popup_open:
-                 if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
-                    clicked_on_button = False
-                    # Check clicks on popup buttons
-                    for name, rect in popup_buttons.items():
-                        if rect.collidepoint(mouse_pos):
-                            print(f"Popup Option Clicked: {name}")
-                            # --- Placeholder Actions ---
-                            if name == "Close Menu":
-                                is_options_popup_open = False
-                            elif name == "Switch Model":
-                                change_model()
-                                is_options_popup_open = False # Close after action (optional)
-                            elif name == "Add Prop":
-                                print("Action: Implement prop adding logic")
-                                is_options_popup_open = False
-                            elif name == "Add Background":
-                                print("Action: Implement background adding logic")
-                                is_options_popup_open = False
-                            elif name == "Change Scene":
-                                print("Action: Implement scene changing logic")
-                                is_options_popup_open = False
-                            clicked_on_button = True
-                            break # Exit loop once a button is clicked
-
-                    # If click was not on a button, check if it was outside the popup rect
-                    if not clicked_on_button:
-                         popup_rect = pygame.Rect(POPUP_X, POPUP_Y, POPUP_WIDTH, POPUP_HEIGHT)
-                         if not popup_rect.collidepoint(mouse_pos):
-                             is_options_popup_open = False # Close if clicked outside
-                             print("Clicked outside popup, closing.")
-
-            
-
-
-        # --- GAME Drawing Logic ---
-        elapsed_time = time.time() - game_start_time
-        draw_game_screen(elapsed_time)
-
-        # Draw popup on top if it's open
-        if is_options_popup_open:
-            draw_options_popup(popup_buttons, mouse_pos)
-
-
-    # --- Update Display ---
-    pygame.display.update()
-    clock.tick(60) # Cap FPS at 60
-
-# --- Cleanup ---
-print("Exiting application...")
-pygame.quit()
-print("Pygame quit.")
-sys.exit()
\ No newline at end of file
+                draw_options_popup(mouse_pos)
+                profiler.lap("popup_ui")
+            if model_switcher.is_open:
+                dirty_renderer.mark("switcher", model_switcher.draw(window))
+                profiler.lap("switcher_ui")
+
+        # --- Profiler HUD ---
+        hud_lines = (f"particles {len(particles)}   audio queue {len(speech_gate.ring)}" + ("   idle" if frame_pacer.idle else ""),
+                     f"ui text renders {Label.renders}   scene builds {scene_compositor.builds}")
+        dirty_renderer.mark("hud", profiler_hud.draw(window, profiler, hud_lines))
+        profiler.lap("hud")
+
+        # --- Update Display ---
+        present_frame()
+        profiler.lap("display")
+        startup.frame_drawn()
+        # Full rate while anything moves; idle rate when only breathing (speech/effects wake it early)
+        busy = (game_state != GAME or is_options_popup_open or glow_timer > 0 or len(particles) > 0
+                or audio_frontend.snapshot.talking or model_switcher.is_open or pending_model or crossfade)
+        frame_pacer.wait(busy)
+        profiler.lap("wait")
+        profiler.end_frame()
+
+    # --- Cleanup ---
+    print("Exiting application...")
+    if audio_frontend.latency_stats()["samples"]:
+        print("Audio callback-to-frame latency:", audio_frontend.latency_stats())
+    if frame_pacer.frames:
+        print("Frame pacing:", frame_pacer.stats())
+    if speech_gate.total:
+        print("Speech gate:", speech_gate.stats())
+    if keyword_trigger:
+        print("Voice keyword-to-effect latency:", keyword_trigger.latency_stats())
+    if audio_source.position():
+        print("Audio input:", audio_source.stats())
+    if keyword_hits:
+        print("Voice keyword hits:", ", ".join(f"{', '.join(found)} at {t:.2f} s" for t, found in keyword_hits))
+    stop_keyword_listener()
+    if frame_sink:
+        print("Frame output:", frame_sink.stats())
+        frame_sink.close()
+    if WRITE_FRAME_TRACE and profiler.frames:
+        trace_path = os.path.join(base_path, "frame_trace.csv")
+        print(f"Wrote {profiler.write_csv(trace_path)} frames to {trace_path}")
+    pygame.quit()
+    print("Pygame quit.")
+    sys.exit()
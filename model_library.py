@@ -0,0 +1,161 @@
+# model_library.py
+
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+import pygame
+from avatar_bundle import BUNDLE_EXT, BundleError, bundle_path, load_bundle, pose_files
+
+MAX_LIBRARY_BYTES = 256 * 1024 * 1024 # Decoded + scaled model surfaces kept in memory (256 MB)
+
+
+class ModelLibrary:
+    """
+    Decoded and scaled model images, kept in a memory-bounded LRU.
+    A model is a folder <models_dir>/<name>/ with <name>.png and <name>Talking.png,
+    any extra <name><Pose>.png poses (e.g. the mouth shapes in viseme.py), and optionally
+    a precompiled <name>.nyb bundle (see avatar_bundle.py) that is memory-mapped instead
+    of decoding the PNGs.
+    prefetch() loads every model on a worker thread so later swaps are just a lookup.
+    """
+
+    def __init__(self, models_dir, scale, max_bytes=MAX_LIBRARY_BYTES, use_bundles=True):
+        self.models_dir = models_dir
+        self.scale = scale
+        self.max_bytes = max_bytes
+        self.use_bundles = use_bundles
+        self.names = []
+
+        self._cache = OrderedDict() # name -> {'idle': Surface, 'talking': Surface, <extra pose>: Surface}
+        self._lock = threading.Lock()
+        self.bytes_used = 0
+        self.hits = 0
+        self.misses = 0
+        self.bundle_loads = 0
+        self.png_loads = 0
+        self._prefetch_thread = None
+        self._executor = None # Created on the first get_async()
+
+    def scan(self):
+        """Finds every model folder that has an idle image or a bundle."""
+        names = []
+        if os.path.isdir(self.models_dir):
+            for entry in sorted(os.listdir(self.models_dir)):
+                folder = os.path.join(self.models_dir, entry)
+                if (os.path.isfile(os.path.join(folder, f"{entry}.png")) or
+                        os.path.isfile(os.path.join(folder, f"{entry}{BUNDLE_EXT}"))):
+                    names.append(entry)
+        self.names = names
+        return names
+
+    def prefetch(self, names=None):
+        """Starts loading models on a background thread (all scanned models by default)."""
+        if names is None:
+            names = self.names or self.scan()
+        self._prefetch_thread = threading.Thread(target=self._prefetch, args=(list(names),), daemon=True)
+        self._prefetch_thread.start()
+        return self._prefetch_thread
+
+    def get(self, name):
+        """Returns the model images, loading them now on a cache miss. Raises pygame.error/OSError on bad files."""
+        with self._lock:
+            images = self._cache.get(name)
+            if images is not None:
+                self.hits += 1
+                self._cache.move_to_end(name)
+                return images
+            self.misses += 1
+        images = self._load(name)
+        self._store(name, images)
+        return images
+
+    def get_async(self, name, then=None):
+        """
+        Loads a model on a worker thread and returns a Future with its images.
+        `then(images)` runs on the worker after loading (e.g. to pre-render
+        things that depend on the image sizes). Cached models resolve at once.
+        """
+        if then is None and self.is_loaded(name):
+            future = Future()
+            future.set_result(self.get(name))
+            return future
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="model-load")
+
+        def load():
+            loaded = self.get(name)
+            if then is not None:
+                then(loaded)
+            return loaded
+        return self._executor.submit(load)
+
+    def is_loaded(self, name):
+        with self._lock:
+            return name in self._cache
+
+    def stats(self):
+        with self._lock:
+            return {
+                "models": len(self._cache),
+                "bytes": self.bytes_used,
+                "hits": self.hits,
+                "misses": self.misses,
+                "bundle_loads": self.bundle_loads,
+                "png_loads": self.png_loads,
+            }
+
+    def _prefetch(self, names):
+        for name in names:
+            if self.is_loaded(name):
+                continue
+            try:
+                images = self._load(name)
+            except (pygame.error, OSError) as e:
+                print(f"Prefetch skipped model '{name}': {e}")
+                continue
+            with self._lock:
+                # Don't push out models that are already cached just to prefetch more
+                if self.bytes_used + _images_bytes(images) > self.max_bytes:
+                    print(f"Model library full, stopped prefetching at '{name}'.")
+                    return
+            self._store(name, images)
+        print(f"Model library ready: {len(self._cache)} model(s) preloaded.")
+
+    def _load(self, name):
+        if self.use_bundles:
+            path = bundle_path(self.models_dir, name)
+            try:
+                images = load_bundle(path, self.scale)
+                self.bundle_loads += 1
+                return images
+            except FileNotFoundError:
+                pass
+            except (BundleError, OSError, ValueError) as e:
+                print(f"Ignoring bundle for '{name}' ({e}); loading PNGs. Rebuild with avatar_bundle.py.")
+
+        folder = os.path.join(self.models_dir, name)
+        sources = pose_files(self.models_dir, name)
+        for pose, required in (("idle", f"{name}.png"), ("talking", f"{name}Talking.png")):
+            if pose not in sources:
+                raise FileNotFoundError(f"No '{required}' in {folder}")
+        images = {pose: self._scaled(pygame.image.load(path).convert_alpha()) for pose, path in sources.items()}
+        self.png_loads += 1
+        return images
+
+    def _scaled(self, img):
+        return pygame.transform.scale(img, (int(img.get_width() * self.scale), int(img.get_height() * self.scale)))
+
+    def _store(self, name, images):
+        with self._lock:
+            if name in self._cache:
+                self.bytes_used -= _images_bytes(self._cache.pop(name))
+            self._cache[name] = images
+            self.bytes_used += _images_bytes(images)
+            while self.bytes_used > self.max_bytes and len(self._cache) > 1:
+                _, evicted = self._cache.popitem(last=False)
+                self.bytes_used -= _images_bytes(evicted)
+
+
+def _images_bytes(images):
+    return sum(img.get_width() * img.get_height() * img.get_bytesize() for img in images.values())
@@ -0,0 +1,115 @@
+# model_switcher.py
+
+import pygame
+from ui import Label
+
+MAX_SUGGESTIONS = 5
+
+
+def blit_faded(target, image, pos, alpha):
+    """
+    Blits an image at `alpha` (0-255) of its opacity and returns the rect.
+    Model images are shared with the ModelLibrary and the scene compositor,
+    so the fade goes into a copy instead of the image's own surface alpha
+    (set_alpha(None) afterwards would also drop its per-pixel alpha).
+    """
+    if alpha >= 255:
+        return target.blit(image, pos)
+    faded = image.copy()
+    faded.fill((255, 255, 255, max(0, alpha)), special_flags=pygame.BLEND_RGBA_MULT)
+    return target.blit(faded, pos)
+
+
+class ModelSwitcher:
+    """
+    Model name prompt drawn over the running scene. It never takes over the
+    main loop: the game feeds it events and draws it each frame while it's
+    open. Typing filters the available models (prefix matches first, then
+    substring matches), Tab completes, Up/Down pick a suggestion, Enter
+    chooses and Esc cancels. Text is rendered only when it changes.
+    """
+
+    def __init__(self, font, get_names, center, width=440, color=(255, 255, 255),
+                 highlight_color=(255, 182, 193), panel_color=(40, 40, 60, 220), border_color=(150, 150, 180)):
+        self.font = font
+        self.get_names = get_names # Callable returning the available model names
+        self.color = color
+        self.highlight_color = highlight_color
+        self.panel_color = panel_color
+        self.border_color = border_color
+        self.is_open = False
+        self.text = ""
+        self.selected = 0
+
+        line = font.get_linesize()
+        height = line * (MAX_SUGGESTIONS + 2) + 30
+        self.rect = pygame.Rect(0, 0, width, height)
+        self.rect.center = center
+        self._panel = None
+        self._prompt = Label(font, "Switch model (Tab completes, Esc cancels):", color,
+                             topleft=(self.rect.x + 12, self.rect.y + 10))
+        self._input = Label(font, "", highlight_color, topleft=(self.rect.x + 12, self.rect.y + 14 + line))
+        self._rows = [Label(font, "", color, topleft=(self.rect.x + 24, self.rect.y + 20 + line * (i + 2)))
+                      for i in range(MAX_SUGGESTIONS)]
+
+    def open(self):
+        self.is_open = True
+        self.text = ""
+        self.selected = 0
+
+    def close(self):
+        self.is_open = False
+
+    def suggestions(self):
+        query = self.text.strip().lower()
+        names = sorted(self.get_names())
+        prefix = [name for name in names if name.lower().startswith(query)]
+        contains = [name for name in names if query and query in name.lower() and name not in prefix]
+        return (prefix + contains)[:MAX_SUGGESTIONS]
+
+    def handle_event(self, event):
+        """Processes one event while open. Returns the chosen model name, or None."""
+        if event.type != pygame.KEYDOWN:
+            return None
+        suggestions = self.suggestions()
+        if event.key == pygame.K_ESCAPE:
+            self.close()
+        elif event.key in (pygame.K_RETURN, pygame.K_KP_ENTER):
+            choice = suggestions[self.selected] if suggestions else self.text.strip()
+            self.close()
+            return choice or None
+        elif event.key == pygame.K_TAB:
+            if suggestions:
+                self.text = suggestions[self.selected]
+                self.selected = 0
+        elif event.key == pygame.K_UP:
+            self.selected = max(0, self.selected - 1)
+        elif event.key == pygame.K_DOWN:
+            self.selected = min(max(0, len(suggestions) - 1), self.selected + 1)
+        elif event.key == pygame.K_BACKSPACE:
+            self.text = self.text[:-1]
+            self.selected = 0
+        elif event.unicode and event.unicode.isprintable():
+            self.text += event.unicode
+            self.selected = 0
+        return None
+
+    def draw(self, target):
+        """Draws the prompt and returns the rect it covered."""
+        if self._panel is None:
+            self._panel = pygame.Surface(self.rect.size, pygame.SRCALPHA)
+            pygame.draw.rect(self._panel, self.panel_color, self._panel.get_rect(), border_radius=10)
+            pygame.draw.rect(self._panel, self.border_color, self._panel.get_rect(), 2, border_radius=10)
+        target.blit(self._panel, self.rect)
+        self._prompt.draw(target)
+        self._input.set_text(self.text + "_")
+        self._input.draw(target)
+
+        suggestions = self.suggestions()
+        for i, row in enumerate(self._rows):
+            if i >= len(suggestions):
+                break
+            row.set_text(suggestions[i])
+            row.set_color(self.highlight_color if i == self.selected else self.color)
+            row.draw(target)
+        return self.rect
@@ -0,0 +1,171 @@
+# particles.py
+
+import threading
+import numpy as np
+
+# Overflow policies for when a spawn would go past the capacity
+DROP_OLDEST = "drop_oldest" # Evict the oldest live particles to make room
+DROP_NEWEST = "drop_newest" # Discard the part of the spawn that doesn't fit
+
+MAX_PARTICLES = 4000 # Hard cap on live particles
+
+
+class ParticleSystem:
+    """
+    Particles stored as one NumPy array per field instead of a list of dicts.
+    Live particles are packed into [0:count], oldest first, so culling is a
+    single boolean-mask compaction and drop-oldest is a slice shift.
+    """
+
+    def __init__(self, capacity=MAX_PARTICLES, overflow=DROP_OLDEST, bottom=None):
+        if overflow not in (DROP_OLDEST, DROP_NEWEST):
+            raise ValueError(f"Unknown overflow policy: {overflow}")
+        self.capacity = capacity
+        self.overflow = overflow
+        self.bottom = bottom # Particles below this y are culled (None = never)
+
+        self.pos = np.zeros((capacity, 2), dtype=np.float32)
+        self.vel = np.zeros((capacity, 2), dtype=np.float32)
+        self.timer = np.zeros(capacity, dtype=np.int32)
+        self.scale = np.zeros(capacity, dtype=np.float32)
+        self.sprite = np.zeros(capacity, dtype=np.int16)
+        self.count = 0
+        self.dropped = 0 # Particles lost to the overflow policy
+
+        # Spawns can come from the keyword/chat threads, so they are parked
+        # here and only merged into the arrays on the render thread.
+        self._pending = []
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return self.count
+
+    def emit(self, batch):
+        """Queues a spawn batch (see make_burst). Safe to call from any thread."""
+        with self._lock:
+            self._pending.append(batch)
+
+    def clear(self):
+        with self._lock:
+            self._pending.clear()
+        self.count = 0
+
+    def _take_pending(self):
+        with self._lock:
+            pending, self._pending = self._pending, []
+        return pending
+
+    def _append(self, batch):
+        n = len(batch["timer"])
+        free = self.capacity - self.count
+        if n > free:
+            if self.overflow == DROP_NEWEST:
+                self.dropped += n - free
+                batch = {key: value[:free] for key, value in batch.items()}
+                n = free
+            else:
+                if n > self.capacity:
+                    # Bigger than the whole pool: only the newest part survives
+                    self.dropped += n - self.capacity
+                    batch = {key: value[n - self.capacity:] for key, value in batch.items()}
+                    n = self.capacity
+                evict = n - free
+                self.dropped += evict
+                keep = self.count - evict
+                for field in (self.pos, self.vel, self.timer, self.scale, self.sprite):
+                    field[:keep] = field[evict:self.count]
+                self.count = keep
+        if n <= 0:
+            return
+
+        start, end = self.count, self.count + n
+        self.pos[start:end] = batch["pos"]
+        self.vel[start:end] = batch["vel"]
+        self.timer[start:end] = batch["timer"]
+        self.scale[start:end] = batch["scale"]
+        self.sprite[start:end] = batch["sprite"]
+        self.count = end
+
+    def update(self, steps=1):
+        """
+        Merges pending spawns, moves every particle `steps` simulation ticks and
+        culls dead ones. Motion is linear, so several ticks are one multiply-add.
+        """
+        for batch in self._take_pending():
+            self._append(batch)
+
+        n = self.count
+        if n == 0 or steps <= 0:
+            return
+
+        if steps == 1:
+            self.pos[:n] += self.vel[:n]
+        else:
+            self.pos[:n] += self.vel[:n] * steps
+        self.timer[:n] -= steps
+
+        alive = self.timer[:n] > 0
+        if self.bottom is not None:
+            alive &= self.pos[:n, 1] <= self.bottom
+        if alive.all():
+            return
+
+        # Compact survivors to the front, keeping their order (oldest first)
+        for field in (self.pos, self.vel, self.timer, self.scale, self.sprite):
+            survivors = field[:n][alive]
+            field[:len(survivors)] = survivors
+        self.count = int(np.count_nonzero(alive))
+
+    def bounds(self, sprite_width, sprite_height):
+        """
+        Bounding box (x, y, w, h) of all live particles, or None if there are none.
+        sprite_width/height should be the largest image a particle can be drawn with.
+        """
+        n = self.count
+        if n == 0:
+            return None
+        low = np.floor(self.pos[:n].min(axis=0))
+        high = np.ceil(self.pos[:n].max(axis=0))
+        return (int(low[0]), int(low[1]),
+                int(high[0] - low[0]) + sprite_width, int(high[1] - low[1]) + sprite_height)
+
+    def draw(self, surface, get_sprite):
+        """
+        Draws all live particles with a single Surface.blits() call.
+        get_sprite(sprite_id, scale) must return the image to blit.
+        """
+        n = self.count
+        if n == 0:
+            return
+        coords = self.pos[:n].astype(np.int32).tolist()
+        sprite_ids = self.sprite[:n].tolist()
+        scales = self.scale[:n].tolist()
+        surface.blits(
+            [(get_sprite(sprite_id, scale), xy) for sprite_id, scale, xy in zip(sprite_ids, scales, coords)],
+            doreturn=False
+        )
+
+
+def make_burst(rng, count, center, radius, sprite_id, speed_x, speed_y, timer, scale):
+    """
+    Builds a spawn batch of `count` particles scattered around `center`.
+    speed_x, speed_y, timer and scale are (low, high) ranges; timer is inclusive.
+    """
+    angle = rng.uniform(0, 2 * np.pi, count)
+    offset_x = rng.uniform(0, radius, count)
+    offset_y = rng.uniform(-radius, radius, count) # Spawn slightly above too
+
+    pos = np.empty((count, 2), dtype=np.float32)
+    pos[:, 0] = center[0] + offset_x * np.cos(angle)
+    pos[:, 1] = center[1] + offset_y
+    vel = np.empty((count, 2), dtype=np.float32)
+    vel[:, 0] = rng.uniform(speed_x[0], speed_x[1], count)
+    vel[:, 1] = rng.uniform(speed_y[0], speed_y[1], count)
+
+    return {
+        "pos": pos,
+        "vel": vel,
+        "timer": rng.integers(timer[0], timer[1], count, endpoint=True).astype(np.int32),
+        "scale": rng.uniform(scale[0], scale[1], count).astype(np.float32),
+        "sprite": np.full(count, sprite_id, dtype=np.int16),
+    }
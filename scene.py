@@ -0,0 +1,248 @@
+# scene.py
+
+import json
+import os
+from collections import namedtuple
+import numpy as np
+import pygame
+
+# A prop image. Attached props move with the character and `position` is the
+# offset of their center from the character's center; other props stay put
+# and `position` is their center in the window. `layer` is "back" (behind the
+# character) or "front" (in front of it). Attached props are baked into the
+# character's composite, so particles fly over them; front props that stay
+# put are drawn last, over the particles too.
+Prop = namedtuple("Prop", "image position layer attached scale")
+
+# `background` is an image path (scaled to cover the window) or None;
+# `color` fills the window under it (None = the game's green screen / transparency).
+Scene = namedtuple("Scene", "name background color props")
+
+DEFAULT_SCENE = Scene("Green screen", None, None, ())
+LAYERS = ("back", "front")
+# Where "Add Prop" puts new props, relative to the character's center (cycled)
+PROP_SLOTS = ((0, -260), (-200, -60), (200, -60), (-160, 180), (160, 180), (0, 120))
+
+
+def load_scenes(path):
+    """Reads the scene list from a JSON file, falling back to the plain green screen."""
+    if not path or not os.path.exists(path):
+        return [DEFAULT_SCENE]
+    folder = os.path.dirname(os.path.abspath(path))
+    try:
+        with open(path, encoding="utf-8") as f:
+            entries = json.load(f).get("scenes")
+        scenes = [_parse_scene(entry, folder) for entry in entries or ()]
+    except (OSError, ValueError, AttributeError, TypeError, KeyError) as e:
+        print(f"Error reading scene config '{path}': {e}. Using the green screen.")
+        return [DEFAULT_SCENE]
+    return scenes or [DEFAULT_SCENE]
+
+
+def _parse_scene(entry, folder):
+    def resolve(image):
+        return image if os.path.isabs(image) else os.path.join(folder, image)
+
+    props = []
+    for prop in entry.get("props", ()):
+        layer = prop.get("layer", "front")
+        if layer not in LAYERS:
+            raise ValueError(f"prop layer must be one of {LAYERS}, not '{layer}'")
+        attached = prop.get("attach") == "character"
+        position = prop.get("offset" if attached else "position", (0, 0))
+        props.append(Prop(resolve(prop["image"]), tuple(position), layer, attached, float(prop.get("scale", 1.0))))
+    background = entry.get("background")
+    color = entry.get("color")
+    return Scene(entry.get("name", "Scene"), resolve(background) if background else None,
+                 tuple(color) if color else None, tuple(props))
+
+
+def image_files(folder):
+    """Image paths in a folder, sorted (empty if the folder doesn't exist)."""
+    if not os.path.isdir(folder):
+        return []
+    return [os.path.join(folder, entry) for entry in sorted(os.listdir(folder))
+            if os.path.splitext(entry)[1].lower() in (".png", ".jpg", ".jpeg", ".bmp")]
+
+
+class SceneCompositor:
+    """
+    Draws a Scene around the character. Everything that doesn't move is
+    composited once and cached until the scene changes:
+    - the static layer (fill color, background, "back" props) in the window's
+      pixel format, used to clear the window (see DirtyRectRenderer.set_static);
+    - one surface per character pose with its attached props baked in, so a
+      dozen props still cost one blit per frame (drawn before the particles);
+    - one overlay surface with the "front" props that stay put, drawn after
+      the particles and only where the frame changed.
+    """
+
+    def __init__(self, target, base_color):
+        self.target = target # Window or canvas the layers are built for
+        self.base_color = base_color
+        self.scene = DEFAULT_SCENE
+        self._images = {} # (path, scale) -> Surface, kept across scenes
+        self._static = None
+        self._overlay = None # (Surface, Rect) or None
+        self._overlay_built = False
+        self._characters = {} # pose Surface -> (composite Surface, offset)
+        self.builds = 0 # Static/overlay/character composites built (shown in the profiler HUD)
+
+    def set_scene(self, scene):
+        """Switches scenes (or applies an edited one). Loads any new images now."""
+        for prop in scene.props:
+            self._image(prop.image, prop.scale)
+        if scene.background:
+            self._image(scene.background, 1.0)
+        self.scene = scene
+        self._static = None
+        self._overlay = None
+        self._overlay_built = False
+        self._characters = {}
+
+    def static_layer(self):
+        """The background, "back" props and fill color as one surface, built on first use."""
+        if self._static is None:
+            self._static = self._build_static()
+            self.builds += 1
+        return self._static
+
+    def character(self, image):
+        """(surface, offset) to blit for a pose: the image itself, or a cached composite with attached props."""
+        if not any(prop.attached for prop in self.scene.props):
+            return image, (0, 0)
+        cached = self._characters.get(image)
+        if cached is None:
+            cached = self._build_character(image)
+            if len(self._characters) >= 32: # Poses of models no longer shown
+                self._characters = {}
+            self._characters[image] = cached
+            self.builds += 1
+        return cached
+
+    def prepare(self, images):
+        """Builds the character composites ahead of time (safe to call from a loader thread)."""
+        for image in images:
+            self.character(image)
+
+    def draw_overlay(self, target, areas):
+        """Redraws the unattached "front" props inside `areas` (the rects repainted this frame)."""
+        if not self._overlay_built:
+            self._overlay = self._build_overlay()
+            self._overlay_built = True
+        if self._overlay is None:
+            return
+        surface, rect = self._overlay
+        for area in areas:
+            clip = rect.clip(area)
+            if clip.width and clip.height:
+                target.blit(surface, clip.topleft, clip.move(-rect.x, -rect.y))
+
+    def add_prop(self, path, position=None, layer="front", attached=True, scale=1.0):
+        """Returns the current scene with one more prop (attached at the next PROP_SLOTS slot by default)."""
+        if position is None:
+            attached_count = sum(1 for prop in self.scene.props if prop.attached)
+            position = PROP_SLOTS[attached_count % len(PROP_SLOTS)]
+        return self.scene._replace(props=self.scene.props + (Prop(path, tuple(position), layer, attached, scale),))
+
+    def _image(self, path, scale):
+        """Loads and scales an image once; returns None (after a message) if it can't be loaded."""
+        key = (path, scale)
+        if key not in self._images:
+            try:
+                img = pygame.image.load(path).convert_alpha()
+                if scale != 1.0:
+                    img = pygame.transform.scale(img, (max(1, int(img.get_width() * scale)),
+                                                       max(1, int(img.get_height() * scale))))
+            except (pygame.error, OSError) as e:
+                print(f"Scene image '{path}' skipped: {e}")
+                img = None
+            self._images[key] = img
+        return self._images[key]
+
+    def _build_static(self):
+        size = self.target.get_size()
+        surface = pygame.Surface(size, self.target.get_flags() & pygame.SRCALPHA, self.target)
+        surface.fill(self.scene.color or self.base_color)
+        if self.scene.background:
+            background = self._image(self.scene.background, 1.0)
+            if background is not None:
+                # Cover the window, keeping the aspect ratio (centered crop)
+                cover = max(size[0] / background.get_width(), size[1] / background.get_height())
+                scaled = pygame.transform.smoothscale(background, (max(size[0], round(background.get_width() * cover)),
+                                                                   max(size[1], round(background.get_height() * cover))))
+                _compose(surface, scaled, ((size[0] - scaled.get_width()) // 2, (size[1] - scaled.get_height()) // 2))
+        for prop in self.scene.props:
+            if not prop.attached and prop.layer == "back":
+                self._place(surface, prop, (0, 0))
+        return surface
+
+    def _build_overlay(self):
+        props = [prop for prop in self.scene.props if not prop.attached and prop.layer == "front"]
+        rects = [self._prop_rect(prop, (0, 0)) for prop in props]
+        rects = [rect for rect in rects if rect is not None]
+        if not rects:
+            return None
+        bounds = rects[0].unionall(rects[1:]).clip(self.target.get_rect())
+        if not bounds.width or not bounds.height:
+            return None
+        surface = pygame.Surface(bounds.size, pygame.SRCALPHA).convert_alpha()
+        surface.fill((0, 0, 0, 0))
+        for prop in props:
+            self._place(surface, prop, (-bounds.x, -bounds.y))
+        self.builds += 1
+        return surface, bounds
+
+    def _build_character(self, image):
+        w, h = image.get_size()
+        center = (w // 2, h // 2)
+        props = [prop for prop in self.scene.props if prop.attached]
+        rects = [self._prop_rect(prop, center) for prop in props]
+        bounds = image.get_rect().unionall([rect for rect in rects if rect is not None])
+        surface = pygame.Surface(bounds.size, pygame.SRCALPHA).convert_alpha()
+        surface.fill((0, 0, 0, 0))
+        origin = (center[0] - bounds.x, center[1] - bounds.y)
+        for prop in props:
+            if prop.layer == "back":
+                self._place(surface, prop, origin)
+        _compose(surface, image, (-bounds.x, -bounds.y))
+        for prop in props:
+            if prop.layer == "front":
+                self._place(surface, prop, origin)
+        return surface, (bounds.x, bounds.y)
+
+    def _prop_rect(self, prop, origin):
+        img = self._image(prop.image, prop.scale)
+        if img is None:
+            return None
+        return img.get_rect(center=(origin[0] + prop.position[0], origin[1] + prop.position[1]))
+
+    def _place(self, surface, prop, origin):
+        rect = self._prop_rect(prop, origin)
+        if rect is not None:
+            _compose(surface, self._image(prop.image, prop.scale), rect.topleft)
+
+
+def _compose(dest, src, pos):
+    """Draws src over dest. Plain blit onto opaque surfaces; proper "over" blending onto alpha surfaces."""
+    if not dest.get_flags() & pygame.SRCALPHA:
+        dest.blit(src, pos)
+        return
+    rect = src.get_rect(topleft=pos).clip(dest.get_rect())
+    if not rect.width or not rect.height:
+        return
+    area = rect.move(-pos[0], -pos[1])
+    # SDL's blend would multiply colors by alpha again wherever dest is
+    # transparent (dark fringes on soft edges), so blend straight alpha here
+    dest_rgb = pygame.surfarray.pixels3d(dest)[rect.left:rect.right, rect.top:rect.bottom]
+    dest_alpha = pygame.surfarray.pixels_alpha(dest)[rect.left:rect.right, rect.top:rect.bottom]
+    src_rgb = pygame.surfarray.pixels3d(src)[area.left:area.right, area.top:area.bottom].astype(np.float32)
+    src_a = pygame.surfarray.pixels_alpha(src)[area.left:area.right, area.top:area.bottom].astype(np.float32) / 255.0
+    dest_a = dest_alpha.astype(np.float32) / 255.0
+    under = dest_a * (1.0 - src_a)
+    out_a = src_a + under
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rgb = (src_rgb * src_a[..., None] + dest_rgb * under[..., None]) / out_a[..., None]
+    dest_rgb[:] = np.nan_to_num(rgb).round().astype(np.uint8)
+    dest_alpha[:] = (out_a * 255.0).round().astype(np.uint8)
+    del dest_rgb, dest_alpha # Unlock the surfaces
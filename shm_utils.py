@@ -0,0 +1,18 @@
+# shm_utils.py
+
+from multiprocessing import shared_memory
+
+
+def attach_shared_memory(name):
+    """
+    Opens an existing shared-memory block without taking ownership of it:
+    the process that created it unlinks it, not whoever attaches.
+    """
+    try:
+        return shared_memory.SharedMemory(name=name, track=False) # Python 3.13+
+    except TypeError:
+        shm = shared_memory.SharedMemory(name=name)
+        # Older Pythons would unlink the block when the attaching process exits
+        from multiprocessing import resource_tracker
+        resource_tracker.unregister(shm._name, "shared_memory")
+        return shm
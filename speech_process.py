@@ -0,0 +1,339 @@
+# speech_process.py
+#
+# Runs the Vosk keyword recognizer in a child process so decoding doesn't
+# compete with the render loop for the GIL. Audio goes to the child through a
+# shared-memory ring; detected keywords come back as JSON lines on its stdout.
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from multiprocessing import shared_memory
+import numpy as np
+from shm_utils import attach_shared_memory
+
+# Control slots (int64) at the start of the shared block
+_WRITE, _READ, _DROPPED, _MARKERS, _WRITTEN = range(5)
+_CTRL_SLOTS = 8
+_MARKER_SLOTS = 64 # Pending segment-end markers the reader can lag behind by
+_HEADER_BYTES = _CTRL_SLOTS * 8 + 8 + _MARKER_SLOTS * 8
+_LAP_MARGIN = 4096 # Samples the writer may be in the middle of copying
+
+READY_TIMEOUT = 30 # Seconds the child gets to load the Vosk model
+
+
+class SharedAudioRing:
+    """
+    Single-writer/single-reader int16 ring in shared memory, usable by
+    SpeechGate in place of AudioRingBuffer. The writer (mic callback) never
+    blocks or locks; if the reader falls behind, it skips ahead to the newest
+    `capacity` samples (drop-oldest) and counts what it skipped.
+    """
+
+    def __init__(self, shm, capacity, owner):
+        self._shm = shm
+        self.capacity = capacity
+        self._owner = owner
+        buf = shm.buf
+        self._ctrl = np.ndarray((_CTRL_SLOTS,), dtype=np.int64, buffer=buf, offset=0)
+        self._write_time = np.ndarray((1,), dtype=np.float64, buffer=buf, offset=_CTRL_SLOTS * 8)
+        self._markers = np.ndarray((_MARKER_SLOTS,), dtype=np.int64, buffer=buf, offset=_CTRL_SLOTS * 8 + 8)
+        self._data = np.ndarray((capacity,), dtype=np.int16, buffer=buf, offset=_HEADER_BYTES)
+
+        # Reader-side state (only meaningful in the child)
+        self._read = int(self._ctrl[_READ])
+        self._marker_read = int(self._ctrl[_MARKERS])
+        self.samplerate = 16000
+        self.last_capture_time = None
+
+    @classmethod
+    def create(cls, capacity):
+        shm = shared_memory.SharedMemory(create=True, size=_HEADER_BYTES + capacity * 2)
+        ring = cls(shm, capacity, owner=True)
+        ring._ctrl[:] = 0
+        ring._write_time[0] = time.perf_counter()
+        return ring
+
+    @classmethod
+    def attach(cls, name, capacity):
+        return cls(attach_shared_memory(name), capacity, owner=False) # The parent owns the block
+
+    @property
+    def name(self):
+        return self._shm.name
+
+    @property
+    def dropped(self):
+        return int(self._ctrl[_DROPPED])
+
+    @property
+    def written(self):
+        return int(self._ctrl[_WRITTEN])
+
+    def __len__(self):
+        return max(0, min(self.capacity, int(self._ctrl[_WRITE] - self._ctrl[_READ])))
+
+    # --- writer side ---
+
+    def write(self, samples):
+        n = len(samples)
+        if n == 0:
+            return
+        write = int(self._ctrl[_WRITE])
+        written = int(self._ctrl[_WRITTEN]) + n
+        if n > self.capacity:
+            samples = samples[-self.capacity:]
+            write += n - self.capacity
+            n = self.capacity
+        start = write % self.capacity
+        first = min(n, self.capacity - start)
+        self._data[start:start + first] = samples[:first]
+        self._data[:n - first] = samples[first:]
+        # Publish the data before moving the write position
+        self._write_time[0] = time.perf_counter()
+        self._ctrl[_WRITTEN] = written
+        self._ctrl[_WRITE] = write + n
+
+    def end_segment(self):
+        count = int(self._ctrl[_MARKERS])
+        self._markers[count % _MARKER_SLOTS] = self._ctrl[_WRITE]
+        self._ctrl[_MARKERS] = count + 1
+
+    # --- reader side ---
+
+    def read(self, max_samples=4000, timeout=None):
+        """Same contract as AudioRingBuffer.read(): returns (bytes, segment_ended)."""
+        deadline = None if timeout is None else time.perf_counter() + timeout
+        while True:
+            write = int(self._ctrl[_WRITE])
+            if write - self._read > self.capacity - _LAP_MARGIN: # Reader fell behind: drop oldest
+                self._skip_to(write - self.capacity + _LAP_MARGIN)
+
+            marker = self._next_marker()
+            if write > self._read or marker is not None:
+                break
+            if deadline is not None and time.perf_counter() >= deadline:
+                return b"", False
+            time.sleep(0.005)
+
+        stop = write if marker is None else min(write, marker)
+        n = min(max_samples, stop - self._read)
+        start = self._read % self.capacity
+        first = min(n, self.capacity - start)
+        chunk = np.concatenate((self._data[start:start + first], self._data[:n - first]))
+
+        # If the writer lapped us while copying, the chunk is garbage
+        latest = int(self._ctrl[_WRITE])
+        if latest - self._read > self.capacity - _LAP_MARGIN:
+            self._skip_to(max(self._read + n, latest - self.capacity + _LAP_MARGIN))
+            return b"", False
+
+        self._read += n
+        self._ctrl[_READ] = self._read
+        if n:
+            backlog = (latest - self._read) / self.samplerate
+            self.last_capture_time = float(self._write_time[0]) - backlog
+
+        ended = marker is not None and self._read >= marker
+        if ended:
+            self._marker_read += 1
+        return chunk.tobytes(), ended
+
+    def _next_marker(self):
+        count = int(self._ctrl[_MARKERS])
+        if count - self._marker_read > _MARKER_SLOTS:
+            self._marker_read = count - _MARKER_SLOTS
+        while self._marker_read < count:
+            marker = int(self._markers[self._marker_read % _MARKER_SLOTS])
+            if marker >= self._read:
+                return marker
+            self._marker_read += 1 # Its audio was dropped already
+        return None
+
+    def _skip_to(self, position):
+        self._ctrl[_DROPPED] += position - self._read
+        self._read = position
+        self._ctrl[_READ] = position
+
+    def close(self):
+        # Drop the numpy views before closing, or the buffer can't be released
+        self._ctrl = self._write_time = self._markers = self._data = None
+        self._shm.close()
+        if self._owner:
+            self._shm.unlink()
+
+
+class SpeechProcess:
+    """
+    Parent-side handle for the recognizer child process. start() returns
+    immediately; on_keywords(list) is called from a reader thread whenever the
+    child detects keywords, and on_failure() if the child dies or never gets
+    ready, so the caller can fall back to the in-process listener.
+    """
+
+    def __init__(self, model_path, keywords, samplerate=16000, ring_seconds=10,
+                 use_grammar=True, cooldown=1.5):
+        self.model_path = model_path
+        self.keywords = keywords
+        self.samplerate = samplerate
+        self.ring_seconds = ring_seconds
+        self.use_grammar = use_grammar
+        self.cooldown = cooldown
+
+        self.ring = None
+        self.ready = False
+        self.stats = {}
+        self.read_position = None # Ring samples the child had read at its last keyword detection
+        self._proc = None
+        self._stopping = False
+        self._fail_lock = threading.Lock()
+
+    def start(self, on_keywords, on_failure=None):
+        self.ring = SharedAudioRing.create(self.samplerate * self.ring_seconds)
+        self.ring.samplerate = self.samplerate
+        args = [
+            sys.executable, os.path.abspath(__file__),
+            "--shm", self.ring.name,
+            "--capacity", str(self.ring.capacity),
+            "--samplerate", str(self.samplerate),
+            "--model", self.model_path,
+            "--keywords", json.dumps(self.keywords),
+            "--cooldown", str(self.cooldown),
+        ]
+        if not self.use_grammar:
+            args.append("--open-vocabulary")
+        try:
+            self._proc = subprocess.Popen(args, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                          text=True, bufsize=1)
+        except OSError as e:
+            print(f"Could not start speech process: {e}")
+            self.ring.close()
+            self.ring = None
+            return False
+
+        threading.Thread(target=self._read_events, args=(on_keywords, on_failure), daemon=True).start()
+        threading.Thread(target=self._watch_ready, args=(on_failure,), daemon=True).start()
+        return True
+
+    def stop(self, timeout=3):
+        """Asks the child to exit (by closing its stdin) and frees the shared ring."""
+        if self._proc is None:
+            return
+        self._stopping = True
+        try:
+            self._proc.stdin.close()
+            self._proc.wait(timeout)
+        except subprocess.TimeoutExpired:
+            self._proc.kill()
+            self._proc.wait()
+        except OSError:
+            pass
+        self._proc = None
+        if self.ring is not None:
+            self.ring.close()
+            self.ring = None
+
+    def _read_events(self, on_keywords, on_failure):
+        for line in self._proc.stdout:
+            try:
+                message = json.loads(line)
+            except ValueError:
+                continue
+            kind = message.get("type")
+            if kind == "ready":
+                self.ready = True
+                print("Speech process ready.")
+            elif kind == "keywords":
+                self.read_position = message.get("read")
+                try:
+                    on_keywords(message["keywords"])
+                except Exception as e: # A failing handler mustn't stop later keywords from arriving
+                    print(f"Error handling keywords {message['keywords']}: {e!r}")
+            elif kind == "log":
+                print(f"[speech] {message['text']}")
+            elif kind == "stats":
+                self.stats = message["stats"]
+        if not self._stopping:
+            print("Speech process exited unexpectedly.")
+            self._fail(on_failure)
+
+    def _watch_ready(self, on_failure):
+        deadline = time.time() + READY_TIMEOUT
+        while not self.ready and not self._stopping and time.time() < deadline:
+            time.sleep(0.1)
+        if not self.ready and not self._stopping:
+            print("Speech process didn't get ready in time.")
+            self._fail(on_failure)
+
+    def _fail(self, on_failure):
+        with self._fail_lock:
+            if self._stopping:
+                return
+            self._stopping = True
+        # Let the caller move the mic audio off the shared ring before it is freed
+        if on_failure:
+            on_failure()
+        self.stop(timeout=1)
+
+
+# --- Child process ---
+
+def _send(message):
+    sys.stdout.write(json.dumps(message) + "\n")
+    sys.stdout.flush()
+
+
+def _child_main():
+    parser = argparse.ArgumentParser(description="Nyamii speech recognizer process")
+    parser.add_argument("--shm", required=True)
+    parser.add_argument("--capacity", type=int, required=True)
+    parser.add_argument("--samplerate", type=int, default=16000)
+    parser.add_argument("--model", required=True)
+    parser.add_argument("--keywords", required=True)
+    parser.add_argument("--cooldown", type=float, default=1.5)
+    parser.add_argument("--open-vocabulary", action="store_true")
+    args = parser.parse_args()
+
+    from vosk import Model
+    from keyword_spotter import make_recognizer, KeywordTrigger, run_keyword_loop
+
+    def log(text):
+        _send({"type": "log", "text": text})
+
+    ring = SharedAudioRing.attach(args.shm, args.capacity)
+    ring.samplerate = args.samplerate
+    keywords = json.loads(args.keywords)
+    try:
+        recognizer = make_recognizer(Model(args.model), args.samplerate, keywords,
+                                     use_grammar=not args.open_vocabulary)
+    except Exception as e:
+        log(f"Error loading Vosk model: {e}")
+        ring.close()
+        return 1
+    trigger = KeywordTrigger(keywords, cooldown=args.cooldown)
+
+    # The parent closes our stdin to ask us to stop
+    stop = threading.Event()
+    def wait_for_parent():
+        sys.stdin.read()
+        stop.set()
+    threading.Thread(target=wait_for_parent, daemon=True).start()
+
+    _send({"type": "ready"})
+    run_keyword_loop(recognizer, ring, trigger,
+                     on_found=lambda found: _send({"type": "keywords", "keywords": found,
+                                                   "read": ring.written - len(ring)}),
+                     keep_running=lambda: not stop.is_set(), log=log)
+
+    stats = trigger.latency_stats()
+    stats["dropped"] = ring.dropped
+    _send({"type": "stats", "stats": stats})
+    ring.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(_child_main())
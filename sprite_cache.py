@@ -0,0 +1,101 @@
+# sprite_cache.py
+
+from collections import OrderedDict
+import pygame
+
+SCALE_BUCKETS = 16 # Number of distinct scales kept per asset
+MIN_SCALE = 0.5
+MAX_SCALE = 1.3
+MAX_CACHE_BYTES = 8 * 1024 * 1024 # Rough pixel memory budget (8 MB)
+
+
+class SpriteCache:
+    """
+    Pre-scaled copies of particle images, keyed by (asset name, scale bucket).
+    Scales are quantized into `buckets` steps between min_scale and max_scale,
+    so a particle's requested scale snaps to the nearest pre-rendered variant.
+    Entries are evicted least-recently-used once max_bytes is exceeded.
+    """
+
+    def __init__(self, buckets=SCALE_BUCKETS, min_scale=MIN_SCALE, max_scale=MAX_SCALE, max_bytes=MAX_CACHE_BYTES):
+        if buckets < 1:
+            raise ValueError("buckets must be at least 1")
+        self.buckets = buckets
+        self.min_scale = min_scale
+        self.max_scale = max_scale
+        self.max_bytes = max_bytes
+
+        self._assets = {} # name -> original surface
+        self._entries = OrderedDict() # (name, bucket) -> scaled surface
+        self.bytes_used = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def bucket_for(self, scale):
+        if self.buckets == 1 or self.max_scale <= self.min_scale:
+            return 0
+        t = (scale - self.min_scale) / (self.max_scale - self.min_scale)
+        return min(self.buckets - 1, max(0, round(t * (self.buckets - 1))))
+
+    def scale_for(self, bucket):
+        if self.buckets == 1:
+            return self.min_scale
+        return self.min_scale + bucket * (self.max_scale - self.min_scale) / (self.buckets - 1)
+
+    def set_asset(self, name, surface, prerender=True):
+        """Registers (or replaces) an asset and optionally renders all its buckets up front."""
+        self._assets[name] = surface
+        for key in [key for key in self._entries if key[0] == name]:
+            self._remove(key)
+        if prerender:
+            for bucket in range(self.buckets):
+                self._render(name, bucket)
+
+    def get(self, name, scale):
+        key = (name, self.bucket_for(scale))
+        scaled = self._entries.get(key)
+        if scaled is not None:
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return scaled
+        self.misses += 1
+        return self._render(*key)
+
+    def clear(self):
+        self._entries.clear()
+        self.bytes_used = 0
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self.bytes_used,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+    def _render(self, name, bucket):
+        img = self._assets[name]
+        scale = self.scale_for(bucket)
+        size = (max(1, int(img.get_width() * scale)), max(1, int(img.get_height() * scale)))
+        scaled = pygame.transform.scale(img, size)
+
+        key = (name, bucket)
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = scaled
+        self.bytes_used += _surface_bytes(scaled)
+        while self.bytes_used > self.max_bytes and len(self._entries) > 1:
+            self._remove(next(iter(self._entries)))
+            self.evictions += 1
+        return scaled
+
+    def _remove(self, key):
+        self.bytes_used -= _surface_bytes(self._entries.pop(key))
+
+
+def _surface_bytes(surface):
+    return surface.get_width() * surface.get_height() * surface.get_bytesize()
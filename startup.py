@@ -0,0 +1,103 @@
+# startup.py
+
+import threading
+import time
+from contextlib import contextmanager
+
+
+class StartupError(Exception):
+    """A required startup task failed; the message says what to fix."""
+
+
+class StartupLoader:
+    """
+    Runs startup tasks on background threads while the splash screen is up
+    and keeps track of progress. Required tasks gate readiness; optional ones
+    (like the Vosk model) keep loading after the menu appears. Every task and
+    every main-thread phase is timed and logged relative to process start.
+    """
+
+    def __init__(self, log=print):
+        self.log = log
+        self.start_time = time.perf_counter()
+        self._lock = threading.Lock()
+        self._tasks = {} # name -> task dict, in the order added
+        self.timings = {} # name -> seconds, tasks and phases
+        self.first_frame = None
+        self.ready_time = None
+
+    def elapsed(self):
+        return time.perf_counter() - self.start_time
+
+    @contextmanager
+    def phase(self, name):
+        """Times a block of main-thread startup work."""
+        start = time.perf_counter()
+        yield
+        self.timings[name] = time.perf_counter() - start
+        self.log(f"Startup: {name} took {self.timings[name] * 1000:.0f} ms (at {self.elapsed() * 1000:.0f} ms)")
+
+    def add(self, name, func, weight=1, required=True):
+        """Registers a task; `weight` is its share of the progress bar."""
+        self._tasks[name] = {"func": func, "weight": weight, "required": required,
+                             "done": threading.Event(), "running": False, "error": None, "result": None}
+
+    def start(self):
+        for name, task in self._tasks.items():
+            threading.Thread(target=self._run, args=(name, task), daemon=True, name=f"startup-{name}").start()
+
+    def _run(self, name, task):
+        with self._lock:
+            task["running"] = True
+        start = time.perf_counter()
+        try:
+            task["result"] = task["func"]()
+        except Exception as e:
+            task["error"] = e
+            self.log(f"Startup: {name} failed: {e}")
+        finally:
+            duration = time.perf_counter() - start
+            with self._lock:
+                task["running"] = False
+                self.timings[name] = duration
+            task["done"].set()
+        if task["error"] is None:
+            self.log(f"Startup: {name} took {duration * 1000:.0f} ms (done at {self.elapsed() * 1000:.0f} ms)")
+
+    def frame_drawn(self):
+        """Call after presenting a frame; the first call records time-to-first-frame."""
+        if self.first_frame is None:
+            self.first_frame = self.elapsed()
+            self.log(f"Startup: first frame at {self.first_frame * 1000:.0f} ms")
+
+    def progress(self):
+        """(fraction done by weight, names of tasks still running) over the required tasks."""
+        with self._lock:
+            required = [(name, task) for name, task in self._tasks.items() if task["required"]]
+            total = sum(task["weight"] for _, task in required) or 1
+            done = sum(task["weight"] for _, task in required if task["done"].is_set())
+            running = [name for name, task in required if task["running"]]
+        return done / total, running
+
+    def ready(self):
+        """True once every required task has finished (successfully or not)."""
+        done = all(task["done"].is_set() for task in self._tasks.values() if task["required"])
+        if done and self.ready_time is None:
+            self.ready_time = self.elapsed()
+            self.log(f"Startup: ready at {self.ready_time * 1000:.0f} ms")
+        return done
+
+    def failure(self):
+        """The first required task's error, or None."""
+        for task in self._tasks.values():
+            if task["required"] and task["error"] is not None:
+                return task["error"]
+        return None
+
+    def wait(self, name, timeout=None):
+        """Blocks until a task is finished and returns its result (None if it failed)."""
+        task = self._tasks.get(name)
+        if task is None:
+            return None
+        task["done"].wait(timeout)
+        return task["result"]
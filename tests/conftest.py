@@ -0,0 +1,10 @@
+# tests/conftest.py
+
+import os
+import sys
+
+# The modules live at the repository root (no package), like the benchmarks import them
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+# Surfaces that need a display (convert_alpha()) get a headless one
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
@@ -0,0 +1,107 @@
+# tests/test_audio_buffer.py
+
+import threading
+
+import numpy as np
+
+from audio_buffer import AudioRingBuffer, SpeechGate
+
+
+def samples(start, count):
+    return np.arange(start, start + count, dtype=np.int16)
+
+
+def read_all(ring):
+    data, ended = ring.read(max_samples=10 ** 6, timeout=0)
+    return np.frombuffer(data, dtype=np.int16), ended
+
+
+def test_read_returns_written_samples_across_the_wrap():
+    ring = AudioRingBuffer(100)
+    ring.write(samples(0, 80))
+    assert np.array_equal(read_all(ring)[0], samples(0, 80))
+    ring.write(samples(80, 50)) # Wraps around the end of the array
+    assert np.array_equal(read_all(ring)[0], samples(80, 50))
+    assert (ring.written, ring.dropped, len(ring)) == (130, 0, 0)
+
+
+def test_overflow_drops_oldest():
+    ring = AudioRingBuffer(100)
+    ring.write(samples(0, 70))
+    ring.write(samples(70, 70))
+    assert (ring.written, ring.dropped, len(ring)) == (140, 40, 100)
+    assert np.array_equal(read_all(ring)[0], samples(40, 100))
+
+
+def test_write_larger_than_capacity_keeps_newest_and_counts_once():
+    ring = AudioRingBuffer(100)
+    ring.write(samples(0, 150))
+    assert (ring.written, ring.dropped, len(ring)) == (150, 50, 100)
+    assert np.array_equal(read_all(ring)[0], samples(50, 100))
+
+
+def test_write_larger_than_capacity_also_drops_unread_samples():
+    ring = AudioRingBuffer(100)
+    ring.write(samples(0, 30))
+    ring.write(samples(30, 150))
+    assert (ring.written, ring.dropped, len(ring)) == (180, 80, 100)
+    assert np.array_equal(read_all(ring)[0], samples(80, 100))
+
+
+def test_read_stops_at_segment_end():
+    ring = AudioRingBuffer(100)
+    ring.write(samples(0, 20))
+    ring.end_segment()
+    ring.write(samples(20, 10))
+    first, ended = read_all(ring)
+    assert ended and np.array_equal(first, samples(0, 20))
+    second, ended = read_all(ring)
+    assert not ended and np.array_equal(second, samples(20, 10))
+
+
+def test_read_times_out_empty():
+    assert AudioRingBuffer(10).read(timeout=0) == (b"", False)
+
+
+def test_gate_sends_preroll_and_hangover_then_ends_segment():
+    ring = AudioRingBuffer(16000)
+    gate = SpeechGate(ring, samplerate=1000, preroll_ms=20, hangover_ms=20)
+    gate.push(samples(0, 50), False) # Only the last 20 are kept as pre-roll
+    gate.push(samples(50, 10), True)
+    gate.push(samples(60, 10), False) # Hangover
+    gate.push(samples(70, 10), False) # Hangover runs out: segment ends
+    gate.push(samples(80, 10), False)
+
+    data, ended = read_all(ring)
+    assert ended
+    assert np.array_equal(data, samples(30, 50))
+    assert gate.total == 90
+    assert gate.skipped == 40 # 30 before the pre-roll, 10 after the segment
+
+
+def test_samples_since_read_counts_gated_input():
+    ring = AudioRingBuffer(1000)
+    gate = SpeechGate(ring, samplerate=1000, preroll_ms=1, hangover_ms=1000)
+    gate.push(samples(0, 100), True)
+    gate.push(samples(0, 100), False) # Still in the hangover, so sent too
+    ring.read(max_samples=150, timeout=0)
+    assert gate.samples_since_read() == 50
+
+
+def test_samples_since_read_while_the_audio_thread_pushes():
+    ring = AudioRingBuffer(16000)
+    gate = SpeechGate(ring, samplerate=16000, preroll_ms=1, hangover_ms=1000)
+    block = samples(0, 64)
+    stop = threading.Event()
+
+    def audio_thread():
+        while not stop.is_set():
+            gate.push(block, True)
+    thread = threading.Thread(target=audio_thread)
+    thread.start()
+    try:
+        for _ in range(20000):
+            assert gate.samples_since_read() >= 0
+    finally:
+        stop.set()
+        thread.join()
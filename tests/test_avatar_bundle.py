@@ -0,0 +1,129 @@
+# tests/test_avatar_bundle.py
+
+import json
+import os
+import struct
+
+import pygame
+import pytest
+
+from avatar_bundle import (BundleError, bundle_path, compile_bundle, load_bundle, pose_files,
+                           _PREFIX, _MAGIC, BUNDLE_VERSION)
+
+
+def save_pose(folder, filename, size, color):
+    surface = pygame.Surface(size, pygame.SRCALPHA)
+    surface.fill((0, 0, 0, 0))
+    pygame.draw.rect(surface, color, (0, 0, size[0] // 2, size[1]))
+    pygame.image.save(surface, os.path.join(folder, filename))
+
+
+@pytest.fixture
+def models(tmp_path):
+    folder = tmp_path / "neko"
+    folder.mkdir()
+    save_pose(str(folder), "neko.png", (40, 60), (255, 0, 0, 255))
+    save_pose(str(folder), "nekoTalking.png", (40, 60), (0, 0, 255, 128))
+    save_pose(str(folder), "nekoOpen.png", (20, 30), (0, 255, 0, 255))
+    (folder / "notes.txt").write_text("not a pose")
+    return str(tmp_path)
+
+
+def rewrite_metadata(path, change):
+    """Rewrites a bundle's metadata in place (keeping its length, so the pixel offsets stay valid)."""
+    with open(path, "r+b") as f:
+        data = bytearray(f.read())
+        magic, version, length = _PREFIX.unpack_from(data, 0)
+        metadata = json.loads(bytes(data[_PREFIX.size:_PREFIX.size + length]))
+        change(metadata)
+        encoded = json.dumps(metadata).encode("utf-8").ljust(length)
+        assert len(encoded) == length
+        data[_PREFIX.size:_PREFIX.size + length] = encoded
+        f.seek(0)
+        f.write(data)
+
+
+def test_pose_files_maps_suffixes_to_poses(models):
+    assert sorted(pose_files(models, "neko")) == ["idle", "open", "talking"]
+
+
+def test_round_trip_keeps_sizes_and_pixels(models):
+    path = compile_bundle(models, "neko", 0.5, pixel_format="RGBA")
+    assert path == bundle_path(models, "neko")
+    images = load_bundle(path, 0.5)
+    assert sorted(images) == ["idle", "open", "talking"]
+    assert images["idle"].get_size() == (20, 30)
+    assert images["open"].get_size() == (10, 15)
+    assert tuple(images["idle"].get_at((2, 2))) == (255, 0, 0, 255)
+    assert tuple(images["talking"].get_at((2, 2))) == (0, 0, 255, 128)
+    assert images["talking"].get_at((18, 2)).a == 0
+
+
+def test_missing_bundle_raises_file_not_found(models):
+    with pytest.raises(FileNotFoundError):
+        load_bundle(bundle_path(models, "neko"), 0.5)
+
+
+def test_scale_mismatch(models):
+    path = compile_bundle(models, "neko", 0.5, pixel_format="RGBA")
+    with pytest.raises(BundleError, match="scale"):
+        load_bundle(path, 0.8)
+
+
+def test_bad_magic_and_version(models):
+    path = compile_bundle(models, "neko", 0.5, pixel_format="RGBA")
+    with open(path, "r+b") as f:
+        f.write(struct.pack("<8s", b"NOTABNDL"))
+    with pytest.raises(BundleError, match="not a model bundle"):
+        load_bundle(path, 0.5)
+
+    with open(path, "r+b") as f:
+        f.write(struct.pack("<8sI", _MAGIC, BUNDLE_VERSION + 1))
+    with pytest.raises(BundleError, match="version"):
+        load_bundle(path, 0.5)
+
+
+def test_truncated_files(models):
+    path = compile_bundle(models, "neko", 0.5, pixel_format="RGBA")
+    size = os.path.getsize(path)
+    with open(path, "r+b") as f:
+        f.truncate(size - 100)
+    with pytest.raises(BundleError, match="truncated pixel data"):
+        load_bundle(path, 0.5)
+    with open(path, "r+b") as f:
+        f.truncate(4)
+    with pytest.raises(BundleError, match="truncated header"):
+        load_bundle(path, 0.5)
+
+
+def test_bad_metadata(models):
+    path = compile_bundle(models, "neko", 0.5, pixel_format="RGBA")
+    rewrite_metadata(path, lambda metadata: metadata.pop("format"))
+    with pytest.raises(BundleError, match="bad metadata"):
+        load_bundle(path, 0.5)
+
+
+def test_missing_talking_pose(models):
+    path = compile_bundle(models, "neko", 0.5, pixel_format="RGBA")
+    def rename(metadata):
+        for pose in metadata["poses"]:
+            if pose["pose"] == "talking":
+                pose["pose"] = "xxxxxxx"
+    rewrite_metadata(path, rename)
+    with pytest.raises(BundleError, match="idle or talking"):
+        load_bundle(path, 0.5)
+
+
+def test_changed_source_invalidates_bundle(models):
+    path = compile_bundle(models, "neko", 0.5, pixel_format="RGBA")
+    save_pose(os.path.join(models, "neko"), "nekoOpen.png", (24, 30), (0, 255, 0, 255))
+    with pytest.raises(BundleError, match="changed"):
+        load_bundle(path, 0.5)
+    assert load_bundle(path, 0.5, check_sources=False)["open"].get_size() == (10, 15)
+
+
+def test_bundle_without_sources_still_loads(models):
+    path = compile_bundle(models, "neko", 0.5, pixel_format="RGBA")
+    for png in pose_files(models, "neko").values():
+        os.remove(png)
+    assert sorted(load_bundle(path, 0.5)) == ["idle", "open", "talking"]
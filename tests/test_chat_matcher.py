@@ -0,0 +1,39 @@
+# tests/test_chat_matcher.py
+
+from chat_matcher import KeywordMatcher
+
+
+def test_matches_whole_words_only():
+    matcher = KeywordMatcher(["cool", "love"])
+    assert matcher.find("so COOL, love it") == ["cool", "love"]
+    assert matcher.find("cooler lovely") == []
+
+
+def test_each_keyword_once_in_message_order():
+    matcher = KeywordMatcher(["cool", "love"])
+    assert matcher.find("love cool love cool") == ["love", "cool"]
+
+
+def test_longest_phrase_wins_and_consumes_its_words():
+    matcher = KeywordMatcher(["good", "good night", "good night stream", "night"])
+    assert matcher.find("Good   night stream everyone") == ["good night stream"]
+    assert matcher.find("good night") == ["good night"]
+    assert matcher.find("good day, night") == ["good", "night"]
+
+
+def test_symbol_terms_need_non_word_neighbours():
+    matcher = KeywordMatcher([":heart:", "<3"])
+    assert matcher.find("hi :heart: <3") == [":heart:", "<3"]
+    assert matcher.find("a<3b") == []
+
+
+def test_aliases_map_to_keywords_and_unknown_targets_are_ignored():
+    matcher = KeywordMatcher(["love"], aliases={"luv": "love", ":heart:": "love", "meh": "nope"})
+    assert matcher.find("luv you :heart:") == ["love"]
+    assert matcher.find("meh") == []
+
+
+def test_set_table_replaces_keywords():
+    matcher = KeywordMatcher(["cool"])
+    matcher.set_table(["neko"])
+    assert matcher.find("cool neko") == ["neko"]
@@ -0,0 +1,65 @@
+# tests/test_event_bus.py
+
+from event_bus import ChatEventBus, _RateLimiter
+
+
+def test_repeats_merge_into_the_pending_event():
+    bus = ChatEventBus(keyword_rate=None, author_rate=None)
+    assert bus.publish("a", "love", "hearts", now=0.0)
+    assert bus.publish("b", "love", "hearts", now=0.5)
+    bus.publish("c", "cool", "sparkles", now=1.0)
+    events = bus.drain()
+    assert [(e.keyword, e.count, e.author, e.time) for e in events] == [("love", 2, "a", 0.0), ("cool", 1, "c", 1.0)]
+    assert bus.drain() == []
+    assert bus.stats()["coalesced"] == 1
+
+
+def test_repeats_inside_the_window_after_drain_are_absorbed():
+    bus = ChatEventBus(coalesce_window=3.0, keyword_rate=None, author_rate=None)
+    bus.publish("a", "love", "hearts", now=0.0)
+    bus.drain()
+    assert bus.publish("b", "love", "hearts", now=2.0) # Counted as part of the delivered event
+    assert bus.drain() == []
+    bus.publish("c", "love", "hearts", now=3.5)
+    assert [e.author for e in bus.drain()] == ["c"]
+
+
+def test_full_bus_drops_oldest():
+    bus = ChatEventBus(capacity=2, keyword_rate=None, author_rate=None)
+    for i, keyword in enumerate(("a", "b", "c")):
+        bus.publish("x", keyword, None, now=float(i))
+    assert [e.keyword for e in bus.drain()] == ["b", "c"]
+    assert bus.stats()["dropped"] == 1
+
+
+def test_author_rate_limit():
+    bus = ChatEventBus(coalesce_window=0.0, keyword_rate=None, author_rate=(2, 10.0))
+    results = [bus.publish("spammer", f"k{i}", None, now=0.0) for i in range(3)]
+    assert results == [True, True, False]
+    assert bus.publish("someone else", "k9", None, now=0.0)
+    assert bus.stats()["rate_limited"] == 1
+
+
+def test_keyword_rate_limit():
+    bus = ChatEventBus(coalesce_window=0.0, keyword_rate=(2, 30.0), author_rate=None)
+    for i in range(2):
+        assert bus.publish(f"user{i}", "love", None, now=float(i))
+        bus.drain()
+    assert not bus.publish("user2", "love", None, now=2.0)
+
+
+def test_rate_limiter_refills_over_time():
+    limiter = _RateLimiter(2, 10.0)
+    assert limiter.allow("k", 0.0) and limiter.allow("k", 0.0)
+    assert not limiter.allow("k", 1.0)
+    assert limiter.allow("k", 5.0) # Half the period refills one token
+    assert not limiter.allow("k", 5.0)
+
+
+def test_rate_limiter_forgets_least_recently_used_keys():
+    limiter = _RateLimiter(1, 100.0, max_keys=2)
+    limiter.allow("a", 0.0)
+    limiter.allow("b", 0.0)
+    limiter.allow("c", 0.0) # Pushes "a" out, so it starts with a full bucket again
+    assert limiter.allow("a", 0.0)
+    assert not limiter.allow("c", 0.0)
@@ -0,0 +1,66 @@
+# tests/test_model_switcher.py
+
+import os
+
+import pygame
+import pytest
+
+from model_library import ModelLibrary
+from model_switcher import blit_faded
+from scene import SceneCompositor
+
+GREEN_SCREEN = (0, 255, 0)
+
+
+@pytest.fixture
+def window():
+    pygame.display.init()
+    yield pygame.display.set_mode((200, 200))
+    pygame.display.quit()
+
+
+@pytest.fixture
+def library(tmp_path, window):
+    for name, color in (("alpha", (255, 0, 0, 255)), ("beta", (0, 0, 255, 255))):
+        folder = tmp_path / name
+        folder.mkdir()
+        for suffix in ("", "Talking"):
+            image = pygame.Surface((40, 40), pygame.SRCALPHA)
+            image.fill((0, 0, 0, 0)) # Transparent corners around the circle
+            pygame.draw.circle(image, color, (20, 20), 10)
+            pygame.image.save(image, os.path.join(str(folder), f"{name}{suffix}.png"))
+    return ModelLibrary(str(tmp_path), 1.0, use_bundles=False)
+
+
+def corner_after_blit(window, image):
+    window.fill(GREEN_SCREEN)
+    window.blit(image, (0, 0))
+    return tuple(window.get_at((1, 1)))[:3]
+
+
+def test_crossfade_keeps_shared_surfaces_transparent(window, library):
+    old, new = library.get("alpha"), library.get("beta")
+    compositor = SceneCompositor(window, GREEN_SCREEN)
+    for fade in (0.0, 0.25, 0.5, 0.75):
+        window.fill(GREEN_SCREEN)
+        for images, alpha in ((old, int(255 * (1.0 - fade))), (new, int(255 * fade))):
+            image, _ = compositor.character(images["idle"])
+            blit_faded(window, image, (0, 0), alpha)
+        assert tuple(window.get_at((1, 1)))[:3] == GREEN_SCREEN # Corner stays see-through mid-fade
+
+    for images in (old, new, library.get("alpha"), library.get("beta")):
+        for image in images.values():
+            assert image.get_flags() & pygame.SRCALPHA
+            assert image.get_alpha() in (None, 255)
+            assert image.get_at((1, 1)).a == 0
+            assert corner_after_blit(window, image) == GREEN_SCREEN
+
+
+def test_blit_faded_scales_opacity(window):
+    image = pygame.Surface((10, 10), pygame.SRCALPHA)
+    image.fill((255, 0, 0, 255))
+    window.fill((0, 0, 0))
+    blit_faded(window, image, (0, 0), 128)
+    assert 120 <= window.get_at((5, 5)).r <= 136
+    assert image.get_at((5, 5)) == (255, 0, 0, 255)
+
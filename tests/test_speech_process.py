@@ -0,0 +1,83 @@
+# tests/test_speech_process.py
+
+import sys
+from multiprocessing import resource_tracker
+import numpy as np
+import pytest
+
+from audio_buffer import SpeechGate
+from speech_process import SharedAudioRing, _LAP_MARGIN
+
+
+@pytest.fixture
+def ring():
+    ring = SharedAudioRing.create(_LAP_MARGIN + 1000)
+    yield ring
+    ring.close()
+
+
+def samples(start, count):
+    return (np.arange(start, start + count) % 30000).astype(np.int16)
+
+
+def read_all(ring):
+    data, ended = ring.read(max_samples=10 ** 6, timeout=0)
+    return np.frombuffer(data, dtype=np.int16), ended
+
+
+def test_reader_attached_by_name_sees_writes(ring):
+    reader = SharedAudioRing.attach(ring.name, ring.capacity)
+    if sys.version_info < (3, 13):
+        # Without track=False, attach() drops this process's resource tracker
+        # entry, which here is the creator's; put it back for its unlink()
+        resource_tracker.register(ring._shm._name, "shared_memory")
+    try:
+        ring.write(samples(0, 800))
+        data, ended = read_all(reader)
+        assert not ended and np.array_equal(data, samples(0, 800))
+        assert len(ring) == 0 # The read position is shared too
+        assert reader.read(timeout=0) == (b"", False)
+    finally:
+        reader.close()
+
+
+def test_read_across_the_wrap(ring):
+    ring.write(samples(0, ring.capacity - 100))
+    read_all(ring)
+    ring.write(samples(0, 300))
+    assert np.array_equal(read_all(ring)[0], samples(0, 300))
+    assert ring.written == ring.capacity + 200
+
+
+def test_read_stops_at_segment_end(ring):
+    ring.write(samples(0, 200))
+    ring.end_segment()
+    ring.write(samples(200, 100))
+    first, ended = read_all(ring)
+    assert ended and np.array_equal(first, samples(0, 200))
+    second, ended = read_all(ring)
+    assert not ended and np.array_equal(second, samples(200, 100))
+
+
+def test_reader_behind_skips_to_newest_and_counts_dropped(ring):
+    total = 30 * 500 # Almost three times the capacity
+    for start in range(0, total, 500):
+        ring.write(samples(start, 500))
+    data, _ = read_all(ring)
+    keep = ring.capacity - _LAP_MARGIN
+    assert ring.dropped == total - keep
+    assert np.array_equal(data, samples(total - keep, keep))
+
+
+def test_write_larger_than_capacity_counts_all_samples(ring):
+    ring.write(samples(0, ring.capacity + 500))
+    assert ring.written == ring.capacity + 500
+    assert len(ring) == ring.capacity
+
+
+def test_works_as_speech_gate_ring(ring):
+    gate = SpeechGate(ring, samplerate=1000, preroll_ms=10, hangover_ms=10)
+    gate.push(samples(0, 100), True)
+    gate.push(samples(100, 10), False)
+    data, ended = read_all(ring)
+    assert ended and np.array_equal(data, samples(0, 110))
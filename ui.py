@@ -0,0 +1,102 @@
+# ui.py
+
+import pygame
+
+
+class Label:
+    """
+    A piece of text that keeps its rendered surface. It is only rendered
+    again when its text or color changes.
+    """
+
+    renders = 0 # Text renders done by all labels (shown in the profiler HUD)
+
+    def __init__(self, font, text, color, center=None, topleft=None):
+        self.font = font
+        self.text = text
+        self.color = color
+        self.center = center
+        self.topleft = topleft
+        self._surface = None
+
+    def set_text(self, text):
+        if text != self.text:
+            self.text = text
+            self._surface = None
+
+    def set_color(self, color):
+        if color != self.color:
+            self.color = color
+            self._surface = None
+
+    @property
+    def surface(self):
+        if self._surface is None:
+            self._surface = self.font.render(self.text, True, self.color)
+            Label.renders += 1
+        return self._surface
+
+    def rect(self):
+        if self.center is not None:
+            return self.surface.get_rect(center=self.center)
+        return self.surface.get_rect(topleft=self.topleft or (0, 0))
+
+    def draw(self, target):
+        return target.blit(self.surface, self.rect())
+
+
+class Button:
+    """Clickable text button. Its normal and hover text are each rendered once."""
+
+    def __init__(self, name, rect, font, color=(255, 255, 255), hover_color=(255, 182, 193)):
+        self.name = name
+        self.rect = pygame.Rect(rect)
+        self._labels = {False: Label(font, name, color, center=self.rect.center),
+                        True: Label(font, name, hover_color, center=self.rect.center)}
+
+    def hovered(self, mouse_pos):
+        return self.rect.collidepoint(mouse_pos)
+
+    def draw(self, target, mouse_pos):
+        return self._labels[bool(self.hovered(mouse_pos))].draw(target)
+
+
+class Backdrop:
+    """
+    A window-sized dimming overlay with a panel (and optional title) on it,
+    composited into one SRCALPHA surface once and blitted every frame.
+    """
+
+    def __init__(self, size, overlay_color, panel_rect, panel_color, border_color, border_width=2,
+                 border_radius=10, title=None):
+        self.surface = pygame.Surface(size, pygame.SRCALPHA)
+        self.surface.fill(overlay_color)
+        pygame.draw.rect(self.surface, panel_color, panel_rect, border_radius=border_radius)
+        pygame.draw.rect(self.surface, border_color, panel_rect, border_width, border_radius=border_radius)
+        if title is not None:
+            title.draw(self.surface)
+
+    def draw(self, target):
+        return target.blit(self.surface, (0, 0))
+
+
+class Screen:
+    """
+    A retained set of UI elements: an optional background (a fill color or a
+    Backdrop), static labels and buttons. draw() only blits cached surfaces.
+    """
+
+    def __init__(self, buttons, background=None, labels=()):
+        self.buttons = list(buttons)
+        self.background = background
+        self.labels = list(labels)
+
+    def draw(self, target, mouse_pos):
+        if isinstance(self.background, Backdrop):
+            self.background.draw(target)
+        elif self.background is not None:
+            target.fill(self.background)
+        for label in self.labels:
+            label.draw(target)
+        for button in self.buttons:
+            button.draw(target, mouse_pos)
@@ -0,0 +1,169 @@
+# viseme.py
+
+import math
+from collections import namedtuple
+import numpy as np
+from audio_frontend import smoothing_coefficients
+
+FFT_SIZE = 512 # Analysis window in samples (32 ms at 16 kHz); blocks are slid into it
+MIN_HOLD_MS = 60 # A new mouth shape has to last this long before it is shown (stops flicker)
+ATTACK_MS = 15
+RELEASE_MS = 80
+
+# Frequency bands (Hz) summed by the filterbank: voicing, first formant, second formant, hiss
+BANDS = ((80, 350), (350, 1000), (1000, 2500), (2500, 7000))
+
+# Mouth shapes, roughly from least to most open. Each one (except "closed") can
+# have its own pose image: <name>Narrow.png, <name>Round.png, <name>Wide.png, <name>Open.png
+VISEMES = ("closed", "narrow", "round", "wide", "open")
+VISEME_POSES = VISEMES[1:]
+
+# Band-share thresholds for the vowel guess (shares of voice + F1 + F2 energy)
+HISS_RATIO = 1.0 # Hiss energy above the voiced energy times this = "narrow" (s, f, sh)
+OPEN_F1_SHARE = 0.45 # Strong first formant = open jaw ("a")
+WIDE_F2_SHARE = 0.20 # Strong second formant = spread lips ("e", "i"); otherwise "round" ("o", "u")
+
+# Openness maps the smoothed level in dBFS linearly onto 0..1 between these
+FLOOR_DB = -50.0
+CEILING_DB = -15.0
+
+# Immutable state published by the analyzer, read lock-free by the render loop
+VisemeSnapshot = namedtuple("VisemeSnapshot", "viseme openness seq")
+
+
+class VisemeAnalyzer:
+    """
+    Estimates a mouth shape and openness from microphone blocks. Each block
+    is slid into a fixed FFT window; the buffers are allocated up front, so
+    process() (on the PortAudio callback thread) only works in place. The
+    shape is a cheap heuristic on the formant bands.
+    """
+
+    def __init__(self, samplerate=16000, fft_size=FFT_SIZE, bands=BANDS, attack_ms=ATTACK_MS,
+                 release_ms=RELEASE_MS, min_hold_ms=MIN_HOLD_MS, floor_db=FLOOR_DB, ceiling_db=CEILING_DB):
+        if len(bands) != 4:
+            raise ValueError("bands must be (voicing, first formant, second formant, hiss)")
+        if ceiling_db <= floor_db:
+            raise ValueError("ceiling_db must be above floor_db")
+        self.samplerate = samplerate
+        self.fft_size = fft_size
+        self.attack_ms = attack_ms
+        self.release_ms = release_ms
+        self.min_hold = min_hold_ms / 1000.0
+        self.floor_db = floor_db
+        self.ceiling_db = ceiling_db
+
+        # Each sample is written twice (at i and i + fft_size), so the latest
+        # fft_size samples are always one contiguous slice without shifting
+        self._ring = np.zeros(2 * fft_size, dtype=np.float32)
+        self._pos = 0
+        self._window = np.hanning(fft_size).astype(np.float32)
+        self._windowed = np.zeros(fft_size, dtype=np.float32)
+        self._spectrum = np.empty(fft_size // 2 + 1, dtype=np.complex64)
+        self._power = np.empty(fft_size // 2 + 1, dtype=np.float32)
+        self._energies = np.empty(len(bands), dtype=np.float32)
+        try:
+            np.fft.rfft(self._windowed, out=self._spectrum)
+            self._fft_in_place = True
+        except TypeError:
+            self._fft_in_place = False # NumPy < 2.0 has no out= on FFTs; copy the result instead
+
+        # Rows sum the power bins of one band, scaled to mean-square int16 full scale
+        # (the window gain and the 32768 divide are folded in, so a full-scale sine reads about -3 dB)
+        freqs = np.fft.rfftfreq(fft_size, 1.0 / samplerate)
+        self._filterbank = np.zeros((len(bands), len(freqs)), dtype=np.float32)
+        for row, (low, high) in enumerate(bands):
+            self._filterbank[row, (freqs >= low) & (freqs < high)] = 1.0
+        self._filterbank *= 2.0 / (float(np.sum(self._window)) * 32768.0) ** 2
+
+        self._level_db = floor_db
+        self._shape = "closed"
+        self._candidate = "closed"
+        self._candidate_since = 0.0
+        self._samples = 0 # Audio clock for the hold time, so it works the same on files run faster than real time
+        self._seq = 0
+        self.snapshot = VisemeSnapshot("closed", 0.0, 0)
+
+    def process(self, indata):
+        """Call from the audio callback with an int16 (frames, channels) block."""
+        block = indata[:, 0] if indata.ndim > 1 else indata
+        frames = len(block)
+        if frames == 0:
+            return
+        self._push(block)
+
+        start = self._pos # Oldest sample of the window
+        np.multiply(self._ring[start:start + self.fft_size], self._window, out=self._windowed)
+        if self._fft_in_place:
+            np.fft.rfft(self._windowed, out=self._spectrum)
+        else:
+            self._spectrum[:] = np.fft.rfft(self._windowed)
+        np.abs(self._spectrum, out=self._power)
+        np.multiply(self._power, self._power, out=self._power)
+        np.dot(self._filterbank, self._power, out=self._energies)
+
+        voice, f1, f2, hiss = self._energies.tolist()
+        voiced = voice + f1 + f2
+        level_db = 10.0 * math.log10(voiced + hiss + 1e-12)
+
+        attack, release = smoothing_coefficients(frames, self.samplerate, self.attack_ms, self.release_ms)
+        coeff = attack if level_db > self._level_db else release
+        self._level_db += coeff * (level_db - self._level_db)
+        openness = min(1.0, max(0.0, (self._level_db - self.floor_db) / (self.ceiling_db - self.floor_db)))
+
+        if openness <= 0.0:
+            shape = "closed"
+        elif hiss > voiced * HISS_RATIO:
+            shape = "narrow"
+        elif f1 > voiced * OPEN_F1_SHARE:
+            shape = "open"
+        elif f2 > voiced * WIDE_F2_SHARE:
+            shape = "wide"
+        else:
+            shape = "round"
+        self._samples += frames
+        self._settle(shape, self._samples / self.samplerate)
+
+        self._seq += 1
+        self.snapshot = VisemeSnapshot(self._shape, openness, self._seq)
+
+    def _push(self, block):
+        """Writes a block into the ring (both copies) and advances the write position."""
+        n = self.fft_size
+        if len(block) >= n:
+            block = block[-n:]
+            np.copyto(self._ring[:n], block, casting="unsafe")
+            np.copyto(self._ring[n:], block, casting="unsafe")
+            self._pos = 0
+        else:
+            first = min(len(block), n - self._pos)
+            for offset in (self._pos, self._pos + n):
+                np.copyto(self._ring[offset:offset + first], block[:first], casting="unsafe")
+            rest = len(block) - first
+            if rest:
+                np.copyto(self._ring[:rest], block[first:], casting="unsafe")
+                np.copyto(self._ring[n:n + rest], block[first:], casting="unsafe")
+            self._pos = (self._pos + len(block)) % n
+
+    def _settle(self, shape, now):
+        """Only switches the published shape once a new one has held for min_hold seconds of audio."""
+        if shape == self._shape:
+            self._candidate = shape
+            return
+        if shape != self._candidate:
+            self._candidate = shape
+            self._candidate_since = now
+        # Closing the mouth is never delayed, so the avatar doesn't keep talking into silence
+        if shape == "closed" or now - self._candidate_since >= self.min_hold:
+            self._shape = shape
+
+
+def pose_for(images, viseme, talking):
+    """
+    The image to show: the mouth shape's own pose while talking if the model
+    has one, else 'talking' while talking and 'idle' otherwise.
+    """
+    if not talking:
+        return images['idle']
+    image = images.get(viseme)
+    return image if image is not None else images['talking']
@@ -1,8 +1,8 @@
 # yt_connect.py
 
-import pytchat
-import time
-import threading
+from chat_matcher import KeywordMatcher
+from event_bus import ChatEventBus
+from chat_sources import ChatIngestor, PytchatSource, ReplaySource
 
 # Constant keyword dictionary
 KEYWORDS = {
@@ -16,37 +16,55 @@ KEYWORDS = {
     "cool": "gives model a cool sunglasses"
 }
 
-# Where detected events will be stored
-event_queue = []
-
-def _watch_live_chat(video_id):
-    chat = pytchat.create(video_id=video_id)
-    print(f"Watching live chat for video ID: {video_id}")
-
-    while chat.is_alive():
-        try:
-            for c in chat.get().sync_items():
-                message = c.message.lower()
-                for keyword, action in KEYWORDS.items():
-                    if keyword in message:
-                        event_queue.append((c.author.name, keyword, action))
-            time.sleep(1)  
-        except Exception as e:
-            print(f"Chat watcher error: {e}")
-            time.sleep(5)  
+# Extra spellings/emotes that count as a keyword, e.g. {"baldy": "bald"}
+KEYWORD_ALIASES = {}
+
+# Compiled matcher + action table, swapped as one unit by set_keywords()
+_table = (KeywordMatcher(KEYWORDS, KEYWORD_ALIASES), dict(KEYWORDS))
+
+# Where detected events will be stored (bounded, coalesced, rate limited)
+event_bus = ChatEventBus()
+
+def handle_chat_message(message):
+    """Runs keyword matching on one ChatMessage from any source and publishes the events."""
+    matcher, actions = _table
+    # One pass per message, whole words only
+    for keyword in matcher.find(message.text):
+        event_bus.publish(message.author, keyword, actions[keyword], now=message.time)
+
+# All chat sources share one asyncio loop on one background thread
+ingestor = ChatIngestor(handle_chat_message)
+
+def set_keywords(keywords, aliases=None):
+    """
+    Replaces the keyword table ({keyword: action}) and rebuilds the matcher.
+    Running watchers pick up the new table on their next message.
+    """
+    global _table
+    _table = (KeywordMatcher(keywords, aliases), dict(keywords))
 
 def start_chat_listener(video_id):
     """
-    Starts the chat listener in a separate thread.
+    Starts watching a YouTube live chat. Can be called once per video ID
+    to follow several streams at the same time.
+    """
+    ingestor.add_source(PytchatSource(video_id))
+
+def start_replay_listener(path, speed=1.0, loop=False):
     """
-    thread = threading.Thread(target=_watch_live_chat, args=(video_id,), daemon=True)
-    thread.start()
+    Feeds a recorded JSONL chat log through the same keyword path,
+    e.g. for testing without a live stream.
+    """
+    ingestor.add_source(ReplaySource(path, speed, loop))
+
+def stop_chat_listeners():
+    """Stops every chat source."""
+    ingestor.stop()
 
 def check_keywords():
     """
     Returns all chat events (and clears them).
-    Each event is (author, keyword, action).
+    Each event is a ChatEvent (author, keyword, action, count, time),
+    where count is how many messages were merged into it.
     """
-    events = event_queue.copy()
-    event_queue.clear()
-    return events
+    return event_bus.drain()